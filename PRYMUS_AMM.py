@@ -1,6 +1,202 @@
 # { "Depends": "py-genlayer:test" }
 
 from genlayer import *
+from dataclasses import dataclass
+
+# ============== CURVE CONSTANTS ==============
+# Configuration never changes after deployment, so everything the bonding
+# curve derives from it is computed once at import time.
+# prymus_curve.py mirrors this math for off-chain use; keep the two in step
+# (python -m tools.check_curve compares them)
+
+DIVIDEND_FEE = 20  # 5% tax (100/20)
+TOKEN_PRICE_INITIAL = 100000000000  # 0.0000001 ether in wei
+TOKEN_PRICE_INCREMENTAL = 10000000  # 0.00000001 ether in wei
+MAGNITUDE = 2**64
+ONE_TOKEN = 10**18
+
+# _ethereum_to_tokens: sqrt((initial_scaled + incremental * supply)^2 + ETH_TERM_FACTOR * ethereum)
+TOKEN_PRICE_INITIAL_SCALED = TOKEN_PRICE_INITIAL * ONE_TOKEN
+ETH_TERM_FACTOR = 2 * TOKEN_PRICE_INCREMENTAL * ONE_TOKEN * ONE_TOKEN
+
+# _ethereum_for_tokens: exact inverse of _ethereum_to_tokens
+ETH_TERM_DIVISOR = 2 * ONE_TOKEN * ONE_TOKEN
+
+# _tokens_to_ethereum
+TWO_ONE_TOKEN = 2 * ONE_TOKEN
+
+
+# ============== QUOTES ==============
+# Amounts per quote_*_many call and steps per ladder, so a single view
+# stays bounded like the paged ones
+
+QUOTE_BATCH_LIMIT = 256
+
+
+# ============== ACCOUNT SUMMARIES ==============
+# Addresses per account_summaries call, bounded like the other batch views
+
+ACCOUNT_SUMMARY_LIMIT = 256
+
+
+# ============== TRANSFERS ==============
+# Recipients per transfer_many call; each logs one event, so a batch must
+# stay well inside EVENT_LOG_CAPACITY
+
+TRANSFER_BATCH_LIMIT = 256
+
+
+# ============== EVENT LOG ==============
+# Oldest events are overwritten once the ring buffer is full; indexers
+# page through it with events_since and detect gaps from the seq numbers
+
+EVENT_LOG_CAPACITY = 4096
+EVENT_PAGE_LIMIT = 256
+
+# Events store a one-byte code; EVENT_NAMES[code] is the name events_since reports
+EVENT_TOKEN_PURCHASE = 0
+EVENT_REINVESTMENT = 1
+EVENT_TOKEN_SELL = 2
+EVENT_WITHDRAW = 3
+EVENT_TRANSFER = 4
+EVENT_EXIT = 5
+EVENT_INITIAL_STAGE_DISABLED = 6
+EVENT_AMBASSADOR_PHASE_ENDED = 7
+EVENT_ADMINISTRATOR_SET = 8
+EVENT_STAKING_REQUIREMENT_SET = 9
+EVENT_NAME_SET = 10
+EVENT_SYMBOL_SET = 11
+EVENT_DEBUG_LOGGING_SET = 12
+EVENT_LEGACY_ACCOUNTS_MIGRATED = 13
+EVENT_KEEPER_SET = 14
+EVENT_CHECKPOINT_INTERVAL_SET = 15
+EVENT_IMPORT_STARTED = 16
+EVENT_ACCOUNTS_IMPORTED = 17
+EVENT_IMPORT_FINALIZED = 18
+EVENT_HOLDER_RANKING_RESCANNED = 19
+
+EVENT_NAMES = (
+    "TokenPurchase",
+    "Reinvestment",
+    "TokenSell",
+    "Withdraw",
+    "Transfer",
+    "Exit",
+    "InitialStageDisabled",
+    "AmbassadorPhaseEnded",
+    "AdministratorSet",
+    "StakingRequirementSet",
+    "NameSet",
+    "SymbolSet",
+    "DebugLoggingSet",
+    "LegacyAccountsMigrated",
+    "KeeperSet",
+    "CheckpointIntervalSet",
+    "ImportStarted",
+    "AccountsImported",
+    "ImportFinalized",
+    "HolderRankingRescanned",
+)
+
+
+# ============== HOLDER REGISTRY ==============
+# Holders are enumerated in no particular order (swap-and-pop keeps every
+# update O(1)); only the largest TOP_HOLDER_CAPACITY are kept ranked
+
+HOLDER_PAGE_LIMIT = 256
+TOP_HOLDER_CAPACITY = 50
+
+
+# ============== KEEPERS ==============
+
+COMPOUND_BATCH_LIMIT = 256
+
+
+# ============== PRICE CHECKPOINTS ==============
+# A checkpoint is taken every checkpoint_interval trades. Resolution r keeps
+# every CHECKPOINT_FANOUT**r-th checkpoint in its own ring buffer of
+# CHECKPOINT_CAPACITY, so charts can fetch any time span in a bounded
+# number of points
+
+DEFAULT_CHECKPOINT_INTERVAL = 10
+CHECKPOINT_RESOLUTIONS = 4
+CHECKPOINT_FANOUT = 8
+CHECKPOINT_CAPACITY = 1024
+CHECKPOINT_PAGE_LIMIT = 256
+
+
+# ============== ACCOUNT IMPORT ==============
+# Holders of an existing Hourglass deployment are copied in by
+# begin_import, any number of import_accounts chunks and finalize_import
+
+IMPORT_BATCH_LIMIT = 256
+
+
+# ============== REFERRALS ==============
+
+TOP_REFERRER_CAPACITY = 50
+
+
+# ============== STORAGE RECORDS ==============
+
+@allow_storage
+@dataclass
+class Account:
+    """Per-address state, kept together so each transaction loads and stores it once"""
+    balance: u256
+    payout: i256  # Can be negative, so i256
+    referral_bonus: u256
+    change: u256  # buy_exact_tokens overpayment; only withdraw and exit pay it out
+
+
+@allow_storage
+@dataclass
+class RankEntry:
+    """An address and the value it is ranked by"""
+    address: str
+    value: u256
+
+
+@allow_storage
+@dataclass
+class Event:
+    """
+    One state change in the event log
+    target is the counterparty (recipient, referrer, identifier) or the
+    configured value; ethereum and tokens are the amounts moved
+    """
+    kind: u8  # index into EVENT_NAMES
+    seq: u256
+    sender: str
+    target: str
+    ethereum: u256
+    tokens: u256
+
+
+@allow_storage
+@dataclass
+class Checkpoint:
+    """Curve state after trade number trade; volume is cumulative ETH traded"""
+    trade: u256
+    token_supply: u256
+    buy_price: u256
+    sell_price: u256
+    profit_per_share: u256
+    volume: u256
+
+
+@allow_storage
+@dataclass
+class ReferralStats:
+    """
+    What a referrer's credited referrals have brought in since deployment;
+    bonus_earned keeps counting after the bonus is withdrawn
+    """
+    referred_buys: u256
+    referred_volume: u256
+    bonus_earned: u256
+    referees: u256
+
 
 class PRYMUSAMM(gl.Contract):
     """
@@ -28,7 +224,8 @@ class PRYMUSAMM(gl.Contract):
     token_supply: u256
     profit_per_share: u256
     
-    # Mappings (using GenLayer's TreeMap)
+    # Legacy per-field mappings (using GenLayer's TreeMap)
+    # Superseded by accounts; only read by migrate_legacy_accounts
     token_balance_ledger: TreeMap[str, u256]
     referral_balance: TreeMap[str, u256]
     payouts_to: TreeMap[str, i256]  # Can be negative, so i256
@@ -41,15 +238,74 @@ class PRYMUSAMM(gl.Contract):
     # Phase control
     only_ambassadors: bool
     
+    # Balance, payout tracker and referral bonus per address
+    accounts: TreeMap[str, Account]
+    
+    # Addresses with a positive balance, unordered, and each one's 1-based
+    # position in that list
+    holders: DynArray[str]
+    holder_positions: TreeMap[str, u256]
+    
+    # Event log (ring buffer of the last EVENT_LOG_CAPACITY events)
+    events: DynArray[Event]
+    next_event_seq: u256
+    debug_logging: bool
+    
+    # Addresses allowed to compound other holders' earnings
+    keepers: TreeMap[str, bool]
+    
+    # Price checkpoints; slot resolution * CHECKPOINT_CAPACITY + index % CHECKPOINT_CAPACITY
+    # holds checkpoint number index * CHECKPOINT_FANOUT**resolution
+    checkpoint_interval: u256
+    trade_count: u256
+    cumulative_volume: u256
+    checkpoints: TreeMap[u256, Checkpoint]
+    checkpoints_recorded: u256
+    
+    # Account import in progress: the snapshot's totals and what the
+    # chunks imported so far add up to
+    import_active: bool
+    import_target_supply: u256
+    import_supply: u256
+    import_accounts_count: u256
+    import_liabilities: u256
+    
+    # Per-referrer totals, the referrer/referee pairs already counted
+    # (keyed "referrer/referee") and how many referrers have totals
+    referral_stats_of: TreeMap[str, ReferralStats]
+    referral_pairs: TreeMap[str, bool]
+    referrer_total: u256
+    
+    # Bounded rankings (see _rank_update): entries sorted largest first,
+    # each ranked address's 1-based position, and the floor no unranked
+    # value exceeds
+    holder_ranking: DynArray[RankEntry]
+    holder_ranking_positions: TreeMap[str, u256]
+    holder_ranking_floor: u256
+    referrer_ranking: DynArray[RankEntry]
+    referrer_ranking_positions: TreeMap[str, u256]
+    referrer_ranking_floor: u256
+    
+    # Holder ranking rescan in progress (see rescan_holder_ranking): holders
+    # before position holder_rescan_cursor have been visited
+    holder_rescan_active: bool
+    holder_rescan_cursor: u256
+    
+    # One-token prices at the current token_supply, refreshed by every
+    # write that moves the supply (and by migrate_legacy_accounts, since an
+    # upgraded contract starts with them at 0)
+    cached_buy_price: u256
+    cached_sell_price: u256
+    
     # ============== CONSTRUCTOR ==============
     def __init__(self):
         # Initialize configuration
         self.name = "PRYMUS"
         self.symbol = "xPRYM"
-        self.dividend_fee = u256(20)  # 5% tax
-        self.token_price_initial = u256(100000000000)  # 0.0000001 ether in wei
-        self.token_price_incremental = u256(10000000)  # 0.00000001 ether in wei
-        self.magnitude = u256(2**64)
+        self.dividend_fee = u256(DIVIDEND_FEE)
+        self.token_price_initial = u256(TOKEN_PRICE_INITIAL)
+        self.token_price_incremental = u256(TOKEN_PRICE_INCREMENTAL)
+        self.magnitude = u256(MAGNITUDE)
         
         # Staking requirement (100 tokens initially, but in minimal units)
         self.staking_requirement = u256(100 * 10**18)
@@ -57,6 +313,7 @@ class PRYMUSAMM(gl.Contract):
         # Initialize state
         self.token_supply = u256(0)
         self.profit_per_share = u256(0)
+        self._refresh_price_cache()
         self.only_ambassadors = False
         
         # Initialize mappings
@@ -66,6 +323,34 @@ class PRYMUSAMM(gl.Contract):
         self.administrators = TreeMap[str, bool]()
         self.ambassadors = TreeMap[str, bool]()
         self.ambassador_accumulated_quota = TreeMap[str, u256]()
+        self.accounts = TreeMap[str, Account]()
+        self.holders = DynArray[str]()
+        self.holder_positions = TreeMap[str, u256]()
+        self.events = DynArray[Event]()
+        self.next_event_seq = u256(0)
+        self.debug_logging = False
+        self.keepers = TreeMap[str, bool]()
+        self.checkpoint_interval = u256(DEFAULT_CHECKPOINT_INTERVAL)
+        self.trade_count = u256(0)
+        self.cumulative_volume = u256(0)
+        self.checkpoints = TreeMap[u256, Checkpoint]()
+        self.checkpoints_recorded = u256(0)
+        self.import_active = False
+        self.import_target_supply = u256(0)
+        self.import_supply = u256(0)
+        self.import_accounts_count = u256(0)
+        self.import_liabilities = u256(0)
+        self.referral_stats_of = TreeMap[str, ReferralStats]()
+        self.referral_pairs = TreeMap[str, bool]()
+        self.referrer_total = u256(0)
+        self.holder_ranking = DynArray[RankEntry]()
+        self.holder_ranking_positions = TreeMap[str, u256]()
+        self.holder_ranking_floor = u256(0)
+        self.referrer_ranking = DynArray[RankEntry]()
+        self.referrer_ranking_positions = TreeMap[str, u256]()
+        self.referrer_ranking_floor = u256(0)
+        self.holder_rescan_active = False
+        self.holder_rescan_cursor = u256(0)
         
         # Set up administrators and ambassadors
         self._initialize_contract()
@@ -91,6 +376,8 @@ class PRYMUSAMM(gl.Contract):
         Purchase tokens with native currency
         payable decorator allows receiving funds
         """
+        assert not self.import_active, "Import in progress"
+        
         # Get the incoming amount from the transaction
         incoming_ethereum = u256(gl.msg.value)
         
@@ -99,10 +386,13 @@ class PRYMUSAMM(gl.Contract):
             self._anti_early_whale(incoming_ethereum, gl.msg.sender)
         
         # Process the token purchase
-        tokens_minted = self._purchase_tokens(incoming_ethereum, referred_by)
+        account = self._load_account(gl.msg.sender)
+        tokens_minted = self._purchase_tokens(incoming_ethereum, referred_by, gl.msg.sender, account)
+        self.accounts[gl.msg.sender] = account
         
         # Log the purchase event
-        print(f"TokenPurchase: {gl.msg.sender}, ETH: {incoming_ethereum}, Tokens: {tokens_minted}, ReferredBy: {referred_by}")
+        self._emit(EVENT_TOKEN_PURCHASE, referred_by, incoming_ethereum, tokens_minted)
+        self._record_trade(incoming_ethereum)
         
         return tokens_minted
     
@@ -111,26 +401,27 @@ class PRYMUSAMM(gl.Contract):
         """
         Converts all of caller's dividends to tokens
         """
+        assert not self.import_active, "Import in progress"
+        
+        account = self._load_account(gl.msg.sender)
+        
         # Verify the caller has dividends
-        dividends = self._my_dividends(False)
+        dividends = self._account_dividends(account, self.profit_per_share)
         assert dividends > 0, "No dividends to reinvest"
         
-        # Add referral bonus if any
-        referral_bonus = self.referral_balance.get(gl.msg.sender, u256(0))
-        total_reinvest = dividends + referral_bonus
-        
-        # Clear referral balance
-        if gl.msg.sender in self.referral_balance:
-            self.referral_balance[gl.msg.sender] = u256(0)
+        # Add referral bonus if any, and clear it
+        total_reinvest = dividends + account.referral_bonus
+        account.referral_bonus = u256(0)
         
         # Update payout tracker
-        current_payout = self.payouts_to.get(gl.msg.sender, i256(0))
-        self.payouts_to[gl.msg.sender] = current_payout + i256(total_reinvest * self.magnitude)
+        account.payout += i256(total_reinvest * MAGNITUDE)
         
         # Purchase tokens with the dividends
-        tokens_minted = self._purchase_tokens(total_reinvest, "")
+        tokens_minted = self._purchase_tokens(total_reinvest, "", gl.msg.sender, account)
+        self.accounts[gl.msg.sender] = account
         
-        print(f"Reinvestment: {gl.msg.sender}, ETH: {total_reinvest}, Tokens: {tokens_minted}")
+        self._emit(EVENT_REINVESTMENT, "", total_reinvest, tokens_minted)
+        self._record_trade(total_reinvest)
         
         return tokens_minted
     
@@ -139,29 +430,33 @@ class PRYMUSAMM(gl.Contract):
         """
         Sell tokens back to the bonding curve
         """
+        assert not self.import_active, "Import in progress"
+        
         # Verify the caller has enough tokens
-        caller_balance = self.token_balance_ledger.get(gl.msg.sender, u256(0))
-        assert amount_of_tokens <= caller_balance and amount_of_tokens > 0, "Invalid token amount"
+        account = self._load_account(gl.msg.sender)
+        assert amount_of_tokens <= account.balance and amount_of_tokens > 0, "Invalid token amount"
         
         # Calculate the sale
-        ethereum_value = self._tokens_to_ethereum(amount_of_tokens)
-        dividends = ethereum_value // self.dividend_fee
+        ethereum_value = self._tokens_to_ethereum(amount_of_tokens, self.token_supply)
+        dividends = ethereum_value // DIVIDEND_FEE
         taxed_ethereum = ethereum_value - dividends
         
         # Burn the sold tokens
         self.token_supply -= amount_of_tokens
-        self.token_balance_ledger[gl.msg.sender] = caller_balance - amount_of_tokens
+        account.balance -= amount_of_tokens
         
         # Update dividends tracker
-        updated_payouts = i256(self.profit_per_share * amount_of_tokens + (taxed_ethereum * self.magnitude))
-        current_payout = self.payouts_to.get(gl.msg.sender, i256(0))
-        self.payouts_to[gl.msg.sender] = current_payout - updated_payouts
+        account.payout -= i256(self.profit_per_share * amount_of_tokens + (taxed_ethereum * MAGNITUDE))
+        self.accounts[gl.msg.sender] = account
+        self._update_holder(gl.msg.sender, account.balance)
         
         # Update profit per share if there are tokens left
         if self.token_supply > 0:
-            self.profit_per_share += (dividends * self.magnitude) // self.token_supply
+            self.profit_per_share += (dividends * MAGNITUDE) // self.token_supply
+        self._refresh_price_cache()
         
-        print(f"TokenSell: {gl.msg.sender}, Tokens: {amount_of_tokens}, ETH: {taxed_ethereum}")
+        self._emit(EVENT_TOKEN_SELL, "", taxed_ethereum, amount_of_tokens)
+        self._record_trade(ethereum_value)
         
         # In a real implementation, this would transfer ETH to the caller
         # For GenLayer, the actual transfer would be handled by the platform
@@ -172,23 +467,23 @@ class PRYMUSAMM(gl.Contract):
         """
         Withdraw all of the caller's dividends
         """
-        # Get dividends
-        dividends = self._my_dividends(False)
-        assert dividends > 0, "No dividends to withdraw"
+        assert not self.import_active, "Import in progress"
         
-        # Add referral bonus if any
-        referral_bonus = self.referral_balance.get(gl.msg.sender, u256(0))
-        total_withdraw = dividends + referral_bonus
+        account = self._load_account(gl.msg.sender)
         
-        # Update payout tracker
-        current_payout = self.payouts_to.get(gl.msg.sender, i256(0))
-        self.payouts_to[gl.msg.sender] = current_payout + i256(dividends * self.magnitude)
+        # Get dividends and add the referral bonus, which is withdrawable on
+        # its own as in the Solidity reference, and any buy_exact_tokens change
+        dividends = self._account_dividends(account, self.profit_per_share)
+        total_withdraw = dividends + account.referral_bonus + account.change
+        assert total_withdraw > 0, "No dividends to withdraw"
         
-        # Clear referral balance
-        if gl.msg.sender in self.referral_balance:
-            self.referral_balance[gl.msg.sender] = u256(0)
+        # Update payout tracker and clear referral balance and change
+        account.payout += i256(dividends * MAGNITUDE)
+        account.referral_bonus = u256(0)
+        account.change = u256(0)
+        self.accounts[gl.msg.sender] = account
         
-        print(f"Withdraw: {gl.msg.sender}, Amount: {total_withdraw}")
+        self._emit(EVENT_WITHDRAW, "", total_withdraw, u256(0))
         
         # In a real implementation, this would transfer ETH to the caller
         return total_withdraw
@@ -198,70 +493,243 @@ class PRYMUSAMM(gl.Contract):
         """
         Transfer tokens to another address (with 5% fee)
         """
+        assert not self.import_active, "Import in progress"
+        
         # Verify the caller has enough tokens
-        caller_balance = self.token_balance_ledger.get(gl.msg.sender, u256(0))
-        assert amount_of_tokens <= caller_balance and amount_of_tokens > 0, "Insufficient tokens"
+        account = self._load_account(gl.msg.sender)
+        assert amount_of_tokens <= account.balance and amount_of_tokens > 0, "Insufficient tokens"
         assert not self.only_ambassadors, "Transfers disabled during ambassador phase"
         
-        # Withdraw any outstanding dividends first
-        if self._my_dividends(True) > 0:
-            # Note: In GenLayer, we can't call another write function from within a function
-            # So we need to handle this differently - for now, we'll just skip
-            # In production, you might want to restructure this logic
-            pass
+        # The Solidity reference withdraws outstanding dividends first; a write
+        # method can't call another here, so they stay claimable instead
+        taxed_tokens = self._transfer_tokens(account, [to_address], [amount_of_tokens])[0]
         
-        # Calculate the 5% transfer fee
-        token_fee = amount_of_tokens // self.dividend_fee
-        taxed_tokens = amount_of_tokens - token_fee
-        dividends = self._tokens_to_ethereum(token_fee)
+        self._emit(EVENT_TRANSFER, to_address, u256(0), taxed_tokens)
+        self._record_trade(u256(0))
         
-        # Burn the fee tokens
-        self.token_supply -= token_fee
+        return True
+    
+    @gl.public.write
+    def transfer_many(self, recipients: list[str], amounts: list[u256]) -> bool:
+        """
+        Transfer tokens to several addresses in one call (with 5% fee each),
+        at most TRANSFER_BATCH_LIMIT recipients
+        Balances match sequential transfer calls; the burned fees are priced
+        with one curve evaluation and dispersed with one profit_per_share update
+        """
+        assert not self.import_active, "Import in progress"
         
-        # Transfer tokens
-        self.token_balance_ledger[gl.msg.sender] = caller_balance - amount_of_tokens
+        assert len(recipients) == len(amounts) and len(recipients) > 0, "Mismatched recipients and amounts"
+        assert len(recipients) <= TRANSFER_BATCH_LIMIT, "Too many recipients"
+        assert not self.only_ambassadors, "Transfers disabled during ambassador phase"
         
-        to_balance = self.token_balance_ledger.get(to_address, u256(0))
-        self.token_balance_ledger[to_address] = to_balance + taxed_tokens
+        # Verify the caller has enough tokens for the whole batch
+        account = self._load_account(gl.msg.sender)
+        total_tokens = u256(0)
+        for amount_of_tokens in amounts:
+            assert amount_of_tokens > 0, "Insufficient tokens"
+            total_tokens += amount_of_tokens
+        assert total_tokens <= account.balance, "Insufficient tokens"
         
-        # Update dividend trackers
-        current_payout_sender = self.payouts_to.get(gl.msg.sender, i256(0))
-        current_payout_receiver = self.payouts_to.get(to_address, i256(0))
+        taxed_tokens = self._transfer_tokens(account, recipients, amounts)
         
-        self.payouts_to[gl.msg.sender] = current_payout_sender - i256(self.profit_per_share * amount_of_tokens)
-        self.payouts_to[to_address] = current_payout_receiver + i256(self.profit_per_share * taxed_tokens)
+        for to_address, received in zip(recipients, taxed_tokens):
+            self._emit(EVENT_TRANSFER, to_address, u256(0), received)
+        self._record_trade(u256(0))
         
-        # Disperse dividends among holders
-        if self.token_supply > 0:
-            self.profit_per_share += (dividends * self.magnitude) // self.token_supply
+        return True
+    
+    @gl.public.write.payable
+    def buy_exact_tokens(self, amount_of_tokens: u256, max_ethereum: u256, referred_by: str = "") -> u256:
+        """
+        Purchase exactly amount_of_tokens (or one rounding step more)
+        Spends the quoted cost, at most max_ethereum; value sent above the
+        cost is kept as the buyer's change, paid out by withdraw or exit
+        Returns: the ETH spent
+        """
+        assert not self.import_active, "Import in progress"
         
-        print(f"Transfer: {gl.msg.sender} -> {to_address}, Tokens: {taxed_tokens}")
+        assert amount_of_tokens > 0, "Token amount must be positive"
         
-        return True
+        # Price the purchase in closed form instead of searching the curve
+        cost = self._ethereum_for_tokens(amount_of_tokens, self.token_supply)
+        assert cost <= max_ethereum, "Cost exceeds max_ethereum"
+        assert cost <= u256(gl.msg.value), "Insufficient value sent"
+        
+        # Apply anti-early-whale protection if needed
+        if self.only_ambassadors:
+            self._anti_early_whale(cost, gl.msg.sender)
+        
+        account = self._load_account(gl.msg.sender)
+        tokens_minted = self._purchase_tokens(cost, referred_by, gl.msg.sender, account)
+        
+        # Callers send up to max_ethereum since the cost moves with the
+        # supply; the unspent value is paid out with the next withdraw or exit
+        # and is never reinvested
+        account.change += u256(gl.msg.value) - cost
+        self.accounts[gl.msg.sender] = account
+        
+        self._emit(EVENT_TOKEN_PURCHASE, referred_by, cost, tokens_minted)
+        self._record_trade(cost)
+        
+        return cost
     
     @gl.public.write
     def exit(self) -> tuple[u256, u256]:
         """
         Sell all tokens and withdraw all earnings
+        One pass over the account with the same outcome as selling and then
+        withdrawing; holders without dividends can still exit
         Returns: (tokens_sold, eth_withdrawn)
         """
-        # Get caller's token balance
-        caller_tokens = self.token_balance_ledger.get(gl.msg.sender, u256(0))
+        assert not self.import_active, "Import in progress"
+        
+        account = self._load_account(gl.msg.sender)
+        caller_tokens = account.balance
+        profit_per_share = self.profit_per_share
         
-        # Sell all tokens if any
-        eth_from_sale = u256(0)
+        # Dividends are earned on the balance held before the sale
+        dividends = self._account_dividends(account, profit_per_share)
+        
+        # Calculate the sale of the whole balance
+        ethereum_value = u256(0)
         if caller_tokens > 0:
-            eth_from_sale = self.sell(caller_tokens)
+            ethereum_value = self._tokens_to_ethereum(caller_tokens, self.token_supply)
+        sale_dividends = ethereum_value // DIVIDEND_FEE
+        taxed_ethereum = ethereum_value - sale_dividends
         
-        # Withdraw all dividends
-        eth_from_dividends = self.withdraw()
+        total_eth = taxed_ethereum + dividends + account.referral_bonus + account.change
+        assert total_eth > 0, "Nothing to exit"
         
-        total_eth = eth_from_sale + eth_from_dividends
+        # Settle the account: the sale and the withdrawal of the dividends
+        # leave only the sub-wei remainder of the payout tracker
+        account.payout += i256(dividends * MAGNITUDE) - i256(profit_per_share * caller_tokens)
+        account.balance = u256(0)
+        account.referral_bonus = u256(0)
+        account.change = u256(0)
+        self.accounts[gl.msg.sender] = account
         
-        print(f"Exit: {gl.msg.sender}, Total ETH: {total_eth}")
+        if caller_tokens > 0:
+            self._update_holder(gl.msg.sender, u256(0))
+            
+            # Burn the sold tokens and disperse the sale fee
+            self.token_supply -= caller_tokens
+            if self.token_supply > 0:
+                self.profit_per_share = profit_per_share + (sale_dividends * MAGNITUDE) // self.token_supply
+            self._refresh_price_cache()
         
+        self._emit(EVENT_EXIT, "", total_eth, caller_tokens)
+        if caller_tokens > 0:
+            self._record_trade(ethereum_value)
+        
+        # In a real implementation, this would transfer ETH to the caller
         return (caller_tokens, total_eth)
     
+    @gl.public.write
+    def compound_many(self, addresses: list[str]) -> u256:
+        """
+        Reinvest the dividends of listed holders, leaving referral bonus and change withdrawable
+        Keeper only. A third party may compound what the holder's tokens
+        earned, but not ETH the holder can withdraw as is. The combined ETH buys tokens in one curve evaluation, split
+        pro rata; holders without dividends are skipped
+        Returns: total tokens minted
+        """
+        assert not self.import_active, "Import in progress"
+        
+        assert self.keepers.get(gl.msg.sender, False), "Not keeper"
+        assert len(addresses) <= COMPOUND_BATCH_LIMIT, "Too many addresses"
+        
+        profit_per_share = self.profit_per_share
+        
+        # Collect each holder's dividends and pay them out virtually, as reinvest does
+        batch = {}
+        total_reinvest = u256(0)
+        for address in addresses:
+            if address in batch:
+                continue
+            account = self._load_account(address)
+            amount = self._account_dividends(account, profit_per_share)
+            if amount == 0:
+                continue
+            account.payout += i256(amount * MAGNITUDE)
+            batch[address] = (account, amount)
+            total_reinvest += amount
+        
+        assert total_reinvest > 0, "No dividends to reinvest"
+        
+        # One purchase for the whole batch; there is no referrer, so the full
+        # fee goes to holders
+        dividends = total_reinvest // DIVIDEND_FEE
+        tokens_bought = self._ethereum_to_tokens(total_reinvest - dividends, self.token_supply)
+        
+        shares = [(address, account, amount, tokens_bought * amount // total_reinvest)
+                  for address, (account, amount) in batch.items()]
+        tokens_minted = u256(sum(share for _, _, _, share in shares))
+        assert tokens_minted > 0, "Token amount must be positive"
+        
+        self.token_supply += tokens_minted
+        profit_per_share += (dividends * MAGNITUDE) // self.token_supply
+        self.profit_per_share = profit_per_share
+        self._refresh_price_cache()
+        
+        for address, account, amount, tokens in shares:
+            account.balance += tokens
+            account.payout += i256(profit_per_share * tokens - (amount // DIVIDEND_FEE) * MAGNITUDE)
+            self.accounts[address] = account
+            self._update_holder(address, account.balance)
+            self._emit(EVENT_REINVESTMENT, address, amount, tokens)
+        self._record_trade(total_reinvest)
+        
+        return tokens_minted
+    
+    @gl.public.write
+    def rescan_holder_ranking(self, limit: u256) -> u256:
+        """
+        Refill the holder ranking after holders have dropped out of it
+        Ranked holders whose balance falls below the ranking's floor leave
+        it, and the floor never comes down on its own, so the ranking can
+        hold fewer than TOP_HOLDER_CAPACITY entries. The first call of a
+        rescan resets the floor; each call then offers the next limit
+        holders (capped at HOLDER_PAGE_LIMIT) to the ranking. Until the
+        last holder is visited, top_holders may miss unvisited holders
+        below the old floor. Anyone may call
+        Returns: holders still to visit (0 once the rescan is complete and
+        the ranking is full)
+        """
+        assert not self.import_active, "Import in progress"
+        
+        if not self.holder_rescan_active:
+            self.holder_rescan_active = True
+            self.holder_rescan_cursor = u256(0)
+            self.holder_ranking_floor = u256(0)
+        
+        # Holders leaving since the last call may have shortened the list
+        cursor = min(self.holder_rescan_cursor, len(self.holders))
+        end = min(len(self.holders), cursor + min(limit, HOLDER_PAGE_LIMIT))
+        
+        floor = self.holder_ranking_floor
+        for position in range(cursor, end):
+            address = self.holders[position]
+            floor = self._rank_update(self.holder_ranking, self.holder_ranking_positions, floor,
+                                      TOP_HOLDER_CAPACITY, address, self._load_account(address).balance)
+        visited = end - cursor
+        
+        remaining = len(self.holders) - end
+        if remaining == 0:
+            if len(self.holder_ranking) < min(TOP_HOLDER_CAPACITY, len(self.holders)):
+                # Ranked holders dropped out while the rescan ran; go round again
+                floor = u256(0)
+                end = 0
+                remaining = len(self.holders)
+            else:
+                self.holder_rescan_active = False
+        self.holder_ranking_floor = floor
+        self.holder_rescan_cursor = u256(end)
+        
+        self._emit(EVENT_HOLDER_RANKING_RESCANNED, "", u256(0), u256(visited))
+        
+        return u256(remaining)
+    
     # ============== ADMIN FUNCTIONS ==============
     
     @gl.public.write
@@ -271,7 +739,7 @@ class PRYMUSAMM(gl.Contract):
         assert self.administrators.get(gl.msg.sender, False), "Not administrator"
         
         self.only_ambassadors = False
-        print(f"Initial stage disabled by {gl.msg.sender}")
+        self._emit(EVENT_INITIAL_STAGE_DISABLED, "", u256(0), u256(0))
     
     @gl.public.write
     def set_administrator(self, identifier: str, status: bool):
@@ -280,7 +748,26 @@ class PRYMUSAMM(gl.Contract):
         assert self.administrators.get(gl.msg.sender, False), "Not administrator"
         
         self.administrators[identifier] = status
-        print(f"Administrator {identifier} set to {status} by {gl.msg.sender}")
+        self._emit(EVENT_ADMINISTRATOR_SET, identifier, u256(0), u256(1 if status else 0))
+    
+    @gl.public.write
+    def set_keeper(self, identifier: str, status: bool):
+        """Add or remove a keeper (may call compound_many)"""
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        
+        self.keepers[identifier] = status
+        self._emit(EVENT_KEEPER_SET, identifier, u256(0), u256(1 if status else 0))
+    
+    @gl.public.write
+    def set_checkpoint_interval(self, trades: u256):
+        """Take a price checkpoint every trades trades"""
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        assert trades > 0, "Interval must be positive"
+        
+        self.checkpoint_interval = trades
+        self._emit(EVENT_CHECKPOINT_INTERVAL_SET, "", u256(0), trades)
     
     @gl.public.write
     def set_staking_requirement(self, amount_of_tokens: u256):
@@ -289,7 +776,7 @@ class PRYMUSAMM(gl.Contract):
         assert self.administrators.get(gl.msg.sender, False), "Not administrator"
         
         self.staking_requirement = amount_of_tokens
-        print(f"Staking requirement set to {amount_of_tokens} by {gl.msg.sender}")
+        self._emit(EVENT_STAKING_REQUIREMENT_SET, "", u256(0), amount_of_tokens)
     
     @gl.public.write
     def set_name(self, new_name: str):
@@ -298,7 +785,7 @@ class PRYMUSAMM(gl.Contract):
         assert self.administrators.get(gl.msg.sender, False), "Not administrator"
         
         self.name = new_name
-        print(f"Name set to {new_name} by {gl.msg.sender}")
+        self._emit(EVENT_NAME_SET, new_name, u256(0), u256(0))
     
     @gl.public.write
     def set_symbol(self, new_symbol: str):
@@ -307,7 +794,145 @@ class PRYMUSAMM(gl.Contract):
         assert self.administrators.get(gl.msg.sender, False), "Not administrator"
         
         self.symbol = new_symbol
-        print(f"Symbol set to {new_symbol} by {gl.msg.sender}")
+        self._emit(EVENT_SYMBOL_SET, new_symbol, u256(0), u256(0))
+    
+    @gl.public.write
+    def set_debug_logging(self, enabled: bool):
+        """Echo every logged event with print (off by default)"""
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        
+        self.debug_logging = enabled
+        self._emit(EVENT_DEBUG_LOGGING_SET, "", u256(0), u256(1 if enabled else 0))
+    
+    @gl.public.write
+    def migrate_legacy_accounts(self, addresses: list[str]) -> u256:
+        """
+        Fold the legacy token_balance_ledger / payouts_to / referral_balance
+        entries of the given addresses into account records
+        Call in chunks until every legacy holder is migrated; safe to repeat
+        Returns: number of addresses migrated by this call
+        """
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        
+        migrated = 0
+        for address in addresses:
+            has_balance = address in self.token_balance_ledger
+            has_payout = address in self.payouts_to
+            has_referral = address in self.referral_balance
+            if not (has_balance or has_payout or has_referral):
+                continue
+            
+            # Dividends are linear in balance and payout, so adding the legacy
+            # values onto any record created since keeps both claims intact
+            account = self._load_account(address)
+            if has_balance:
+                account.balance += self.token_balance_ledger[address]
+                del self.token_balance_ledger[address]
+            if has_payout:
+                account.payout += self.payouts_to[address]
+                del self.payouts_to[address]
+            if has_referral:
+                account.referral_bonus += self.referral_balance[address]
+                del self.referral_balance[address]
+            self.accounts[address] = account
+            self._update_holder(address, account.balance)
+            
+            migrated += 1
+        
+        # __init__ never ran on an upgraded contract, so set what it would have
+        if self.checkpoint_interval == 0:
+            self.checkpoint_interval = u256(DEFAULT_CHECKPOINT_INTERVAL)
+        self._refresh_price_cache()
+        
+        self._emit(EVENT_LEGACY_ACCOUNTS_MIGRATED, "", u256(0), u256(migrated))
+        
+        return u256(migrated)
+    
+    @gl.public.write
+    def begin_import(self, token_supply: u256, profit_per_share: u256):
+        """
+        Start importing a snapshot with these totals into a fresh contract
+        Trading, withdrawals and transfers are blocked until finalize_import
+        """
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        assert not self.import_active, "Import already in progress"
+        assert self.token_supply == 0 and self.profit_per_share == 0, "Contract already has holders"
+        assert token_supply > 0, "Empty snapshot"
+        
+        # Imported accounts are valued at the snapshot's profit_per_share
+        # from the start, so their dividends can be checked as they arrive
+        self.profit_per_share = profit_per_share
+        self.import_active = True
+        self.import_target_supply = token_supply
+        self.import_supply = u256(0)
+        self.import_accounts_count = u256(0)
+        self.import_liabilities = u256(0)
+        
+        self._emit(EVENT_IMPORT_STARTED, "", u256(0), token_supply)
+    
+    @gl.public.write
+    def import_accounts(self, addresses: list[str], balances: list[u256],
+                        payouts: list[i256], referral_bonuses: list[u256]) -> u256:
+        """
+        Import one chunk of snapshot accounts (at most IMPORT_BATCH_LIMIT)
+        Resending an already imported chunk is a no-op, so a failed import
+        resumes from any chunk boundary
+        Returns: number of accounts imported by this call
+        """
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        assert self.import_active, "No import in progress"
+        count = len(addresses)
+        assert count == len(balances) == len(payouts) == len(referral_bonuses), "Mismatched account fields"
+        assert count <= IMPORT_BATCH_LIMIT, "Too many accounts"
+        
+        profit_per_share = self.profit_per_share
+        supply = self.import_supply
+        liabilities = self.import_liabilities
+        imported = 0
+        for address, balance, payout, referral_bonus in zip(addresses, balances, payouts, referral_bonuses):
+            account = Account(balance, payout, referral_bonus, u256(0))
+            
+            existing = self.accounts.get(address, None)
+            if existing is not None:
+                assert existing == account, "Account already imported with other values"
+                continue
+            
+            # A snapshot account never owes the contract dividends
+            assert i256(profit_per_share * balance) >= payout, "Negative dividends"
+            
+            supply += balance
+            liabilities += self._account_dividends(account, profit_per_share) + referral_bonus
+            self.accounts[address] = account
+            self._update_holder(address, balance)
+            imported += 1
+        
+        # Checked per chunk, so an inconsistent snapshot fails at the chunk that breaks it
+        assert supply <= self.import_target_supply, "Balances exceed snapshot supply"
+        self.import_supply = supply
+        self.import_liabilities = liabilities
+        self.import_accounts_count += imported
+        
+        self._emit(EVENT_ACCOUNTS_IMPORTED, "", liabilities, u256(imported))
+        
+        return u256(imported)
+    
+    @gl.public.write
+    def finalize_import(self):
+        """Set token_supply once every balance has been imported and reopen trading"""
+        # Verify caller is administrator
+        assert self.administrators.get(gl.msg.sender, False), "Not administrator"
+        assert self.import_active, "No import in progress"
+        assert self.import_supply == self.import_target_supply, "Snapshot balances missing"
+        
+        self.token_supply = self.import_target_supply
+        self.import_active = False
+        self._refresh_price_cache()
+        
+        self._emit(EVENT_IMPORT_FINALIZED, "", self.import_liabilities, self.token_supply)
     
     # ============== PUBLIC VIEW FUNCTIONS ==============
     
@@ -319,64 +944,323 @@ class PRYMUSAMM(gl.Contract):
     @gl.public.view
     def my_tokens(self) -> u256:
         """Get caller's token balance"""
-        return self.token_balance_ledger.get(gl.msg.sender, u256(0))
+        return self._load_account(gl.msg.sender).balance
     
     @gl.public.view
     def my_dividends(self, include_referral_bonus: bool) -> u256:
         """Get caller's dividends"""
-        dividends = self._dividends_of(gl.msg.sender)
+        account = self._load_account(gl.msg.sender)
+        dividends = self._account_dividends(account, self.profit_per_share)
         
         if include_referral_bonus:
-            referral_bonus = self.referral_balance.get(gl.msg.sender, u256(0))
-            dividends += referral_bonus
+            dividends += account.referral_bonus
         
         return dividends
     
     @gl.public.view
     def balance_of(self, customer_address: str) -> u256:
         """Get token balance of any address"""
-        return self.token_balance_ledger.get(customer_address, u256(0))
+        return self._load_account(customer_address).balance
+    
+    @gl.public.view
+    def account_summary(self, customer_address: str) -> dict:
+        """
+        Balance, dividends, referral bonus, change and after-fee liquidation value
+        of any address in one call
+        """
+        return self._account_summary(customer_address, self.profit_per_share, self.token_supply)
+    
+    @gl.public.view
+    def account_summaries(self, addresses: list[str]) -> list[dict]:
+        """account_summary for each address, reading shared state once, at most ACCOUNT_SUMMARY_LIMIT"""
+        assert len(addresses) <= ACCOUNT_SUMMARY_LIMIT, "Too many addresses"
+        
+        profit_per_share = self.profit_per_share
+        supply = self.token_supply
+        
+        return [self._account_summary(address, profit_per_share, supply) for address in addresses]
     
     @gl.public.view
     def sell_price(self) -> u256:
         """Current sell price per token (after fee)"""
-        if self.token_supply == 0:
-            return self.token_price_initial - self.token_price_incremental
-        else:
-            ethereum = self._tokens_to_ethereum(u256(10**18))
-            dividends = ethereum // self.dividend_fee
-            taxed_ethereum = ethereum - dividends
-            return taxed_ethereum
+        return self.cached_sell_price
     
     @gl.public.view
     def buy_price(self) -> u256:
         """Current buy price per token (including fee)"""
-        if self.token_supply == 0:
-            return self.token_price_initial + self.token_price_incremental
-        else:
-            ethereum = self._tokens_to_ethereum(u256(10**18))
-            dividends = ethereum // self.dividend_fee
-            taxed_ethereum = ethereum + dividends
-            return taxed_ethereum
+        return self.cached_buy_price
+    
+    @gl.public.view
+    def verify_price_cache(self) -> bool:
+        """Check the cached prices against a fresh curve evaluation"""
+        buy_price, sell_price = self._current_prices(self.token_supply)
+        return self.cached_buy_price == buy_price and self.cached_sell_price == sell_price
     
     @gl.public.view
     def calculate_tokens_received(self, ethereum_to_spend: u256) -> u256:
         """Calculate tokens received for a given ETH amount"""
-        dividends = ethereum_to_spend // self.dividend_fee
+        dividends = ethereum_to_spend // DIVIDEND_FEE
         taxed_ethereum = ethereum_to_spend - dividends
-        return self._ethereum_to_tokens(taxed_ethereum)
+        return self._ethereum_to_tokens(taxed_ethereum, self.token_supply)
     
     @gl.public.view
     def calculate_ethereum_received(self, tokens_to_sell: u256) -> u256:
         """Calculate ETH received for selling given tokens"""
         assert tokens_to_sell <= self.token_supply, "Not enough tokens in supply"
         
-        ethereum = self._tokens_to_ethereum(tokens_to_sell)
-        dividends = ethereum // self.dividend_fee
+        ethereum = self._tokens_to_ethereum(tokens_to_sell, self.token_supply)
+        dividends = ethereum // DIVIDEND_FEE
         taxed_ethereum = ethereum - dividends
         
         return taxed_ethereum
     
+    @gl.public.view
+    def calculate_ethereum_for_tokens(self, tokens_to_buy: u256) -> u256:
+        """Calculate the ETH (including fee) needed to receive tokens_to_buy"""
+        return self._ethereum_for_tokens(tokens_to_buy, self.token_supply)
+    
+    @gl.public.view
+    def quote_buy_many(self, ethereum_amounts: list[u256]) -> list[u256]:
+        """Calculate tokens received for each ETH amount in one call, at most QUOTE_BATCH_LIMIT"""
+        assert len(ethereum_amounts) <= QUOTE_BATCH_LIMIT, "Too many amounts"
+        
+        supply = self.token_supply
+        
+        quotes = []
+        for ethereum_to_spend in ethereum_amounts:
+            taxed_ethereum = ethereum_to_spend - ethereum_to_spend // DIVIDEND_FEE
+            quotes.append(self._ethereum_to_tokens(taxed_ethereum, supply))
+        
+        return quotes
+    
+    @gl.public.view
+    def quote_sell_many(self, token_amounts: list[u256]) -> list[u256]:
+        """Calculate ETH received for selling each token amount in one call, at most QUOTE_BATCH_LIMIT"""
+        assert len(token_amounts) <= QUOTE_BATCH_LIMIT, "Too many amounts"
+        
+        supply = self.token_supply
+        
+        quotes = []
+        for tokens_to_sell in token_amounts:
+            assert tokens_to_sell <= supply, "Not enough tokens in supply"
+            
+            ethereum = self._tokens_to_ethereum(tokens_to_sell, supply)
+            quotes.append(ethereum - ethereum // DIVIDEND_FEE)
+        
+        return quotes
+    
+    @gl.public.view
+    def quote_buy_ladder(self, ethereum_step: u256, steps: u256) -> list[u256]:
+        """
+        Tokens received for spending ethereum_step * 1..steps (cumulative depth)
+        At most QUOTE_BATCH_LIMIT steps
+        """
+        assert ethereum_step > 0 and steps > 0, "Invalid ladder"
+        assert steps <= QUOTE_BATCH_LIMIT, "Too many steps"
+        
+        return self.quote_buy_many([ethereum_step * i for i in range(1, steps + 1)])
+    
+    @gl.public.view
+    def quote_sell_ladder(self, token_step: u256, steps: u256) -> list[u256]:
+        """
+        ETH received for selling token_step * 1..steps (cumulative depth)
+        At most QUOTE_BATCH_LIMIT steps
+        """
+        assert token_step > 0 and steps > 0, "Invalid ladder"
+        assert steps <= QUOTE_BATCH_LIMIT, "Too many steps"
+        assert token_step * steps <= self.token_supply, "Not enough tokens in supply"
+        
+        return self.quote_sell_many([token_step * i for i in range(1, steps + 1)])
+    
+    @gl.public.view
+    def holder_count(self) -> u256:
+        """Number of addresses holding a positive balance"""
+        return u256(len(self.holders))
+    
+    @gl.public.view
+    def holders_page(self, cursor: u256, limit: u256) -> dict:
+        """
+        Holders in registry order (not by balance; removals move the last
+        holder into the gap), starting at position cursor (0-based), at
+        most limit (capped at HOLDER_PAGE_LIMIT)
+        Returns: {"holders": [{"address", "balance"}], "next_cursor"}; next_cursor is
+        holder_count() once the end is reached
+        """
+        end = min(len(self.holders), cursor + min(limit, HOLDER_PAGE_LIMIT))
+        
+        page = []
+        for position in range(cursor, end):
+            address = self.holders[position]
+            page.append({"address": address, "balance": self._load_account(address).balance})
+        
+        return {"holders": page, "next_cursor": u256(max(cursor, end))}
+    
+    @gl.public.view
+    def top_holders(self, n: u256) -> list[dict]:
+        """
+        The n largest holders (capped at TOP_HOLDER_CAPACITY), largest first
+        Exact only while holder_ranking_status()["complete"]; otherwise it
+        may return fewer than n while holders exist, or miss holders a
+        pending rescan has not visited yet. rescan_holder_ranking refills
+        the ranking
+        """
+        end = min(len(self.holder_ranking), n, TOP_HOLDER_CAPACITY)
+        
+        top = []
+        for position in range(end):
+            entry = self.holder_ranking[position]
+            top.append({"address": entry.address, "balance": entry.value})
+        
+        return top
+    
+    @gl.public.view
+    def holder_ranking_status(self) -> dict:
+        """
+        Whether top_holders is currently exact
+        Returns: {"complete", "ranked", "holders", "rescan_active",
+        "rescan_remaining"}; complete means the ranking holds the largest
+        min(TOP_HOLDER_CAPACITY, holder_count()) holders and no rescan is
+        pending, so top_holders(n) is exact for every n
+        """
+        holders = len(self.holders)
+        ranked = len(self.holder_ranking)
+        rescan_active = self.holder_rescan_active
+        
+        rescan_remaining = 0
+        if rescan_active:
+            rescan_remaining = holders - min(self.holder_rescan_cursor, holders)
+        
+        return {
+            "complete": not rescan_active and ranked == min(TOP_HOLDER_CAPACITY, holders),
+            "ranked": u256(ranked),
+            "holders": u256(holders),
+            "rescan_active": rescan_active,
+            "rescan_remaining": u256(rescan_remaining),
+        }
+    
+    @gl.public.view
+    def referral_stats(self, referrer_address: str) -> dict:
+        """
+        Totals of the buys an address referred while it met the staking
+        requirement (the ones that credited it a bonus)
+        """
+        stats = self.referral_stats_of.get(referrer_address, None)
+        if stats is None:
+            stats = ReferralStats(u256(0), u256(0), u256(0), u256(0))
+        
+        return {
+            "address": referrer_address,
+            "referred_buys": stats.referred_buys,
+            "referred_volume": stats.referred_volume,
+            "bonus_earned": stats.bonus_earned,
+            "referees": stats.referees,
+        }
+    
+    @gl.public.view
+    def referrer_count(self) -> u256:
+        """Number of addresses that have earned a referral bonus"""
+        return self.referrer_total
+    
+    @gl.public.view
+    def referrers_page(self, cursor: u256, limit: u256) -> dict:
+        """
+        Ranked referrers (the TOP_REFERRER_CAPACITY with the most bonus
+        earned, largest first), starting at position cursor (0-based), at
+        most limit
+        Returns: {"referrers": [referral_stats(...)], "next_cursor"}; next_cursor is
+        the ranking's length once the end is reached
+        """
+        end = min(len(self.referrer_ranking), cursor + limit)
+        
+        page = []
+        for position in range(cursor, end):
+            page.append(self.referral_stats(self.referrer_ranking[position].address))
+        
+        return {"referrers": page, "next_cursor": u256(max(cursor, end))}
+    
+    @gl.public.view
+    def top_referrers(self, n: u256) -> list[dict]:
+        """The n referrers with the most bonus earned (capped at TOP_REFERRER_CAPACITY)"""
+        return self.referrers_page(u256(0), n)["referrers"]
+    
+    @gl.public.view
+    def events_emitted(self) -> u256:
+        """Sequence number the next event will get (total events ever logged)"""
+        return self.next_event_seq
+    
+    @gl.public.view
+    def events_since(self, seq: u256, limit: u256) -> list[dict]:
+        """
+        Events with sequence number >= seq, oldest first, at most limit
+        (capped at EVENT_PAGE_LIMIT); starts at the oldest retained event
+        if seq has already been overwritten
+        """
+        next_seq = self.next_event_seq
+        oldest_seq = next_seq - len(self.events)
+        start = max(seq, oldest_seq)
+        end = min(next_seq, start + min(limit, EVENT_PAGE_LIMIT))
+        
+        page = []
+        for event_seq in range(start, end):
+            event = self.events[event_seq % EVENT_LOG_CAPACITY]
+            page.append({
+                "kind": EVENT_NAMES[event.kind],
+                "seq": event.seq,
+                "sender": event.sender,
+                "target": event.target,
+                "ethereum": event.ethereum,
+                "tokens": event.tokens,
+            })
+        
+        return page
+    
+    @gl.public.view
+    def import_status(self) -> dict:
+        """Progress of the current or last account import"""
+        return {
+            "active": self.import_active,
+            "target_supply": self.import_target_supply,
+            "imported_supply": self.import_supply,
+            "accounts": self.import_accounts_count,
+            "liabilities": self.import_liabilities,
+            "profit_per_share": self.profit_per_share,
+        }
+    
+    @gl.public.view
+    def price_history(self, from_index: u256, limit: u256, resolution: u256) -> dict:
+        """
+        Price checkpoints at a resolution (0 = every checkpoint, each step
+        up keeps every CHECKPOINT_FANOUT-th), oldest first, starting at
+        index from_index of that resolution, at most limit (capped at
+        CHECKPOINT_PAGE_LIMIT); starts at the oldest retained checkpoint if
+        from_index has already been overwritten
+        Returns: {"points": [...], "next_index"}; next_index is the index
+        the next checkpoint at this resolution will get once the end is reached
+        """
+        assert resolution < CHECKPOINT_RESOLUTIONS, "Unknown resolution"
+        
+        stride = CHECKPOINT_FANOUT ** resolution
+        recorded = self.checkpoints_recorded
+        count = (recorded + stride - 1) // stride
+        start = max(from_index, count - min(count, CHECKPOINT_CAPACITY))
+        end = min(count, start + min(limit, CHECKPOINT_PAGE_LIMIT))
+        
+        points = []
+        base = resolution * CHECKPOINT_CAPACITY
+        for index in range(start, end):
+            checkpoint = self.checkpoints[u256(base + index % CHECKPOINT_CAPACITY)]
+            points.append({
+                "index": u256(index),
+                "trade": checkpoint.trade,
+                "token_supply": checkpoint.token_supply,
+                "buy_price": checkpoint.buy_price,
+                "sell_price": checkpoint.sell_price,
+                "profit_per_share": checkpoint.profit_per_share,
+                "volume": checkpoint.volume,
+            })
+        
+        return {"points": points, "next_index": u256(max(start, end))}
+    
     # ============== INTERNAL FUNCTIONS ==============
     
     def _anti_early_whale(self, amount_of_ethereum: u256, customer_address: str):
@@ -391,145 +1275,379 @@ class PRYMUSAMM(gl.Contract):
         if not is_ambassador:
             # End ambassador phase if non-ambassador tries to buy
             self.only_ambassadors = False
-            print(f"Ambassador phase ended by {customer_address}")
+            self._emit(EVENT_AMBASSADOR_PHASE_ENDED, customer_address, u256(0), u256(0))
     
-    def _purchase_tokens(self, incoming_ethereum: u256, referred_by: str) -> u256:
-        """Core bonding curve purchase logic"""
+    def _purchase_tokens(self, incoming_ethereum: u256, referred_by: str,
+                         customer_address: str, account: Account) -> u256:
+        """
+        Core bonding curve purchase logic
+        Updates the buyer's loaded account in place; the caller stores it
+        """
         # Calculate fees
-        undivided_dividends = incoming_ethereum // self.dividend_fee
+        undivided_dividends = incoming_ethereum // DIVIDEND_FEE
         referral_bonus = undivided_dividends // 3  # 1/3 of fees go to referrer
         dividends = undivided_dividends - referral_bonus
         taxed_ethereum = incoming_ethereum - undivided_dividends
         
         # Calculate tokens to mint
-        amount_of_tokens = self._ethereum_to_tokens(taxed_ethereum)
+        amount_of_tokens = self._ethereum_to_tokens(taxed_ethereum, self.token_supply)
         
         # Ensure valid token amount
         assert amount_of_tokens > 0, "Token amount must be positive"
         
         # Handle referrals
-        if (referred_by and referred_by != gl.msg.sender and 
-            referred_by in self.token_balance_ledger and
-            self.token_balance_ledger[referred_by] >= self.staking_requirement):
-            
-            # Add referral bonus to referrer
-            current_bonus = self.referral_balance.get(referred_by, u256(0))
-            self.referral_balance[referred_by] = current_bonus + referral_bonus
+        referrer = None
+        if referred_by and referred_by != customer_address:
+            referrer = self.accounts.get(referred_by, None)
+        
+        if referrer is not None and referrer.balance >= self.staking_requirement:
+            # Add referral bonus to referrer (a single field update in storage)
+            referrer.referral_bonus += referral_bonus
+            self._record_referral(referred_by, customer_address, incoming_ethereum, referral_bonus)
         else:
             # If no valid referrer, add bonus to dividends
             dividends += referral_bonus
         
         # Update token supply
         self.token_supply += amount_of_tokens
+        self._refresh_price_cache()
         
         # Update profit per share if there are tokens
         if self.token_supply > 0:
-            self.profit_per_share += (dividends * self.magnitude) // self.token_supply
+            self.profit_per_share += (dividends * MAGNITUDE) // self.token_supply
         
         # Update buyer's token balance
-        current_balance = self.token_balance_ledger.get(gl.msg.sender, u256(0))
-        self.token_balance_ledger[gl.msg.sender] = current_balance + amount_of_tokens
+        account.balance += amount_of_tokens
+        self._update_holder(customer_address, account.balance)
         
         # Update payout tracker for buyer
-        fee = dividends * self.magnitude
-        updated_payouts = i256(self.profit_per_share * amount_of_tokens - fee)
-        
-        current_payout = self.payouts_to.get(gl.msg.sender, i256(0))
-        self.payouts_to[gl.msg.sender] = current_payout + updated_payouts
+        fee = dividends * MAGNITUDE
+        account.payout += i256(self.profit_per_share * amount_of_tokens - fee)
         
         return amount_of_tokens
     
-    def _ethereum_to_tokens(self, ethereum: u256) -> u256:
-        """Bonding curve: ETH → Tokens"""
-        token_price_initial_scaled = self.token_price_initial * u256(10**18)
-        incremental_scaled = self.token_price_incremental * u256(10**18)
+    def _current_prices(self, supply: u256) -> tuple[u256, u256]:
+        """One-token (buy price including fee, sell price after fee) at supply"""
+        if supply == 0:
+            return (u256(TOKEN_PRICE_INITIAL + TOKEN_PRICE_INCREMENTAL),
+                    u256(TOKEN_PRICE_INITIAL - TOKEN_PRICE_INCREMENTAL))
+        
+        ethereum = self._tokens_to_ethereum(u256(ONE_TOKEN), supply)
+        dividends = ethereum // DIVIDEND_FEE
+        return (ethereum + dividends, ethereum - dividends)
+    
+    def _refresh_price_cache(self):
+        """Recompute the cached prices after token_supply has moved"""
+        self.cached_buy_price, self.cached_sell_price = self._current_prices(self.token_supply)
+    
+    def _emit(self, kind: int, target: str, ethereum: u256, tokens: u256):
+        """Append an event (kind is an EVENT_* code) for the current sender to the ring buffer"""
+        seq = self.next_event_seq
+        event = Event(u8(kind), seq, gl.msg.sender, target, ethereum, tokens)
         
-        # Calculate the square root term for the bonding curve formula
-        # (tokenPriceInitial^2) + (2 * tokenPriceIncremental * ethereum * 10^18) + 
-        # (tokenPriceIncremental^2 * tokenSupply^2) + (2 * tokenPriceIncremental * tokenPriceInitial * tokenSupply)
-        term1 = token_price_initial_scaled * token_price_initial_scaled
+        if len(self.events) < EVENT_LOG_CAPACITY:
+            self.events.append(event)
+        else:
+            self.events[seq % EVENT_LOG_CAPACITY] = event
+        self.next_event_seq = seq + 1
         
-        ethereum_scaled = ethereum * u256(10**18)
-        term2 = u256(2) * incremental_scaled * ethereum_scaled
+        if self.debug_logging:
+            print(f"{EVENT_NAMES[kind]} #{seq}: {gl.msg.sender} -> {target}, ETH: {ethereum}, Tokens: {tokens}")
+    
+    def _record_trade(self, ethereum: u256):
+        """Count a supply-moving transaction and checkpoint every checkpoint_interval"""
+        trade = self.trade_count + 1
+        self.trade_count = trade
+        volume = self.cumulative_volume + ethereum
+        self.cumulative_volume = volume
+        
+        # Zero on a contract upgraded in place until migrate_legacy_accounts runs
+        interval = self.checkpoint_interval
+        if interval == 0:
+            interval = u256(DEFAULT_CHECKPOINT_INTERVAL)
+        if trade % interval != 0:
+            return
         
-        token_supply_sq = self.token_supply * self.token_supply
-        incremental_sq = self.token_price_incremental * self.token_price_incremental
-        term3 = incremental_sq * token_supply_sq
+        number = self.checkpoints_recorded
+        self.checkpoints_recorded = number + 1
         
-        term4 = u256(2) * self.token_price_incremental * self.token_price_initial * self.token_supply
+        # Number n belongs to every resolution r with n % CHECKPOINT_FANOUT**r == 0
+        stride = 1
+        for resolution in range(CHECKPOINT_RESOLUTIONS):
+            if number % stride != 0:
+                break
+            index = number // stride
+            self.checkpoints[u256(resolution * CHECKPOINT_CAPACITY + index % CHECKPOINT_CAPACITY)] = Checkpoint(
+                trade, self.token_supply, self.cached_buy_price, self.cached_sell_price,
+                self.profit_per_share, volume)
+            stride *= CHECKPOINT_FANOUT
+    
+    def _record_referral(self, referrer_address: str, customer_address: str,
+                         ethereum: u256, referral_bonus: u256):
+        """Add a credited referral to the referrer's totals and ranking"""
+        stats = self.referral_stats_of.get(referrer_address, None)
+        if stats is None:
+            stats = ReferralStats(u256(0), u256(0), u256(0), u256(0))
+            self.referrer_total += 1
+        
+        referees = stats.referees
+        pair = f"{referrer_address}/{customer_address}"
+        if not self.referral_pairs.get(pair, False):
+            self.referral_pairs[pair] = True
+            referees += 1
+        
+        bonus_earned = stats.bonus_earned + referral_bonus
+        self.referral_stats_of[referrer_address] = ReferralStats(
+            stats.referred_buys + 1, stats.referred_volume + ethereum, bonus_earned, referees)
+        
+        floor = self.referrer_ranking_floor
+        new_floor = self._rank_update(self.referrer_ranking, self.referrer_ranking_positions, floor,
+                                      TOP_REFERRER_CAPACITY, referrer_address, bonus_earned)
+        if new_floor != floor:
+            self.referrer_ranking_floor = new_floor
+    
+    def _update_holder(self, customer_address: str, balance: u256):
+        """Keep the holder registry and ranking in step with a changed balance"""
+        position = self.holder_positions.get(customer_address, u256(0))
+        moved = None
+        
+        if position == 0 and balance > 0:
+            self.holders.append(customer_address)
+            self.holder_positions[customer_address] = u256(len(self.holders))
+        elif position > 0 and balance == 0:
+            # Swap-and-pop: the last holder takes the leaver's place
+            last = self.holders[len(self.holders) - 1]
+            if last != customer_address:
+                self.holders[position - 1] = last
+                self.holder_positions[last] = position
+                # A rescan would skip a holder moved behind its cursor, so offer it now
+                if self.holder_rescan_active and position <= self.holder_rescan_cursor:
+                    moved = last
+            self.holders.pop()
+            del self.holder_positions[customer_address]
+        
+        floor = self.holder_ranking_floor
+        new_floor = self._rank_update(self.holder_ranking, self.holder_ranking_positions, floor,
+                                      TOP_HOLDER_CAPACITY, customer_address, balance)
+        if moved is not None:
+            new_floor = self._rank_update(self.holder_ranking, self.holder_ranking_positions, new_floor,
+                                          TOP_HOLDER_CAPACITY, moved, self._load_account(moved).balance)
+        if new_floor != floor:
+            self.holder_ranking_floor = new_floor
+    
+    def _rank_update(self, ranking: DynArray[RankEntry], positions: TreeMap[str, u256], floor: u256,
+                     capacity: int, address: str, value: u256) -> u256:
+        """
+        Keep the largest values (at most capacity) ranked, largest first
+        Every unranked value is at most floor and every ranked one at least
+        floor, so the ranking is always the exact top of all values. A
+        value that drops below the floor leaves the ranking, one above it
+        joins, and the smallest entry is evicted when the ranking
+        overflows, raising the floor to its value. Values at or below the
+        floor of unranked addresses cost no writes; the rest touch at most
+        capacity entries
+        Returns: the new floor
+        """
+        position = positions.get(address, u256(0))
+        
+        if position == 0:
+            if value <= floor:
+                return floor
+            ranking.append(RankEntry(address, value))
+            index = len(ranking) - 1
+        elif value == 0 or value < floor:
+            # Close the gap by shifting everyone ranked below up one place
+            for index in range(position, len(ranking)):
+                entry = ranking[index]
+                ranking[index - 1] = RankEntry(entry.address, entry.value)
+                positions[entry.address] = u256(index)
+            ranking.pop()
+            del positions[address]
+            return floor
+        else:
+            index = position - 1
+        
+        # Bubble towards the top past smaller values...
+        while index > 0 and ranking[index - 1].value < value:
+            entry = ranking[index - 1]
+            ranking[index] = RankEntry(entry.address, entry.value)
+            positions[entry.address] = u256(index + 1)
+            index -= 1
+        
+        # ...or towards the bottom past larger ones
+        while index + 1 < len(ranking) and ranking[index + 1].value > value:
+            entry = ranking[index + 1]
+            ranking[index] = RankEntry(entry.address, entry.value)
+            positions[entry.address] = u256(index + 1)
+            index += 1
+        
+        ranking[index] = RankEntry(address, value)
+        positions[address] = u256(index + 1)
+        
+        if len(ranking) > capacity:
+            evicted = ranking[len(ranking) - 1]
+            ranking.pop()
+            del positions[evicted.address]
+            floor = max(floor, evicted.value)
+        
+        return floor
+    
+    def _transfer_tokens(self, account: Account, recipients: list[str], amounts: list[u256]) -> list[u256]:
+        """
+        Move already-validated amounts from the caller's loaded account,
+        burning the 5% fee of each; stores every touched record once
+        Returns: taxed tokens received by each recipient
+        """
+        profit_per_share = self.profit_per_share
+        touched = {gl.msg.sender: account}
+        
+        total_tokens = u256(0)
+        total_fee = u256(0)
+        taxed_amounts = []
+        for to_address, amount_of_tokens in zip(recipients, amounts):
+            # Calculate the 5% transfer fee
+            token_fee = amount_of_tokens // DIVIDEND_FEE
+            taxed_tokens = amount_of_tokens - token_fee
+            total_tokens += amount_of_tokens
+            total_fee += token_fee
+            taxed_amounts.append(taxed_tokens)
+            
+            # Credit the receiver and update its dividend tracker
+            receiver = touched.get(to_address)
+            if receiver is None:
+                receiver = self._load_account(to_address)
+                touched[to_address] = receiver
+            receiver.balance += taxed_tokens
+            receiver.payout += i256(profit_per_share * taxed_tokens)
+        
+        # Debit the sender and update its dividend tracker
+        account.balance -= total_tokens
+        account.payout -= i256(profit_per_share * total_tokens)
+        
+        for address, record in touched.items():
+            self.accounts[address] = record
+            self._update_holder(address, record.balance)
         
-        sqrt_input = term1 + term2 + term3 + term4
+        # Burn the fee tokens
+        dividends = self._tokens_to_ethereum(total_fee, self.token_supply)
+        self.token_supply -= total_fee
+        self._refresh_price_cache()
+        
+        # Disperse dividends among holders
+        if self.token_supply > 0:
+            self.profit_per_share = profit_per_share + (dividends * MAGNITUDE) // self.token_supply
+        
+        return taxed_amounts
+    
+    def _ethereum_to_tokens(self, ethereum: u256, supply: u256) -> u256:
+        """Bonding curve: ETH → Tokens"""
+        # The square root term of the bonding curve formula
+        # (tokenPriceInitial*10^18)^2 + (2 * tokenPriceIncremental * ethereum * 10^36) +
+        # (tokenPriceIncremental^2 * tokenSupply^2) + (2 * tokenPriceIncremental * tokenPriceInitial*10^18 * tokenSupply)
+        # collapses to (initial_scaled + incremental * supply)^2 + ETH_TERM_FACTOR * ethereum
+        price_term = TOKEN_PRICE_INITIAL_SCALED + TOKEN_PRICE_INCREMENTAL * supply
+        sqrt_input = price_term * price_term + ETH_TERM_FACTOR * ethereum
         
-        # Calculate square root (simplified version)
         sqrt_result = self._sqrt(sqrt_input)
         
         # Final calculation
-        if sqrt_result < token_price_initial_scaled:
+        if sqrt_result < TOKEN_PRICE_INITIAL_SCALED:
             return u256(0)
         
-        tokens_received = (sqrt_result - token_price_initial_scaled) // self.token_price_incremental
+        tokens_received = (sqrt_result - TOKEN_PRICE_INITIAL_SCALED) // TOKEN_PRICE_INCREMENTAL
         
-        if tokens_received < self.token_supply:
+        if tokens_received < supply:
             return u256(0)
         
-        return tokens_received - self.token_supply
+        return u256(tokens_received - supply)
+    
+    def _ethereum_for_tokens(self, tokens: u256, supply: u256) -> u256:
+        """Bonding curve inverse: smallest incoming ETH (before fee) minting >= tokens"""
+        if tokens == 0:
+            return u256(0)
+        
+        # _ethereum_to_tokens mints >= tokens exactly when
+        # sqrt(price_term^2 + ETH_TERM_FACTOR * ethereum) >= price_term + incremental * tokens,
+        # i.e. ethereum >= tokens * (2 * price_term + incremental * tokens) / (2 * 10^36)
+        price_term = TOKEN_PRICE_INITIAL_SCALED + TOKEN_PRICE_INCREMENTAL * supply
+        numerator = tokens * (2 * price_term + TOKEN_PRICE_INCREMENTAL * tokens)
+        taxed_ethereum = -(-numerator // ETH_TERM_DIVISOR)
+        
+        # Gross up for the dividend fee: smallest x with x - x // DIVIDEND_FEE >= taxed_ethereum
+        return u256(taxed_ethereum + (taxed_ethereum - 1) // (DIVIDEND_FEE - 1))
     
-    def _tokens_to_ethereum(self, tokens: u256) -> u256:
+    def _tokens_to_ethereum(self, tokens: u256, supply: u256) -> u256:
         """Bonding curve: Tokens → ETH"""
-        tokens_adjusted = tokens + u256(10**18)
-        supply_adjusted = self.token_supply + u256(10**18)
+        tokens_adjusted = tokens + ONE_TOKEN
         
-        # Calculate price at current supply
-        price_at_supply = self.token_price_initial + (self.token_price_incremental * supply_adjusted // u256(10**18))
+        # Price at current supply; initial + incremental * (supply + 10^18) / 10^18
+        # minus one increment reduces exactly to initial + incremental * supply / 10^18
+        current_price = TOKEN_PRICE_INITIAL + TOKEN_PRICE_INCREMENTAL * supply // ONE_TOKEN
         
         # Calculate ETH value
-        term1 = (price_at_supply - self.token_price_incremental) * (tokens_adjusted - u256(10**18))
+        term1 = current_price * tokens
+        term2 = TOKEN_PRICE_INCREMENTAL * (tokens_adjusted * (tokens_adjusted - 1)) // TWO_ONE_TOKEN
         
-        tokens_sq = tokens_adjusted * tokens_adjusted
-        term2_numerator = self.token_price_incremental * (tokens_sq - tokens_adjusted)
-        term2 = term2_numerator // (u256(2) * u256(10**18))
-        
-        ether_received = (term1 - term2) // u256(10**18)
+        return u256((term1 - term2) // ONE_TOKEN)
+    
+    def _load_account(self, customer_address: str) -> Account:
+        """Copy an address's account record out of storage (zeroed if absent)"""
+        stored = self.accounts.get(customer_address, None)
+        if stored is None:
+            return Account(u256(0), i256(0), u256(0), u256(0))
         
-        return ether_received
+        return Account(stored.balance, stored.payout, stored.referral_bonus, stored.change)
     
     def _dividends_of(self, customer_address: str) -> u256:
         """Calculate dividends for a specific address"""
-        balance = self.token_balance_ledger.get(customer_address, u256(0))
-        payout = self.payouts_to.get(customer_address, i256(0))
-        
-        if balance == 0:
+        return self._account_dividends(self._load_account(customer_address), self.profit_per_share)
+    
+    def _account_summary(self, customer_address: str, profit_per_share: u256, supply: u256) -> dict:
+        """Summarise one address against already-read contract state"""
+        account = self._load_account(customer_address)
+        
+        liquidation_value = u256(0)
+        if account.balance > 0:
+            ethereum = self._tokens_to_ethereum(account.balance, supply)
+            liquidation_value = ethereum - ethereum // DIVIDEND_FEE
+        
+        return {
+            "address": customer_address,
+            "balance": account.balance,
+            "dividends": self._account_dividends(account, profit_per_share),
+            "referral_bonus": account.referral_bonus,
+            "change": account.change,
+            "liquidation_value": liquidation_value,
+        }
+    
+    def _account_dividends(self, account: Account, profit_per_share: u256) -> u256:
+        """Calculate dividends for a loaded account record"""
+        if account.balance == 0:
             return u256(0)
         
         # Calculate dividends: (profit_per_share * balance - payout) / magnitude
-        profit_share = self.profit_per_share * balance
+        profit_share = profit_per_share * account.balance
         profit_share_i = i256(profit_share)
         
-        dividends_i = profit_share_i - payout
+        dividends_i = profit_share_i - account.payout
         
         if dividends_i < 0:
             return u256(0)
         
-        return u256(dividends_i // i256(self.magnitude))
-    
-    def _my_dividends(self, include_referral_bonus: bool) -> u256:
-        """Internal version of my_dividends"""
-        return self.my_dividends(include_referral_bonus)
+        return u256(dividends_i // i256(MAGNITUDE))
     
     def _sqrt(self, x: u256) -> u256:
-        """Integer square root (Babylonian method)"""
+        """Integer square root (Newton's method seeded from the bit length)"""
         if x == 0:
             return u256(0)
         
-        # Start with an estimate
-        z = (x + 1) // 2
-        y = x
+        # 2**ceil(bits/2) is always >= isqrt(x) and within a factor of two
+        # of it, so the iteration decreases monotonically and converges in
+        # about log2(bits) steps (at most 8 for any u256)
+        y = 1 << ((x.bit_length() + 1) // 2)
         
-        # Iterate to improve the estimate
-        for _ in range(10):  # Limited iterations for GenLayer
+        while True:
+            z = (y + x // y) // 2
             if z >= y:
-                break
+                return u256(y)
             y = z
-            z = (x // z + z) // 2
-        
-        return y
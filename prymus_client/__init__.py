@@ -0,0 +1,7 @@
+"""asyncio client SDK for PRYMUSAMM: pooled, batched and cached view calls"""
+
+from prymus_client.calldata import Address, CalldataError
+from prymus_client.client import PrymusClient
+from prymus_client.rpc import ConnectionPool, JsonRpcBatcher, RpcError, TransportError
+
+__all__ = ["PrymusClient", "ConnectionPool", "JsonRpcBatcher", "RpcError", "TransportError", "Address", "CalldataError"]
@@ -0,0 +1,128 @@
+"""
+Public methods of PRYMUSAMM: name -> (kind, parameters, summary)
+kind is "view", "write" or "payable"; parameters are (name, annotation,
+default) with default NO_DEFAULT when the argument is required
+
+Generated by tools/generate_client.py from PRYMUS_AMM.py; do not edit
+"""
+
+NO_DEFAULT = "<required>"
+
+METHODS = {'account_summaries': ('view',
+                       (('addresses', 'list[str]', NO_DEFAULT),),
+                       'account_summary for each address, reading shared state once, at most '
+                       'ACCOUNT_SUMMARY_LIMIT'),
+ 'account_summary': ('view',
+                     (('customer_address', 'str', NO_DEFAULT),),
+                     'Balance, dividends, referral bonus, change and after-fee liquidation value'),
+ 'balance_of': ('view', (('customer_address', 'str', NO_DEFAULT),), 'Get token balance of any address'),
+ 'begin_import': ('write',
+                  (('token_supply', 'u256', NO_DEFAULT), ('profit_per_share', 'u256', NO_DEFAULT)),
+                  'Start importing a snapshot with these totals into a fresh contract'),
+ 'buy': ('payable', (('referred_by', 'str', ''),), 'Purchase tokens with native currency'),
+ 'buy_exact_tokens': ('payable',
+                      (('amount_of_tokens', 'u256', NO_DEFAULT),
+                       ('max_ethereum', 'u256', NO_DEFAULT),
+                       ('referred_by', 'str', '')),
+                      'Purchase exactly amount_of_tokens (or one rounding step more)'),
+ 'buy_price': ('view', (), 'Current buy price per token (including fee)'),
+ 'calculate_ethereum_for_tokens': ('view',
+                                   (('tokens_to_buy', 'u256', NO_DEFAULT),),
+                                   'Calculate the ETH (including fee) needed to receive tokens_to_buy'),
+ 'calculate_ethereum_received': ('view',
+                                 (('tokens_to_sell', 'u256', NO_DEFAULT),),
+                                 'Calculate ETH received for selling given tokens'),
+ 'calculate_tokens_received': ('view',
+                               (('ethereum_to_spend', 'u256', NO_DEFAULT),),
+                               'Calculate tokens received for a given ETH amount'),
+ 'compound_many': ('write',
+                   (('addresses', 'list[str]', NO_DEFAULT),),
+                   'Reinvest the dividends of listed holders, leaving referral bonus and change '
+                   'withdrawable'),
+ 'disable_initial_stage': ('write', (), 'Disable ambassador-only phase'),
+ 'events_emitted': ('view', (), 'Sequence number the next event will get (total events ever logged)'),
+ 'events_since': ('view',
+                  (('seq', 'u256', NO_DEFAULT), ('limit', 'u256', NO_DEFAULT)),
+                  'Events with sequence number >= seq, oldest first, at most limit'),
+ 'exit': ('write', (), 'Sell all tokens and withdraw all earnings'),
+ 'finalize_import': ('write', (), 'Set token_supply once every balance has been imported and reopen trading'),
+ 'holder_count': ('view', (), 'Number of addresses holding a positive balance'),
+ 'holder_ranking_status': ('view', (), 'Whether top_holders is currently exact'),
+ 'holders_page': ('view',
+                  (('cursor', 'u256', NO_DEFAULT), ('limit', 'u256', NO_DEFAULT)),
+                  'Holders in registry order (not by balance; removals move the last'),
+ 'import_accounts': ('write',
+                     (('addresses', 'list[str]', NO_DEFAULT),
+                      ('balances', 'list[u256]', NO_DEFAULT),
+                      ('payouts', 'list[i256]', NO_DEFAULT),
+                      ('referral_bonuses', 'list[u256]', NO_DEFAULT)),
+                     'Import one chunk of snapshot accounts (at most IMPORT_BATCH_LIMIT)'),
+ 'import_status': ('view', (), 'Progress of the current or last account import'),
+ 'migrate_legacy_accounts': ('write',
+                             (('addresses', 'list[str]', NO_DEFAULT),),
+                             'Fold the legacy token_balance_ledger / payouts_to / referral_balance'),
+ 'my_dividends': ('view', (('include_referral_bonus', 'bool', NO_DEFAULT),), "Get caller's dividends"),
+ 'my_tokens': ('view', (), "Get caller's token balance"),
+ 'price_history': ('view',
+                   (('from_index', 'u256', NO_DEFAULT),
+                    ('limit', 'u256', NO_DEFAULT),
+                    ('resolution', 'u256', NO_DEFAULT)),
+                   'Price checkpoints at a resolution (0 = every checkpoint, each step'),
+ 'quote_buy_ladder': ('view',
+                      (('ethereum_step', 'u256', NO_DEFAULT), ('steps', 'u256', NO_DEFAULT)),
+                      'Tokens received for spending ethereum_step * 1..steps (cumulative depth)'),
+ 'quote_buy_many': ('view',
+                    (('ethereum_amounts', 'list[u256]', NO_DEFAULT),),
+                    'Calculate tokens received for each ETH amount in one call, at most QUOTE_BATCH_LIMIT'),
+ 'quote_sell_ladder': ('view',
+                       (('token_step', 'u256', NO_DEFAULT), ('steps', 'u256', NO_DEFAULT)),
+                       'ETH received for selling token_step * 1..steps (cumulative depth)'),
+ 'quote_sell_many': ('view',
+                     (('token_amounts', 'list[u256]', NO_DEFAULT),),
+                     'Calculate ETH received for selling each token amount in one call, at most '
+                     'QUOTE_BATCH_LIMIT'),
+ 'referral_stats': ('view',
+                    (('referrer_address', 'str', NO_DEFAULT),),
+                    'Totals of the buys an address referred while it met the staking'),
+ 'referrer_count': ('view', (), 'Number of addresses that have earned a referral bonus'),
+ 'referrers_page': ('view',
+                    (('cursor', 'u256', NO_DEFAULT), ('limit', 'u256', NO_DEFAULT)),
+                    'Ranked referrers (the TOP_REFERRER_CAPACITY with the most bonus'),
+ 'reinvest': ('write', (), "Converts all of caller's dividends to tokens"),
+ 'rescan_holder_ranking': ('write',
+                           (('limit', 'u256', NO_DEFAULT),),
+                           'Refill the holder ranking after holders have dropped out of it'),
+ 'sell': ('write', (('amount_of_tokens', 'u256', NO_DEFAULT),), 'Sell tokens back to the bonding curve'),
+ 'sell_price': ('view', (), 'Current sell price per token (after fee)'),
+ 'set_administrator': ('write',
+                       (('identifier', 'str', NO_DEFAULT), ('status', 'bool', NO_DEFAULT)),
+                       'Add or remove an administrator'),
+ 'set_checkpoint_interval': ('write',
+                             (('trades', 'u256', NO_DEFAULT),),
+                             'Take a price checkpoint every trades trades'),
+ 'set_debug_logging': ('write',
+                       (('enabled', 'bool', NO_DEFAULT),),
+                       'Echo every logged event with print (off by default)'),
+ 'set_keeper': ('write',
+                (('identifier', 'str', NO_DEFAULT), ('status', 'bool', NO_DEFAULT)),
+                'Add or remove a keeper (may call compound_many)'),
+ 'set_name': ('write', (('new_name', 'str', NO_DEFAULT),), 'Change token name'),
+ 'set_staking_requirement': ('write',
+                             (('amount_of_tokens', 'u256', NO_DEFAULT),),
+                             'Change the staking requirement for referrals'),
+ 'set_symbol': ('write', (('new_symbol', 'str', NO_DEFAULT),), 'Change token symbol'),
+ 'top_holders': ('view',
+                 (('n', 'u256', NO_DEFAULT),),
+                 'The n largest holders (capped at TOP_HOLDER_CAPACITY), largest first'),
+ 'top_referrers': ('view',
+                   (('n', 'u256', NO_DEFAULT),),
+                   'The n referrers with the most bonus earned (capped at TOP_REFERRER_CAPACITY)'),
+ 'total_supply': ('view', (), 'Get total token supply'),
+ 'transfer': ('write',
+              (('to_address', 'str', NO_DEFAULT), ('amount_of_tokens', 'u256', NO_DEFAULT)),
+              'Transfer tokens to another address (with 5% fee)'),
+ 'transfer_many': ('write',
+                   (('recipients', 'list[str]', NO_DEFAULT), ('amounts', 'list[u256]', NO_DEFAULT)),
+                   'Transfer tokens to several addresses in one call (with 5% fee each),'),
+ 'verify_price_cache': ('view', (), 'Check the cached prices against a fresh curve evaluation'),
+ 'withdraw': ('write', (), "Withdraw all of the caller's dividends")}
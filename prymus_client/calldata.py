@@ -0,0 +1,247 @@
+"""
+GenLayer calldata and the gen_call read envelope
+
+Calldata is GenVM's binary value encoding. Every value starts with a
+ULEB128 header whose low 3 bits are the type and whose high bits are an
+integer, a length or a special value:
+
+    null, false, true    one header byte (special 0, 1, 2)
+    address              header (special 3) and 20 raw bytes
+    int                  (n << 3) | 1 for n >= 0, ((-n - 1) << 3) | 2 below 0
+    bytes, str           length header, then the bytes (str as UTF-8)
+    list                 length header, then each item
+    dict                 length header, then per key in sorted order the
+                         ULEB128 key length, the UTF-8 key and the value
+
+A read sends data = the RLP list [calldata of {"method", "args"}, leader
+only flag], hex encoded, in the gen_call params; the node answers with
+the calldata of the return value, hex encoded (with or without 0x).
+"""
+
+TYPE_SPECIAL = 0
+TYPE_PINT = 1
+TYPE_NINT = 2
+TYPE_BYTES = 3
+TYPE_STR = 4
+TYPE_ARR = 5
+TYPE_MAP = 6
+BITS_IN_TYPE = 3
+
+SPECIAL_NULL = (0 << BITS_IN_TYPE) | TYPE_SPECIAL
+SPECIAL_FALSE = (1 << BITS_IN_TYPE) | TYPE_SPECIAL
+SPECIAL_TRUE = (2 << BITS_IN_TYPE) | TYPE_SPECIAL
+SPECIAL_ADDR = (3 << BITS_IN_TYPE) | TYPE_SPECIAL
+
+ADDRESS_SIZE = 20
+
+
+class CalldataError(ValueError):
+    """Bytes that are not valid calldata (or an RLP envelope)"""
+
+
+class Address(bytes):
+    """A 20-byte address, encoded as such rather than as a string"""
+
+    def __new__(cls, value):
+        if isinstance(value, str):
+            value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+        if len(value) != ADDRESS_SIZE:
+            raise ValueError(f"An address is {ADDRESS_SIZE} bytes, not {len(value)}")
+        return super().__new__(cls, value)
+
+    def __repr__(self):
+        return f"Address('0x{self.hex()}')"
+
+
+# ============== CALLDATA ==============
+
+def _write_uleb128(out: bytearray, value: int):
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _encode_into(out: bytearray, value):
+    if value is None:
+        out.append(SPECIAL_NULL)
+    elif value is True:
+        out.append(SPECIAL_TRUE)
+    elif value is False:
+        out.append(SPECIAL_FALSE)
+    elif isinstance(value, Address):
+        out.append(SPECIAL_ADDR)
+        out += value
+    elif isinstance(value, int):
+        if value >= 0:
+            _write_uleb128(out, (value << BITS_IN_TYPE) | TYPE_PINT)
+        else:
+            _write_uleb128(out, ((-value - 1) << BITS_IN_TYPE) | TYPE_NINT)
+    elif isinstance(value, (bytes, bytearray)):
+        _write_uleb128(out, (len(value) << BITS_IN_TYPE) | TYPE_BYTES)
+        out += value
+    elif isinstance(value, str):
+        encoded = value.encode()
+        _write_uleb128(out, (len(encoded) << BITS_IN_TYPE) | TYPE_STR)
+        out += encoded
+    elif isinstance(value, (list, tuple)):
+        _write_uleb128(out, (len(value) << BITS_IN_TYPE) | TYPE_ARR)
+        for item in value:
+            _encode_into(out, item)
+    elif isinstance(value, dict):
+        _write_uleb128(out, (len(value) << BITS_IN_TYPE) | TYPE_MAP)
+        for key in sorted(value):
+            if not isinstance(key, str):
+                raise TypeError(f"Calldata map keys are strings, not {type(key).__name__}")
+            encoded = key.encode()
+            _write_uleb128(out, len(encoded))
+            out += encoded
+            _encode_into(out, value[key])
+    else:
+        raise TypeError(f"{type(value).__name__} has no calldata encoding")
+
+
+def encode(value) -> bytes:
+    """Calldata of a Python value (None, bool, int, str, bytes, Address, list, tuple, dict)"""
+    out = bytearray()
+    _encode_into(out, value)
+    return bytes(out)
+
+
+class _Reader:
+    def __init__(self, data: bytes):
+        self.data = data
+        self.offset = 0
+
+    def take(self, size: int) -> bytes:
+        end = self.offset + size
+        if end > len(self.data):
+            raise CalldataError("Calldata ends early")
+        chunk = self.data[self.offset:end]
+        self.offset = end
+        return chunk
+
+    def uleb128(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            byte = self.take(1)[0]
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def value(self):
+        header = self.uleb128()
+        kind, payload = header & ((1 << BITS_IN_TYPE) - 1), header >> BITS_IN_TYPE
+        if kind == TYPE_SPECIAL:
+            if header == SPECIAL_NULL:
+                return None
+            if header == SPECIAL_FALSE:
+                return False
+            if header == SPECIAL_TRUE:
+                return True
+            if header == SPECIAL_ADDR:
+                return Address(self.take(ADDRESS_SIZE))
+            raise CalldataError(f"Unknown special value {payload}")
+        if kind == TYPE_PINT:
+            return payload
+        if kind == TYPE_NINT:
+            return -payload - 1
+        if kind == TYPE_BYTES:
+            return self.take(payload)
+        if kind == TYPE_STR:
+            return self.take(payload).decode()
+        if kind == TYPE_ARR:
+            return [self.value() for _ in range(payload)]
+        if kind == TYPE_MAP:
+            result = {}
+            for _ in range(payload):
+                key = self.take(self.uleb128()).decode()
+                result[key] = self.value()
+            return result
+        raise CalldataError(f"Unknown calldata type {kind}")
+
+
+def decode(data: bytes):
+    """The value encoded in data; lists come back as lists, addresses as Address"""
+    reader = _Reader(data)
+    value = reader.value()
+    if reader.offset != len(data):
+        raise CalldataError(f"{len(data) - reader.offset} bytes after the calldata value")
+    return value
+
+
+# ============== READ ENVELOPE ==============
+
+def _rlp_item(data: bytes) -> bytes:
+    if len(data) == 1 and data[0] < 0x80:
+        return data
+    return _rlp_length(len(data), 0x80) + data
+
+
+def _rlp_length(length: int, offset: int) -> bytes:
+    if length <= 55:
+        return bytes([offset + length])
+    encoded = length.to_bytes((length.bit_length() + 7) // 8, "big")
+    return bytes([offset + 55 + len(encoded)]) + encoded
+
+
+def _rlp_decode_list(data: bytes) -> list[bytes]:
+    """The byte strings of a flat RLP list"""
+    reader = _Reader(data)
+
+    def prefixed(short_offset: int, long_offset: int) -> int:
+        prefix = reader.take(1)[0]
+        if prefix > long_offset:
+            return int.from_bytes(reader.take(prefix - long_offset), "big")
+        return prefix - short_offset
+
+    if not data or data[0] < 0xC0:
+        raise CalldataError("Read data is not an RLP list")
+    end = prefixed(0xC0, 0xF7) + reader.offset
+    items = []
+    while reader.offset < end:
+        if reader.data[reader.offset] < 0x80:
+            items.append(reader.take(1))
+        elif reader.data[reader.offset] < 0xC0:
+            items.append(reader.take(prefixed(0x80, 0xB7)))
+        else:
+            raise CalldataError("Nested RLP lists are not read data")
+    if reader.offset != len(data):
+        raise CalldataError("Bytes after the RLP list")
+    return items
+
+
+def read_data(method: str, args, leader_only: bool = False) -> str:
+    """The hex data field of a gen_call read of method(*args)"""
+    payload = _rlp_item(encode({"method": method, "args": list(args)})) + _rlp_item(bytes([leader_only]))
+    return "0x" + (_rlp_length(len(payload), 0xC0) + payload).hex()
+
+
+def parse_read_data(data: str) -> tuple[str, list, bool]:
+    """(method, args, leader only) of a gen_call data field; the node's side of read_data"""
+    try:
+        raw = bytes.fromhex(data[2:] if data.startswith("0x") else data)
+    except ValueError as error:
+        raise CalldataError(f"Read data is not hex: {error}") from error
+    items = _rlp_decode_list(raw)
+    if len(items) != 2:
+        raise CalldataError(f"Read data holds {len(items)} items, not 2")
+    call = decode(items[0])
+    if not isinstance(call, dict) or not isinstance(call.get("method"), str):
+        raise CalldataError("Calldata is not a method call")
+    return call["method"], call.get("args", []), items[1] not in (b"", b"\x00")
+
+
+def decode_result(result: str):
+    """Value of a gen_call result (hex calldata, with or without 0x)"""
+    try:
+        raw = bytes.fromhex(result[2:] if result.startswith("0x") else result)
+    except ValueError as error:
+        raise CalldataError(f"Result is not hex: {error}") from error
+    return decode(raw)
@@ -0,0 +1,166 @@
+"""
+asyncio client for PRYMUSAMM view methods
+
+    async with PrymusClient("http://127.0.0.1:4000/api", contract_address) as client:
+        price, balance = await asyncio.gather(client.buy_price(), client.balance_of(holder))
+
+Every view method of the contract is a coroutine method here (generated
+from _methods.py). Calls made within batch_window of each other go out as
+one JSON-RPC batch of gen_call reads over a pooled keep-alive connection;
+arguments and results travel as GenLayer calldata (see calldata.py), as a
+node expects them. Identical calls already in flight share one request,
+and results are cached for cache_ttl seconds, at most cache_size of them.
+Each batch also reads total_supply, and a change in supply drops the
+whole cache, because nearly every view depends on it.
+"""
+
+import asyncio
+import inspect
+import time
+
+from prymus_client._methods import METHODS, NO_DEFAULT
+from prymus_client.calldata import CalldataError, decode_result, encode, read_data
+from prymus_client.rpc import ConnectionPool, JsonRpcBatcher
+
+READ_METHOD = "gen_call"
+SUPPLY_VIEW = "total_supply"
+
+ZERO_ADDRESS = "0x" + "00" * 20
+
+
+class PrymusClient:
+    """Batched, pooled and cached access to one deployed PRYMUSAMM"""
+
+    def __init__(self, url: str, contract_address: str, *, sender: str = ZERO_ADDRESS,
+                 pool_size: int = 8, batch_size: int = 64, batch_window: float = 0.002,
+                 cache_ttl: float = 1.0, cache_size: int = 10000, timeout: float = 10.0):
+        self.contract_address = contract_address
+        self.sender = sender
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.pool = ConnectionPool(url, pool_size, timeout)
+        self.batcher = JsonRpcBatcher(self.pool, batch_size, batch_window, self._add_supply_check)
+
+        self._cache = {}
+        self._in_flight = {}
+        self._supply = None
+        self.stats = {"calls": 0, "cache_hits": 0, "coalesced": 0, "invalidations": 0}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def close(self):
+        await self.batcher.close()
+        await self.pool.close()
+
+    # ============== CALLS ==============
+
+    async def call_view(self, name: str, *args):
+        """Result of one view method, from the cache, an in-flight call or the node"""
+        if METHODS.get(name, ("",))[0] != "view":
+            raise AttributeError(f"{name} is not a view method of PRYMUSAMM")
+
+        self.stats["calls"] += 1
+        # The encoded arguments, so anything calldata takes (Address too) can be a key
+        key = (name, encode(args))
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            if cached[1] > time.monotonic():
+                self.stats["cache_hits"] += 1
+                return cached[0]
+            del self._cache[key]
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.stats["coalesced"] += 1
+        else:
+            future = asyncio.ensure_future(self._read(name, args))
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._settle(key, done))
+
+        # Shielded so one caller giving up does not cancel the others
+        return await asyncio.shield(future)
+
+    async def _read(self, name: str, args: tuple):
+        return decode_result(await self.batcher.call(READ_METHOD, [self._read_params(name, args)]))
+
+    def _read_params(self, name: str, args: tuple) -> dict:
+        return {"type": "read", "to": self.contract_address, "from": self.sender,
+                "data": read_data(name, args)}
+
+    def _settle(self, key: tuple, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+        if not future.cancelled() and future.exception() is None and self.cache_ttl > 0 and self.cache_size > 0:
+            self._store(key, future.result())
+
+    def _store(self, key: tuple, result):
+        """Cache result, dropping expired entries and then the oldest ones to stay within cache_size"""
+        now = time.monotonic()
+        # Every entry lives cache_ttl, so insertion order is expiry order
+        self._cache.pop(key, None)
+        while self._cache:
+            oldest = next(iter(self._cache))
+            if self._cache[oldest][1] > now and len(self._cache) < self.cache_size:
+                break
+            del self._cache[oldest]
+        self._cache[key] = (result, now + self.cache_ttl)
+
+    # ============== CACHE INVALIDATION ==============
+
+    def _add_supply_check(self, batch: list):
+        """Read total_supply first in every batch; see _observe_supply"""
+        if self.cache_ttl <= 0:
+            return
+        request = self.batcher.request(READ_METHOD, [self._read_params(SUPPLY_VIEW, ())])
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(self._observe_supply)
+        # Results are delivered in batch order, so the cache is dropped
+        # before the other results of the same batch are stored
+        batch.insert(0, (request, future))
+
+    def _observe_supply(self, future: asyncio.Future):
+        if future.cancelled() or future.exception() is not None:
+            return
+        try:
+            supply = decode_result(future.result())
+        except CalldataError:
+            return
+        if self._supply is not None and supply != self._supply:
+            self._cache.clear()
+            self.stats["invalidations"] += 1
+        self._supply = supply
+
+
+# ============== GENERATED VIEW METHODS ==============
+
+def _view_method(name: str, parameters: tuple, summary: str):
+    """Coroutine method calling one view, with the contract's signature and defaults"""
+    required = sum(1 for _, _, default in parameters if default == NO_DEFAULT)
+    defaults = tuple(default for _, _, default in parameters[required:])
+
+    async def method(self, *args):
+        if not required <= len(args) <= len(parameters):
+            raise TypeError(f"{name}() takes {required} to {len(parameters)} arguments ({len(args)} given)")
+        return await self.call_view(name, *args, *defaults[len(args) - required:])
+
+    signature = [inspect.Parameter("self", inspect.Parameter.POSITIONAL_ONLY)]
+    for parameter, annotation, default in parameters:
+        signature.append(inspect.Parameter(
+            parameter, inspect.Parameter.POSITIONAL_ONLY,
+            default=inspect.Parameter.empty if default == NO_DEFAULT else default,
+            annotation=annotation or inspect.Parameter.empty))
+
+    method.__name__ = method.__qualname__ = name
+    method.__doc__ = summary
+    method.__signature__ = inspect.Signature(signature)
+    return method
+
+
+for _name, (_kind, _parameters, _summary) in METHODS.items():
+    if _kind == "view":
+        setattr(PrymusClient, _name, _view_method(_name, _parameters, _summary))
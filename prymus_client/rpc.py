@@ -0,0 +1,228 @@
+"""
+Pooled HTTP/1.1 connections and batched JSON-RPC over asyncio streams
+
+Only the standard library is used: a small keep-alive HTTP client is
+enough for JSON-RPC POSTs, and it keeps the SDK installable anywhere the
+contract tooling runs.
+"""
+
+import asyncio
+import itertools
+import json
+from urllib.parse import urlsplit
+
+
+class RpcError(Exception):
+    """Error object returned by the node for one request"""
+
+    def __init__(self, code: int, message: str, data=None):
+        super().__init__(f"{message} ({code})")
+        self.code = code
+        self.message = message
+        self.data = data
+
+
+class TransportError(ConnectionError):
+    """The node could not be reached or answered with a non-200 status"""
+
+
+# ============== CONNECTIONS ==============
+
+class _Connection:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.requests = 0
+
+    async def post(self, host: str, path: str, body: bytes) -> bytes:
+        self.requests += 1
+        self.writer.write(
+            f"POST {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\nConnection: keep-alive\r\n\r\n".encode("latin-1") + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise TransportError("connection closed by node")
+        status = int(status_line.split()[1])
+
+        headers = {}
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            payload = await self._read_chunked()
+        else:
+            payload = await self.reader.readexactly(int(headers.get("content-length", 0)))
+
+        if headers.get("connection", "").lower() == "close":
+            self.close()
+        if status != 200:
+            raise TransportError(f"HTTP {status}: {payload[:200]!r}")
+        return payload
+
+    async def _read_chunked(self) -> bytes:
+        parts = []
+        while True:
+            size = int((await self.reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                await self.reader.readline()
+                return b"".join(parts)
+            parts.append(await self.reader.readexactly(size))
+            await self.reader.readline()
+
+    @property
+    def closed(self) -> bool:
+        return self.writer.is_closing()
+
+    def close(self):
+        if not self.writer.is_closing():
+            self.writer.close()
+
+
+class ConnectionPool:
+    """At most size connections to one HTTP endpoint, reused across requests"""
+
+    def __init__(self, url: str, size: int = 8, timeout: float = 10.0):
+        parts = urlsplit(url)
+        if parts.scheme != "http":
+            raise ValueError(f"Only http:// endpoints are supported, not {url}")
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.path = parts.path or "/"
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(size)
+        self._idle = []
+        self.connections_opened = 0
+
+    async def post(self, body: bytes) -> bytes:
+        """POST body and return the response body"""
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            if connection is None:
+                connection = await self._open()
+            try:
+                payload = await asyncio.wait_for(connection.post(self.host, self.path, body), self.timeout)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError) as error:
+                connection.close()
+                if not reused:
+                    raise TransportError(str(error)) from error
+                # The node may have dropped an idle keep-alive connection; retry once on a fresh one
+                connection = await self._open()
+                payload = await asyncio.wait_for(connection.post(self.host, self.path, body), self.timeout)
+            except BaseException:
+                connection.close()
+                raise
+
+            if not connection.closed:
+                self._idle.append(connection)
+            return payload
+
+    async def _open(self) -> _Connection:
+        try:
+            reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        except OSError as error:
+            raise TransportError(f"cannot connect to {self.host}:{self.port}: {error}") from error
+        self.connections_opened += 1
+        return _Connection(reader, writer)
+
+    async def close(self):
+        while self._idle:
+            connection = self._idle.pop()
+            connection.close()
+            try:
+                await connection.writer.wait_closed()
+            except OSError:
+                pass
+
+
+# ============== JSON-RPC ==============
+
+class JsonRpcBatcher:
+    """
+    Collects JSON-RPC calls for up to window seconds (or batch_size calls)
+    and sends each group as one batch request over the pool
+    before_flush(batch) may append further (request, future) pairs
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = 64, window: float = 0.002, before_flush=None):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.window = window
+        self.before_flush = before_flush
+        self._ids = itertools.count(1)
+        self._pending = []
+        self._timer = None
+        self._sending = set()
+        self.batches_sent = 0
+        self.requests_sent = 0
+
+    def call(self, method: str, params) -> asyncio.Future:
+        """Queue one call; the future resolves to its result"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(({"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}, future))
+
+        if len(self._pending) >= self.batch_size or self.window <= 0:
+            self.flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self.flush)
+        return future
+
+    def request(self, method: str, params) -> dict:
+        """A request with a fresh id, for before_flush to add to a batch"""
+        return {"jsonrpc": "2.0", "id": next(self._ids), "method": method, "params": params}
+
+    def flush(self):
+        """Send everything queued now"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._pending:
+            return
+
+        batch, self._pending = self._pending, []
+        if self.before_flush is not None:
+            self.before_flush(batch)
+        task = asyncio.ensure_future(self._send(batch))
+        self._sending.add(task)
+        task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch: list):
+        futures = {request["id"]: future for request, future in batch}
+        self.batches_sent += 1
+        self.requests_sent += len(batch)
+        try:
+            payload = await self.pool.post(json.dumps([request for request, _ in batch]).encode())
+            responses = json.loads(payload)
+        except Exception as error:
+            for future in futures.values():
+                if not future.done():
+                    future.set_exception(error)
+            return
+
+        if isinstance(responses, dict):
+            responses = [responses]
+        for response in responses:
+            future = futures.pop(response.get("id"), None)
+            if future is None or future.done():
+                continue
+            if "error" in response:
+                error = response["error"]
+                future.set_exception(RpcError(error.get("code", 0), error.get("message", ""), error.get("data")))
+            else:
+                future.set_result(response.get("result"))
+        for future in futures.values():
+            if not future.done():
+                future.set_exception(RpcError(-32603, "No response for request"))
+
+    async def close(self):
+        self.flush()
+        if self._sending:
+            await asyncio.gather(*self._sending, return_exceptions=True)
@@ -0,0 +1,223 @@
+"""
+PRYMUS bonding curve and dividend accounting as plain Python functions
+
+Mirrors the curve math of PRYMUSAMM in PRYMUS_AMM.py (_ethereum_to_tokens,
+_ethereum_for_tokens, _tokens_to_ethereum, _sqrt, _purchase_tokens, sell and
+_account_dividends) over Python ints, without the genlayer runtime, so risk,
+backtesting and plotting code can run the exact on-chain arithmetic.
+The contract keeps its own copy because it deploys as a single file;
+python -m tools.check_curve fails if the two diverge.
+
+Curve holds one parameter set, so parameter studies can build as many as
+they need; the module-level functions use the deployed parameters.
+"""
+
+from math import isqrt
+from typing import Iterable, Iterator, NamedTuple
+
+DIVIDEND_FEE = 20  # 5% tax (100/20)
+TOKEN_PRICE_INITIAL = 100000000000  # 0.0000001 ether in wei
+TOKEN_PRICE_INCREMENTAL = 10000000  # 0.00000001 ether in wei
+MAGNITUDE = 2**64
+ONE_TOKEN = 10**18
+
+# Batch helpers evaluate this many points per list comprehension
+DEFAULT_CHUNK_SIZE = 65536
+
+
+class PurchaseResult(NamedTuple):
+    """Outcome of _purchase_tokens for one buy"""
+    tokens: int
+    token_supply: int
+    profit_per_share: int
+    payout_delta: int
+    referral_bonus: int
+
+
+class SaleResult(NamedTuple):
+    """Outcome of sell for one sale"""
+    taxed_ethereum: int
+    token_supply: int
+    profit_per_share: int
+    payout_delta: int
+
+
+class Curve:
+    """One parameter set of the PRYMUS bonding curve"""
+
+    def __init__(self, dividend_fee: int = DIVIDEND_FEE,
+                 token_price_initial: int = TOKEN_PRICE_INITIAL,
+                 token_price_incremental: int = TOKEN_PRICE_INCREMENTAL):
+        self.dividend_fee = dividend_fee
+        self.token_price_initial = token_price_initial
+        self.token_price_incremental = token_price_incremental
+
+        # Same derived constants as the contract's module constants
+        self.initial_scaled = token_price_initial * ONE_TOKEN
+        self.eth_term_factor = 2 * token_price_incremental * ONE_TOKEN * ONE_TOKEN
+        self.eth_term_divisor = 2 * ONE_TOKEN * ONE_TOKEN
+
+    def __repr__(self) -> str:
+        return (f"Curve(dividend_fee={self.dividend_fee}, "
+                f"token_price_initial={self.token_price_initial}, "
+                f"token_price_incremental={self.token_price_incremental})")
+
+    # ============== CURVE ==============
+
+    def ethereum_to_tokens(self, ethereum: int, supply: int) -> int:
+        """Tokens minted for taxed ethereum at supply (_ethereum_to_tokens)"""
+        price_term = self.initial_scaled + self.token_price_incremental * supply
+        tokens_received = (isqrt(price_term * price_term + self.eth_term_factor * ethereum)
+                           - self.initial_scaled) // self.token_price_incremental
+        return tokens_received - supply if tokens_received > supply else 0
+
+    def ethereum_for_tokens(self, tokens: int, supply: int) -> int:
+        """Smallest incoming ETH (before fee) minting >= tokens (_ethereum_for_tokens)"""
+        if tokens == 0:
+            return 0
+
+        price_term = self.initial_scaled + self.token_price_incremental * supply
+        numerator = tokens * (2 * price_term + self.token_price_incremental * tokens)
+        taxed_ethereum = -(-numerator // self.eth_term_divisor)
+        return taxed_ethereum + (taxed_ethereum - 1) // (self.dividend_fee - 1)
+
+    def tokens_to_ethereum(self, tokens: int, supply: int) -> int:
+        """ETH value (before fee) of selling tokens at supply (_tokens_to_ethereum)"""
+        tokens_adjusted = tokens + ONE_TOKEN
+        current_price = self.token_price_initial + self.token_price_incremental * supply // ONE_TOKEN
+        term2 = self.token_price_incremental * (tokens_adjusted * (tokens_adjusted - 1)) // (2 * ONE_TOKEN)
+        return (current_price * tokens - term2) // ONE_TOKEN
+
+    def current_prices(self, supply: int) -> tuple[int, int]:
+        """One-token (buy price including fee, sell price after fee) at supply"""
+        if supply == 0:
+            return (self.token_price_initial + self.token_price_incremental,
+                    self.token_price_initial - self.token_price_incremental)
+
+        ethereum = self.tokens_to_ethereum(ONE_TOKEN, supply)
+        dividends = ethereum // self.dividend_fee
+        return (ethereum + dividends, ethereum - dividends)
+
+    # ============== QUOTES ==============
+
+    def quote_buy(self, ethereum_to_spend: int, supply: int) -> int:
+        """Tokens received for ethereum_to_spend (calculate_tokens_received)"""
+        return self.ethereum_to_tokens(ethereum_to_spend - ethereum_to_spend // self.dividend_fee, supply)
+
+    def quote_sell(self, tokens_to_sell: int, supply: int) -> int:
+        """ETH received for selling tokens_to_sell (calculate_ethereum_received)"""
+        ethereum = self.tokens_to_ethereum(tokens_to_sell, supply)
+        return ethereum - ethereum // self.dividend_fee
+
+    # ============== DIVIDEND ACCOUNTING ==============
+
+    def purchase(self, incoming_ethereum: int, supply: int, profit_per_share: int,
+                 referrer_eligible: bool = False) -> PurchaseResult:
+        """Apply one buy of incoming_ethereum (_purchase_tokens)"""
+        undivided_dividends = incoming_ethereum // self.dividend_fee
+        referral_bonus = undivided_dividends // 3
+        dividends = undivided_dividends - referral_bonus
+        tokens = self.ethereum_to_tokens(incoming_ethereum - undivided_dividends, supply)
+        if tokens == 0:
+            raise ValueError("Token amount must be positive")
+
+        if not referrer_eligible:
+            dividends += referral_bonus
+            referral_bonus = 0
+
+        supply += tokens
+        profit_per_share += (dividends * MAGNITUDE) // supply
+        payout_delta = profit_per_share * tokens - dividends * MAGNITUDE
+        return PurchaseResult(tokens, supply, profit_per_share, payout_delta, referral_bonus)
+
+    def sale(self, tokens: int, supply: int, profit_per_share: int) -> SaleResult:
+        """Apply one sale of tokens (sell)"""
+        if tokens <= 0 or tokens > supply:
+            raise ValueError("Invalid token amount")
+
+        ethereum = self.tokens_to_ethereum(tokens, supply)
+        dividends = ethereum // self.dividend_fee
+        taxed_ethereum = ethereum - dividends
+
+        payout_delta = -(profit_per_share * tokens + taxed_ethereum * MAGNITUDE)
+        supply -= tokens
+        if supply > 0:
+            profit_per_share += (dividends * MAGNITUDE) // supply
+        return SaleResult(taxed_ethereum, supply, profit_per_share, payout_delta)
+
+    # ============== BATCHES ==============
+
+    def quote_buy_many(self, ethereum_amounts: Iterable[int], supply: int,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[int]:
+        """quote_buy for every amount at one supply, streamed in chunks"""
+        fee = self.dividend_fee
+        initial_scaled = self.initial_scaled
+        incremental = self.token_price_incremental
+        factor = self.eth_term_factor
+        price_term = initial_scaled + incremental * supply
+        base = price_term * price_term
+
+        for chunk in _chunks(ethereum_amounts, chunk_size):
+            quotes = [(isqrt(base + factor * (e - e // fee)) - initial_scaled) // incremental
+                      for e in chunk]
+            yield from (t - supply if t > supply else 0 for t in quotes)
+
+    def quote_sell_many(self, token_amounts: Iterable[int], supply: int,
+                        chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[int]:
+        """quote_sell for every amount at one supply, streamed in chunks"""
+        fee = self.dividend_fee
+        incremental = self.token_price_incremental
+        current_price = self.token_price_initial + incremental * supply // ONE_TOKEN
+        two_one_token = 2 * ONE_TOKEN
+
+        for chunk in _chunks(token_amounts, chunk_size):
+            values = [(current_price * t - incremental * ((t + ONE_TOKEN) * (t + ONE_TOKEN - 1)) // two_one_token)
+                      // ONE_TOKEN for t in chunk]
+            yield from (e - e // fee for e in values)
+
+    def price_curve(self, supplies: Iterable[int],
+                    chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[tuple[int, int]]:
+        """current_prices at every supply point, streamed in chunks"""
+        current_prices = self.current_prices
+        for chunk in _chunks(supplies, chunk_size):
+            yield from [current_prices(s) for s in chunk]
+
+
+def _chunks(values: Iterable[int], chunk_size: int) -> Iterator[list[int]]:
+    """Split any iterable into lists of at most chunk_size"""
+    if isinstance(values, list) and len(values) <= chunk_size:
+        yield values
+        return
+
+    chunk = []
+    for value in values:
+        chunk.append(value)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def dividends_of(balance: int, payout: int, profit_per_share: int) -> int:
+    """Dividends of an account (_account_dividends)"""
+    if balance == 0:
+        return 0
+
+    dividends = profit_per_share * balance - payout
+    return dividends // MAGNITUDE if dividends > 0 else 0
+
+
+DEFAULT_CURVE = Curve()
+
+ethereum_to_tokens = DEFAULT_CURVE.ethereum_to_tokens
+ethereum_for_tokens = DEFAULT_CURVE.ethereum_for_tokens
+tokens_to_ethereum = DEFAULT_CURVE.tokens_to_ethereum
+current_prices = DEFAULT_CURVE.current_prices
+quote_buy = DEFAULT_CURVE.quote_buy
+quote_sell = DEFAULT_CURVE.quote_sell
+purchase = DEFAULT_CURVE.purchase
+sale = DEFAULT_CURVE.sale
+quote_buy_many = DEFAULT_CURVE.quote_buy_many
+quote_sell_many = DEFAULT_CURVE.quote_sell_many
+price_curve = DEFAULT_CURVE.price_curve
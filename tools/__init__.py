@@ -0,0 +1 @@
+"""Off-chain tooling for PRYMUSAMM: local runtime, benchmarks and analysis"""
@@ -0,0 +1,299 @@
+"""
+Per-method benchmark suite for PRYMUSAMM on the in-process mock runtime
+
+    python -m tools.bench                       # run and print the table
+    python -m tools.bench --save-baseline       # also record a baseline
+    python -m tools.bench --baseline            # flag regressions against it
+
+Each public method is timed in a small and a large scenario (holder count
+and token_supply). Every timed call runs inside an outer transaction that
+is rolled back afterwards, so all iterations start from identical state.
+Calls that revert are timed too and counted separately.
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import sys
+import time
+
+from tools.mock_genlayer import (DEFAULT_DEPLOYER, call, contract_class, deploy, load_contract,
+                                 message, public_methods, transaction)
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+
+ONE_ETHER = 10**18
+ONE_TOKEN = 10**18
+
+
+class _Rollback(Exception):
+    """Raised to undo the state changes of one benchmark iteration"""
+
+
+# ============== SCENARIOS ==============
+
+def build_scenario(amm, holders: int, whale_ethereum: int, seed: int):
+    """Deploy and populate a contract; returns (contract, holder addresses)"""
+    rng = random.Random(seed)
+    contract = deploy(amm)
+    addresses = [f"0x{index:040x}" for index in range(1, holders + 1)]
+
+    # A whale buy first sets the supply level, then everyone else buys in
+    call(contract, "buy", sender=addresses[0], value=whale_ethereum)
+    for index, address in enumerate(addresses[1:], 1):
+        referrer = addresses[rng.randrange(index)]
+        call(contract, "buy", referrer, sender=address, value=rng.randint(ONE_ETHER // 100, ONE_ETHER))
+
+    # Some churn so every holder has dividends to withdraw or reinvest
+    for address in rng.sample(addresses, max(1, holders // 10)):
+        balance = contract.balance_of(address)
+        call(contract, "sell", balance // 10, sender=address)
+    for address in addresses[: max(1, holders // 10)]:
+        call(contract, "buy", sender=address, value=ONE_ETHER)
+
+    return contract, addresses
+
+
+SCENARIOS = {
+    "small": {"holders": 10, "whale_ethereum": ONE_ETHER},
+    "large": {"holders": 5000, "whale_ethereum": 10**6 * ONE_ETHER},
+}
+
+
+# ============== BENCHMARKS ==============
+# name -> function(contract, addresses, i) returning (sender, value, args)
+
+def _holder(addresses, i):
+    return addresses[i % len(addresses)]
+
+
+def _balance(contract, addresses, i):
+    return contract.balance_of(_holder(addresses, i))
+
+
+KEEPER = "0x" + "6b" * 20
+
+
+def _keeper(contract):
+    if not contract.keepers.get(KEEPER, False):
+        call(contract, "set_keeper", KEEPER, True, sender=DEFAULT_DEPLOYER)
+    return KEEPER
+
+
+BENCHMARKS = {
+    # Writes
+    "buy": lambda c, a, i: (_holder(a, i), ONE_ETHER, (_holder(a, i + 1),)),
+    "buy_exact_tokens": lambda c, a, i: (_holder(a, i), 10**6 * ONE_ETHER, (1000 * ONE_TOKEN, 10**6 * ONE_ETHER)),
+    "sell": lambda c, a, i: (_holder(a, i), 0, (max(1, _balance(c, a, i) // 2),)),
+    "transfer": lambda c, a, i: (_holder(a, i), 0, (_holder(a, i + 1), max(1, _balance(c, a, i) // 2))),
+    "transfer_many": lambda c, a, i: (_holder(a, i), 0, (
+        [_holder(a, i + k) for k in range(1, 11)], [max(1, _balance(c, a, i) // 20)] * 10)),
+    "reinvest": lambda c, a, i: (_holder(a, i), 0, ()),
+    "withdraw": lambda c, a, i: (_holder(a, i), 0, ()),
+    "exit": lambda c, a, i: (_holder(a, i), 0, ()),
+    "compound_many": lambda c, a, i: (_keeper(c), 0, ([_holder(a, i + k) for k in range(50)],)),
+    "rescan_holder_ranking": lambda c, a, i: (_holder(a, i), 0, (50,)),
+
+    # Admin writes
+    "disable_initial_stage": lambda c, a, i: (DEFAULT_DEPLOYER, 0, ()),
+    "set_administrator": lambda c, a, i: (DEFAULT_DEPLOYER, 0, (_holder(a, i), True)),
+    "set_keeper": lambda c, a, i: (DEFAULT_DEPLOYER, 0, (_holder(a, i), True)),
+    "set_checkpoint_interval": lambda c, a, i: (DEFAULT_DEPLOYER, 0, (10,)),
+    "set_staking_requirement": lambda c, a, i: (DEFAULT_DEPLOYER, 0, (100 * ONE_TOKEN,)),
+    "set_name": lambda c, a, i: (DEFAULT_DEPLOYER, 0, ("PRYMUS",)),
+    "set_symbol": lambda c, a, i: (DEFAULT_DEPLOYER, 0, ("xPRYM",)),
+    "set_debug_logging": lambda c, a, i: (DEFAULT_DEPLOYER, 0, (False,)),
+    "migrate_legacy_accounts": lambda c, a, i: (DEFAULT_DEPLOYER, 0, ([_holder(a, i)],)),
+    # The scenario already has holders, so these measure the revert path
+    "begin_import": lambda c, a, i: (DEFAULT_DEPLOYER, 0, (ONE_TOKEN, 0)),
+    "import_accounts": lambda c, a, i: (DEFAULT_DEPLOYER, 0, ([_holder(a, i)], [ONE_TOKEN], [0], [0])),
+    "finalize_import": lambda c, a, i: (DEFAULT_DEPLOYER, 0, ()),
+
+    # Views
+    "total_supply": lambda c, a, i: (_holder(a, i), 0, ()),
+    "my_tokens": lambda c, a, i: (_holder(a, i), 0, ()),
+    "my_dividends": lambda c, a, i: (_holder(a, i), 0, (True,)),
+    "balance_of": lambda c, a, i: (_holder(a, i), 0, (_holder(a, i + 1),)),
+    "buy_price": lambda c, a, i: (_holder(a, i), 0, ()),
+    "sell_price": lambda c, a, i: (_holder(a, i), 0, ()),
+    "verify_price_cache": lambda c, a, i: (_holder(a, i), 0, ()),
+    "calculate_tokens_received": lambda c, a, i: (_holder(a, i), 0, (ONE_ETHER,)),
+    "calculate_ethereum_received": lambda c, a, i: (_holder(a, i), 0, (max(1, _balance(c, a, i)),)),
+    "calculate_ethereum_for_tokens": lambda c, a, i: (_holder(a, i), 0, (1000 * ONE_TOKEN,)),
+    "quote_buy_many": lambda c, a, i: (_holder(a, i), 0, ([ONE_ETHER * k // 16 for k in range(1, 17)],)),
+    "quote_sell_many": lambda c, a, i: (_holder(a, i), 0, ([ONE_TOKEN * k for k in range(1, 17)],)),
+    "quote_buy_ladder": lambda c, a, i: (_holder(a, i), 0, (ONE_ETHER // 16, 16)),
+    "quote_sell_ladder": lambda c, a, i: (_holder(a, i), 0, (ONE_TOKEN, 16)),
+    "account_summary": lambda c, a, i: (_holder(a, i), 0, (_holder(a, i + 1),)),
+    "account_summaries": lambda c, a, i: (_holder(a, i), 0, ([_holder(a, i + k) for k in range(50)],)),
+    "holder_count": lambda c, a, i: (_holder(a, i), 0, ()),
+    "holders_page": lambda c, a, i: (_holder(a, i), 0, (0, 50)),
+    "top_holders": lambda c, a, i: (_holder(a, i), 0, (10,)),
+    "holder_ranking_status": lambda c, a, i: (_holder(a, i), 0, ()),
+    "referral_stats": lambda c, a, i: (_holder(a, i), 0, (_holder(a, i + 1),)),
+    "referrer_count": lambda c, a, i: (_holder(a, i), 0, ()),
+    "referrers_page": lambda c, a, i: (_holder(a, i), 0, (0, 50)),
+    "top_referrers": lambda c, a, i: (_holder(a, i), 0, (10,)),
+    "events_emitted": lambda c, a, i: (_holder(a, i), 0, ()),
+    "events_since": lambda c, a, i: (_holder(a, i), 0, (0, 50)),
+    "import_status": lambda c, a, i: (_holder(a, i), 0, ()),
+    "price_history": lambda c, a, i: (_holder(a, i), 0, (0, 50, 0)),
+}
+
+
+def time_method(contract, method: str, prepare, addresses, iterations: int) -> dict:
+    """Time iterations of one method, each from the same starting state"""
+    samples = []
+    reverted = 0
+    bound = getattr(contract, method)
+
+    for i in range(iterations):
+        sender, value, args = prepare(contract, addresses, i)
+        try:
+            with transaction():
+                with message(sender, value):
+                    start = time.perf_counter_ns()
+                    try:
+                        with transaction():
+                            bound(*args)
+                    except AssertionError:
+                        reverted += 1
+                    samples.append(time.perf_counter_ns() - start)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    return summarize(samples, reverted)
+
+
+def summarize(samples: list[int], reverted: int = 0) -> dict:
+    """ops/sec and latency percentiles (microseconds) of nanosecond samples"""
+    samples = sorted(samples)
+
+    def percentile(fraction):
+        return samples[min(len(samples) - 1, int(fraction * len(samples)))] / 1000
+
+    return {
+        "ops_per_sec": len(samples) / (sum(samples) / 1e9) if sum(samples) else math.inf,
+        "p50_us": percentile(0.50),
+        "p90_us": percentile(0.90),
+        "p99_us": percentile(0.99),
+        "reverted": reverted,
+    }
+
+
+# ============== MICRO-BENCHMARKS ==============
+
+def bench_sqrt(contract, count: int, seed: int) -> dict:
+    """PRYMUSAMM._sqrt against math.isqrt over the full u256 range"""
+    rng = random.Random(seed)
+    values = [rng.getrandbits(rng.randint(1, 256)) for _ in range(count)]
+
+    results = {}
+    for name, sqrt in (("_sqrt", contract._sqrt), ("math.isqrt", math.isqrt)):
+        samples = []
+        for value in values:
+            start = time.perf_counter_ns()
+            sqrt(value)
+            samples.append(time.perf_counter_ns() - start)
+        results[f"micro/{name}"] = summarize(samples)
+
+    mismatches = sum(1 for value in values if contract._sqrt(value) != math.isqrt(value))
+    if mismatches:
+        raise AssertionError(f"_sqrt disagrees with math.isqrt on {mismatches} of {count} values")
+
+    return results
+
+
+# ============== REPORTING ==============
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Benchmarks whose p50 latency grew by more than tolerance"""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and result["p50_us"] > previous["p50_us"] * (1 + tolerance):
+            regressions.append(f"{name}: p50 {previous['p50_us']:.1f}us -> {result['p50_us']:.1f}us")
+    return regressions
+
+
+def print_table(results: dict, baseline: dict | None):
+    header = f"{'benchmark':44} {'ops/sec':>12} {'p50 us':>10} {'p90 us':>10} {'p99 us':>10} {'reverted':>9}"
+    if baseline is not None:
+        header += f" {'vs base':>8}"
+    print(header)
+
+    for name, result in results.items():
+        line = (f"{name:44} {result['ops_per_sec']:12.0f} {result['p50_us']:10.1f} "
+                f"{result['p90_us']:10.1f} {result['p99_us']:10.1f} {result['reverted']:9d}")
+        if baseline is not None:
+            previous = baseline.get(name)
+            line += f" {result['p50_us'] / previous['p50_us']:7.2f}x" if previous else f" {'new':>8}"
+        print(line)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma-separated scenario names")
+    parser.add_argument("--large-holders", type=int, default=SCENARIOS["large"]["holders"])
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--only", default="", help="only benchmarks whose name contains this")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH")
+    parser.add_argument("--baseline", nargs="?", const=DEFAULT_BASELINE, metavar="PATH")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed p50 slowdown (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    amm = load_contract()
+    uncovered = sorted(set(public_methods(contract_class(amm))) - set(BENCHMARKS))
+    if uncovered:
+        print(f"warning: no benchmark for {', '.join(uncovered)}", file=sys.stderr)
+
+    results = {}
+    for scenario in args.scenarios.split(","):
+        config = dict(SCENARIOS[scenario])
+        if scenario == "large":
+            config["holders"] = args.large_holders
+        contract, addresses = build_scenario(amm, seed=args.seed, **config)
+
+        for method, prepare in BENCHMARKS.items():
+            name = f"{scenario}/{method}"
+            if args.only in name:
+                results[name] = time_method(contract, method, prepare, addresses, args.iterations)
+
+    if args.only in "micro/_sqrt micro/math.isqrt":
+        results.update(bench_sqrt(deploy(amm), args.iterations * 50, args.seed))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+
+    print_table(results, baseline)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as baseline_file:
+            json.dump({
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "iterations": args.iterations,
+                "results": results,
+            }, baseline_file, indent=2)
+        print(f"baseline saved to {args.save_baseline}")
+
+    if baseline is not None:
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.tolerance:.0%}:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
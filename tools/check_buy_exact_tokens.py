@@ -0,0 +1,113 @@
+"""
+Check PRYMUSAMM.buy_exact_tokens: its quote and what it does with overpayment
+
+    python -m tools.check_buy_exact_tokens
+    python -m tools.check_buy_exact_tokens --samples 100000 --rounds 500 --seed 7
+
+The quote, _ethereum_for_tokens (the closed-form curve inverse grossed up
+for the dividend fee), must be the least ETH that is enough: for random
+supplies and token amounts (log-uniform, for the parameter sets of
+tools.check_curve), cost mints at least the tokens after the fee and
+cost - 1 mints fewer.
+
+Then holders of a populated contract buy an exact token amount and overpay
+by a random amount. The overpayment must be kept as the buyer's change:
+neither a keeper's compound_many nor the buyer's own reinvest may touch it,
+and the next withdraw pays it out in full together with dividends and
+referral bonus. Exits non-zero on the first violation.
+"""
+
+import argparse
+import random
+import sys
+
+from tools.bench import ONE_ETHER, ONE_TOKEN, build_scenario
+from tools.check_curve import PARAMETER_SETS
+from tools.mock_genlayer import DEFAULT_DEPLOYER, call, deploy, load_contract
+
+KEEPER = "0x" + "4b" * 20
+
+
+def check_quote(constants: dict, samples: int, rng: random.Random):
+    """cost is enough for tokens and cost - 1 is not, at random points of one parameter set"""
+    amm = load_contract(constants=constants or None)
+    contract = deploy(amm)
+
+    for _ in range(samples):
+        supply = rng.getrandbits(rng.randint(0, 110))
+        tokens = rng.getrandbits(rng.randint(1, 100)) or 1
+
+        def minted(ethereum: int) -> int:
+            return contract._ethereum_to_tokens(ethereum - ethereum // amm.DIVIDEND_FEE, supply)
+
+        cost = contract._ethereum_for_tokens(tokens, supply)
+        where = f"{constants or 'deployed'} supply={supply} tokens={tokens}"
+        assert minted(cost) >= tokens, f"{where}: cost {cost} mints only {minted(cost)}"
+        assert minted(cost - 1) < tokens, f"{where}: cost {cost} is not the least, {cost - 1} mints {minted(cost - 1)}"
+
+
+def _try(contract, method: str, *args, sender: str) -> bool:
+    """Call method; False if it reverted"""
+    try:
+        call(contract, method, *args, sender=sender)
+    except AssertionError:
+        return False
+    return True
+
+
+def check_change(contract, addresses: list[str], rounds: int, rng: random.Random) -> int:
+    """Overpay, compound and withdraw rounds times; returns the change checked, in wei"""
+    checked = 0
+    for _ in range(rounds):
+        buyer = rng.choice(addresses)
+        tokens = rng.randint(1, 10_000) * ONE_TOKEN
+        cost = contract.calculate_ethereum_for_tokens(tokens)
+        overpay = rng.randint(1, 5 * ONE_ETHER)
+
+        change = contract._load_account(buyer).change
+        call(contract, "buy_exact_tokens", tokens, cost, sender=buyer, value=cost + overpay)
+        change += overpay
+        assert contract._load_account(buyer).change == change, \
+            f"{buyer} overpaid {overpay} wei but holds {contract._load_account(buyer).change} change"
+
+        # Whether or not there is anything to reinvest, the change stays put
+        _try(contract, "compound_many", [buyer], sender=KEEPER)
+        assert contract._load_account(buyer).change == change, f"compound_many reinvested {buyer}'s change"
+        _try(contract, "reinvest", sender=buyer)
+        assert contract._load_account(buyer).change == change, f"reinvest reinvested {buyer}'s change"
+
+        if rng.random() < 0.5:
+            account = contract._load_account(buyer)
+            expected = contract._dividends_of(buyer) + account.referral_bonus + change
+            paid = call(contract, "withdraw", sender=buyer)
+            assert paid == expected, f"withdraw paid {buyer} {paid} wei, expected {expected}"
+            assert contract._load_account(buyer).change == 0, f"withdraw left {buyer}'s change in place"
+        checked += overpay
+    return checked
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=20000, help="random quotes per parameter set")
+    parser.add_argument("--rounds", type=int, default=200, help="overpaid buys")
+    parser.add_argument("--holders", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    contract, addresses = build_scenario(load_contract(), args.holders, 100 * ONE_ETHER, args.seed)
+    call(contract, "set_keeper", KEEPER, True, sender=DEFAULT_DEPLOYER)
+    try:
+        for constants in PARAMETER_SETS:
+            check_quote(constants, args.samples, rng)
+        checked = check_change(contract, addresses, args.rounds, rng)
+    except AssertionError as error:
+        print(f"FAIL: {error}", file=sys.stderr)
+        return 1
+    print(f"{args.samples * len(PARAMETER_SETS)} quotes are the least ETH that is enough")
+    print(f"{args.rounds} overpaid buys kept {checked} wei of change out of reinvestment")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
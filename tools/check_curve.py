@@ -0,0 +1,149 @@
+"""
+Check that prymus_curve.py still matches the curve code in PRYMUS_AMM.py
+
+    python -m tools.check_curve                 # fails if the copies diverge
+    python -m tools.check_curve --samples 100000
+
+The contract deploys as a single file, so it cannot import prymus_curve and
+both carry the same arithmetic. This compares them on random supplies and
+amounts (log-uniform, from dust to far beyond realistic supplies), for the
+deployed constants and for a few other parameter sets loaded into the
+contract with load_contract(constants=...): _ethereum_to_tokens,
+_ethereum_for_tokens, _tokens_to_ethereum (including where the contract
+reverts), _current_prices, _account_dividends and the batch quote paths.
+Exits non-zero on the first difference.
+"""
+
+import argparse
+import random
+import sys
+
+import prymus_curve
+from tools.mock_genlayer import deploy, load_contract
+
+# Contract constant -> Curve argument; the deployed values plus a few others
+PARAMETER_SETS = (
+    {},
+    {"DIVIDEND_FEE": 10},
+    {"DIVIDEND_FEE": 4, "TOKEN_PRICE_INITIAL": 10**9, "TOKEN_PRICE_INCREMENTAL": 10**5},
+    {"TOKEN_PRICE_INITIAL": 1, "TOKEN_PRICE_INCREMENTAL": 1},
+)
+CURVE_ARGUMENTS = {
+    "DIVIDEND_FEE": "dividend_fee",
+    "TOKEN_PRICE_INITIAL": "token_price_initial",
+    "TOKEN_PRICE_INCREMENTAL": "token_price_incremental",
+}
+SHARED_CONSTANTS = ("DIVIDEND_FEE", "TOKEN_PRICE_INITIAL", "TOKEN_PRICE_INCREMENTAL", "MAGNITUDE", "ONE_TOKEN")
+
+BATCH_SIZE = 64
+
+
+class Divergence(AssertionError):
+    """The contract and prymus_curve disagree"""
+
+
+def _log_uniform(rng: random.Random, high_bits: int) -> int:
+    return rng.getrandbits(rng.randint(0, high_bits))
+
+
+def _expect(what: str, contract_call, curve_value):
+    """
+    contract_call() must equal curve_value, or revert (u256 underflow)
+    exactly where the mirror goes negative
+    """
+    try:
+        contract_value = contract_call()
+    except OverflowError:
+        contract_value = "revert"
+    if isinstance(contract_value, (tuple, list)):
+        contract_value = type(curve_value)(contract_value)
+
+    values = curve_value if isinstance(curve_value, (tuple, list)) else (curve_value,)
+    if any(value < 0 for value in values):
+        curve_value = "revert"
+
+    if contract_value != curve_value:
+        raise Divergence(f"{what}: contract {contract_value}, prymus_curve {curve_value}")
+
+
+def check_constants():
+    """The deployed constants are the same in both files"""
+    amm = load_contract()
+    for name in SHARED_CONSTANTS:
+        _expect(name, lambda: getattr(amm, name), getattr(prymus_curve, name))
+
+
+def check_parameters(constants: dict, samples: int, rng: random.Random) -> int:
+    """Compare one parameter set; returns the number of comparisons made"""
+    amm = load_contract(constants=constants or None)
+    contract = deploy(amm)
+    curve = prymus_curve.Curve(**{CURVE_ARGUMENTS[name]: value for name, value in constants.items()})
+    label = f"{curve!r}"
+    compared = 0
+
+    for _ in range(samples):
+        supply = _log_uniform(rng, 110)
+        ethereum = _log_uniform(rng, 100)
+        tokens = _log_uniform(rng, 100)
+        where = f"{label} supply={supply}"
+
+        _expect(f"{where} _ethereum_to_tokens({ethereum})",
+                lambda: contract._ethereum_to_tokens(ethereum, supply), curve.ethereum_to_tokens(ethereum, supply))
+        _expect(f"{where} _ethereum_for_tokens({tokens})",
+                lambda: contract._ethereum_for_tokens(tokens, supply), curve.ethereum_for_tokens(tokens, supply))
+        _expect(f"{where} _tokens_to_ethereum({tokens})",
+                lambda: contract._tokens_to_ethereum(tokens, supply), curve.tokens_to_ethereum(tokens, supply))
+        _expect(f"{where} _current_prices",
+                lambda: contract._current_prices(supply), curve.current_prices(supply))
+
+        balance = _log_uniform(rng, 100)
+        payout = _log_uniform(rng, 180) * rng.choice((1, -1))
+        profit_per_share = _log_uniform(rng, 100)
+        _expect(f"{label} _account_dividends({balance}, {payout}, {profit_per_share})",
+                lambda: contract._account_dividends(amm.Account(balance, payout, 0, 0), profit_per_share),
+                prymus_curve.dividends_of(balance, payout, profit_per_share))
+        compared += 5
+
+    # Batch paths against the scalar contract functions at one supply each
+    for _ in range(max(1, samples // BATCH_SIZE)):
+        supply = _log_uniform(rng, 110)
+        amounts = [_log_uniform(rng, 100) for _ in range(BATCH_SIZE)]
+        _expect(f"{label} supply={supply} quote_buy_many",
+                lambda: [contract._ethereum_to_tokens(e - e // amm.DIVIDEND_FEE, supply) for e in amounts],
+                list(curve.quote_buy_many(amounts, supply)))
+
+        sellable = [t for t in amounts if curve.tokens_to_ethereum(t, supply) >= 0]
+        _expect(f"{label} supply={supply} quote_sell_many",
+                lambda: [_after_fee(contract._tokens_to_ethereum(t, supply), amm.DIVIDEND_FEE) for t in sellable],
+                list(curve.quote_sell_many(sellable, supply)))
+        compared += 2
+
+    return compared
+
+
+def _after_fee(ethereum: int, dividend_fee: int) -> int:
+    return ethereum - ethereum // dividend_fee
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--samples", type=int, default=5000, help="random points per parameter set")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    rng = random.Random(args.seed)
+    compared = 0
+    try:
+        check_constants()
+        for constants in PARAMETER_SETS:
+            compared += check_parameters(constants, args.samples, rng)
+    except Divergence as error:
+        print(f"prymus_curve.py has diverged from PRYMUS_AMM.py: {error}", file=sys.stderr)
+        return 1
+
+    print(f"prymus_curve matches PRYMUS_AMM.py on {compared} comparisons over {len(PARAMETER_SETS)} parameter sets")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Check that PRYMUSAMM.exit settles like sell(all) followed by withdraw
+
+    python -m tools.check_exit
+    python -m tools.check_exit --steps 2000 --holders 100 --seed 7
+
+exit prices the sale and the withdrawal in one pass. Between random buys,
+sells, transfers and overpaid buy_exact_tokens on a populated contract,
+a random address (holder, referrer or bystander) exits, and the same
+state is replayed as sell(all) followed by withdraw. Both run inside a
+rolled-back transaction.
+
+sell debits the taxed proceeds from the payout tracker, as the Solidity
+reference does, and withdraw pays them back out. The port's
+_account_dividends reads 0 for an empty balance, so the reference
+withdraw here uses the reference formula (profit_per_share * balance -
+payout) // MAGNITUDE and then adds the referral bonus and change. exit
+must pay exactly that, or revert when it is 0. It must also leave the
+same account, token_supply, profit_per_share, cached prices and holder
+registry. Exits non-zero on the first difference.
+"""
+
+import argparse
+import random
+import sys
+
+from tools.bench import ONE_ETHER, ONE_TOKEN, build_scenario
+from tools.mock_genlayer import call, load_contract, transaction
+
+
+class _Rollback(Exception):
+    """Raised to undo one side of a comparison"""
+
+
+def _state(contract, address: str) -> dict:
+    account = contract._load_account(address)
+    return {
+        "account": (account.balance, account.payout, account.referral_bonus, account.change),
+        "token_supply": contract.token_supply,
+        "profit_per_share": contract.profit_per_share,
+        "prices": (contract.cached_buy_price, contract.cached_sell_price),
+        "holder_count": contract.holder_count(),
+        "top_holders": contract.top_holders(50),
+        "trade_count": contract.trade_count,
+    }
+
+
+def _exit(contract, address: str):
+    """(eth paid or None if it reverted, state after) of exit"""
+    outcome = None
+    try:
+        with transaction():
+            try:
+                outcome = (call(contract, "exit", sender=address)[1], _state(contract, address))
+            except AssertionError:
+                outcome = (None, _state(contract, address))
+            raise _Rollback
+    except _Rollback:
+        pass
+    return outcome
+
+
+def _sell_then_withdraw(contract, amm, address: str):
+    """(eth paid or None if nothing to pay, state after) of sell(all) and the reference withdraw"""
+    outcome = None
+    try:
+        with transaction():
+            tokens = contract.balance_of(address)
+            if tokens > 0:
+                call(contract, "sell", tokens, sender=address)
+
+            account = contract._load_account(address)
+            dividends = (contract.profit_per_share * account.balance - account.payout) // amm.MAGNITUDE
+            paid = dividends + account.referral_bonus + account.change
+            if paid == 0:
+                outcome = (None, _state(contract, address))
+            else:
+                account.payout += dividends * amm.MAGNITUDE
+                account.referral_bonus = 0
+                account.change = 0
+                contract.accounts[address] = account
+                outcome = (paid, _state(contract, address))
+            raise _Rollback
+    except _Rollback:
+        pass
+    return outcome
+
+
+def _random_activity(contract, addresses: list[str], rng: random.Random):
+    sender = rng.choice(addresses)
+    op = rng.random()
+    try:
+        if op < 0.4:
+            call(contract, "buy", rng.choice(addresses + [""]), sender=sender,
+                 value=rng.randint(ONE_ETHER // 1000, 2 * ONE_ETHER))
+        elif op < 0.6:
+            balance = contract.balance_of(sender)
+            if balance:
+                call(contract, "sell", rng.randint(1, balance), sender=sender)
+        elif op < 0.8:
+            balance = contract.balance_of(sender)
+            if balance > ONE_TOKEN:
+                call(contract, "transfer", rng.choice(addresses), rng.randint(ONE_TOKEN, balance), sender=sender)
+        else:
+            tokens = rng.randint(1, 1000) * ONE_TOKEN
+            cost = contract.calculate_ethereum_for_tokens(tokens)
+            call(contract, "buy_exact_tokens", tokens, cost, sender=sender, value=cost + rng.randint(0, ONE_ETHER))
+    except AssertionError:
+        pass
+
+
+def check(contract, amm, addresses: list[str], steps: int, rng: random.Random) -> int:
+    """Compare exit with sell then withdraw after each of steps random transactions; returns the exits paid"""
+    bystanders = [f"0x{0xb0000 + index:040x}" for index in range(5)]
+    paid = 0
+    for _ in range(steps):
+        _random_activity(contract, addresses, rng)
+        address = rng.choice(addresses + bystanders)
+
+        exited = _exit(contract, address)
+        expected = _sell_then_withdraw(contract, amm, address)
+        assert exited[0] == expected[0], f"exit paid {address} {exited[0]}, sell then withdraw {expected[0]}"
+        for field, value in expected[1].items():
+            assert exited[1][field] == value, f"{address} exit left {field} {exited[1][field]}, expected {value}"
+        paid += exited[0] is not None
+
+        # Sometimes keep the exit, so emptied accounts come back through buys
+        if exited[0] is not None and rng.random() < 0.2:
+            call(contract, "exit", sender=address)
+    return paid
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--steps", type=int, default=1000)
+    parser.add_argument("--holders", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    amm = load_contract()
+    contract, addresses = build_scenario(amm, args.holders, 100 * ONE_ETHER, args.seed)
+    try:
+        paid = check(contract, amm, addresses, args.steps, random.Random(args.seed))
+    except AssertionError as error:
+        print(f"FAIL: {error}", file=sys.stderr)
+        return 1
+    print(f"exit matched sell then withdraw at {args.steps} points ({paid} paid out, the rest reverted on both)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Differential check and micro-benchmark of PRYMUSAMM._sqrt against math.isqrt
+
+    python -m tools.check_sqrt                  # check only
+    python -m tools.check_sqrt --bench          # also time both
+
+Checks every value below 2**16, the neighbours of perfect squares and of
+powers of two across the whole u256 range, the sqrt inputs the curve builds
+for realistic supplies and purchases, and random values of every bit length.
+Exits non-zero on the first mismatch or if the update bound is exceeded.
+"""
+
+import argparse
+import math
+import random
+import sys
+from typing import Iterator
+
+from tools.bench import bench_sqrt, print_table
+from tools.instrument import sqrt_iterations
+from tools.mock_genlayer import deploy, load_contract
+
+U256_MAX = 2**256 - 1
+
+# Newton updates from the bit-length seed (the loop makes one more pass to
+# see that the value stopped decreasing); see PRYMUSAMM._sqrt
+MAX_UPDATES = 8
+
+
+def check_values(rng: random.Random, random_count: int, amm) -> Iterator[int]:
+    yield from range(2**16)
+    yield U256_MAX
+
+    for bits in range(1, 257):
+        power = 1 << bits
+        yield from (power - 1, power, power + 1)
+
+    for _ in range(random_count // 4):
+        root = rng.getrandbits(rng.randint(1, 128))
+        for square in (root * root - 1, root * root, root * root + 1):
+            if 0 <= square <= U256_MAX:
+                yield square
+
+    # What _ethereum_to_tokens asks for, from an empty curve to 10**12 tokens
+    for _ in range(random_count // 4):
+        supply = rng.randint(0, 10**30)
+        ethereum = rng.randint(0, 10**27)
+        price_term = amm.TOKEN_PRICE_INITIAL_SCALED + amm.TOKEN_PRICE_INCREMENTAL * supply
+        yield price_term * price_term + amm.ETH_TERM_FACTOR * ethereum
+
+    for _ in range(random_count // 2):
+        yield rng.getrandbits(rng.randint(1, 256))
+
+
+def check(contract, values) -> tuple[int, int]:
+    """(values checked, most Newton updates taken); raises AssertionError on a mismatch"""
+    checked = 0
+    worst = 0
+    for value in values:
+        expected = math.isqrt(value)
+        result = contract._sqrt(value)
+        assert result == expected, f"_sqrt({value}) = {result}, math.isqrt gives {expected}"
+        worst = max(worst, sqrt_iterations(value) - 1)
+        checked += 1
+    assert worst <= MAX_UPDATES, f"_sqrt took {worst} Newton updates, bound is {MAX_UPDATES}"
+    return checked, worst
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--random", type=int, default=200_000, help="random and curve-shaped values")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--bench", action="store_true", help="also time _sqrt and math.isqrt")
+    args = parser.parse_args(argv)
+
+    amm = load_contract()
+    contract = deploy(amm)
+    try:
+        checked, worst = check(contract, check_values(random.Random(args.seed), args.random, amm))
+    except AssertionError as error:
+        print(f"FAIL: {error}", file=sys.stderr)
+        return 1
+    print(f"{checked} values match math.isqrt, at most {worst} Newton updates")
+
+    if args.bench:
+        print_table(bench_sqrt(contract, args.random, args.seed), None)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
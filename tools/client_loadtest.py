@@ -0,0 +1,162 @@
+"""
+Load test prymus_client against the stand-in node (or any node)
+
+    python -m tools.client_loadtest --duration 10 --concurrency 200
+    python -m tools.client_loadtest --no-batch --no-cache        # sequential-style baseline
+    python -m tools.client_loadtest --url http://host:4000/ --contract 0x..
+
+Without --url a tools.stub_node is started in a subprocess. Every worker
+issues a weighted random mix of view calls back to back for --duration
+seconds; the report gives achieved queries per second, latency
+percentiles and how many calls the batcher, coalescing and the cache
+absorbed.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+from prymus_client import PrymusClient, RpcError
+from tools.stub_node import CONTRACT_ADDRESS
+
+ONE_ETHER = 10**18
+
+# name -> weight; arguments come from _arguments
+VIEW_MIX = {
+    "balance_of": 30,
+    "account_summary": 15,
+    "buy_price": 15,
+    "sell_price": 15,
+    "calculate_tokens_received": 10,
+    "calculate_ethereum_received": 5,
+    "total_supply": 5,
+    "holder_count": 5,
+}
+
+
+def _arguments(name: str, rng: random.Random, addresses: list[str]) -> tuple:
+    if name in ("balance_of", "account_summary"):
+        return (rng.choice(addresses),)
+    if name == "calculate_tokens_received":
+        # A handful of common quote sizes, as a trading front end would ask
+        return (rng.choice((1, 10, 100)) * ONE_ETHER // 100,)
+    if name == "calculate_ethereum_received":
+        return (rng.choice((1, 10, 100)) * ONE_ETHER,)
+    return ()
+
+
+async def _worker(client: PrymusClient, rng: random.Random, addresses: list[str], deadline: float,
+                  latencies: list[float], errors: list[str]):
+    names, weights = list(VIEW_MIX), list(VIEW_MIX.values())
+    while time.monotonic() < deadline:
+        name = rng.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            await getattr(client, name)(*_arguments(name, rng, addresses))
+        except (RpcError, ConnectionError, asyncio.TimeoutError) as error:
+            errors.append(f"{name}: {error}")
+            continue
+        latencies.append(time.perf_counter() - started)
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+async def run(url: str, contract: str, args) -> dict:
+    client = PrymusClient(url, contract, pool_size=args.pool_size, batch_size=args.batch_size,
+                          batch_window=0 if args.no_batch else args.batch_window,
+                          cache_ttl=0 if args.no_cache else args.cache_ttl)
+    addresses = [f"0x{index:040x}" for index in range(1, args.holders + 1)]
+    latencies, errors = [], []
+
+    async with client:
+        started = time.monotonic()
+        deadline = started + args.duration
+        await asyncio.gather(*(_worker(client, random.Random(args.seed * 100003 + index), addresses,
+                                       deadline, latencies, errors)
+                               for index in range(args.concurrency)))
+        elapsed = time.monotonic() - started
+
+    latencies.sort()
+    return {
+        "queries": len(latencies),
+        "qps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(_percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+        "errors": len(errors),
+        "first_error": errors[0] if errors else None,
+        **client.stats,
+        "rpc_requests": client.batcher.requests_sent,
+        "batches": client.batcher.batches_sent,
+        "connections_opened": client.pool.connections_opened,
+    }
+
+
+def _free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+
+def _start_stub(args) -> tuple[subprocess.Popen, str]:
+    port = _free_port()
+    command = [sys.executable, "-m", "tools.stub_node", "--port", str(port), "--holders", str(args.holders),
+               "--seed", str(args.seed), "--churn", str(args.churn), "--latency", str(args.latency)]
+    process = subprocess.Popen(command, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    # Populating the contract takes a while for large holder counts
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"stub node exited with {process.returncode}")
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.5).close()
+            return process, f"http://127.0.0.1:{port}/"
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("stub node did not start listening")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="node to test (default: start tools.stub_node)")
+    parser.add_argument("--contract", default=CONTRACT_ADDRESS)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--holders", type=int, default=1000, help="stub holders; also the addresses queried")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--churn", type=float, default=0.05, help="stub: seconds between random buys")
+    parser.add_argument("--latency", type=float, default=0.002, help="stub: seconds added per HTTP request")
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--batch-window", type=float, default=0.002)
+    parser.add_argument("--cache-ttl", type=float, default=1.0)
+    parser.add_argument("--no-batch", action="store_true", help="one HTTP request per call")
+    parser.add_argument("--no-cache", action="store_true", help="no result cache (coalescing stays on)")
+    args = parser.parse_args(argv)
+
+    process = None
+    url = args.url
+    if url is None:
+        process, url = _start_stub(args)
+    try:
+        report = asyncio.run(run(url, args.contract, args))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    print(json.dumps(report, indent=2))
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
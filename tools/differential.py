@@ -0,0 +1,351 @@
+"""
+Differential testing of PRYMUS_AMM.py against the Solidity Hourglass model
+
+    python -m tools.differential --seeds 200 --transactions 500
+    python -m tools.differential --ops buy,sell --ignore dividends,payout
+    python -m tools.differential --replay minimal.jsonl
+
+Every seed generates a random transaction stream (tools.replay trace
+format) that is applied to a fresh PRYMUSAMM on the mock runtime and to a
+fresh tools.hourglass.Hourglass. After each transaction the runner compares
+whether it reverted, token supply, profit per share and the balance,
+payout, referral bonus and dividends of every address it touched. The
+first difference is shrunk to a minimal trace that still shows a
+difference in the same field, and written out for tools.replay or
+--replay.
+
+Seeds are spread over a process pool. By default both sides run with the
+Solidity constants (--parameters port runs both with the port's), so what
+is reported are differences in semantics rather than configuration.
+"""
+
+import argparse
+import json
+import multiprocessing
+import random
+import sys
+import time
+from typing import NamedTuple
+
+from tools.hourglass import PORT_PARAMETERS, SOLIDITY_PARAMETERS, Hourglass, Revert
+from tools.mock_genlayer import DEFAULT_DEPLOYER, call, deploy, load_contract
+from tools.replay import OPERATIONS, PPM, read_trace, write_trace
+
+# Hourglass parameter -> PRYMUS_AMM.py module constant
+PORT_CONSTANTS = {
+    "dividend_fee": "DIVIDEND_FEE",
+    "initial_token_price": "TOKEN_PRICE_INITIAL",
+    "token_price_increment": "TOKEN_PRICE_INCREMENTAL",
+}
+
+ACCOUNT_FIELDS = ("balance", "payout", "referral_bonus", "dividends")
+GLOBAL_FIELDS = ("reverted", "token_supply", "profit_per_share")
+
+# Failures of the port that a chain would report as a reverted transaction
+PORT_REVERTS = (AssertionError, OverflowError, ZeroDivisionError)
+
+ONE_ETHER = 10**18
+ONE_TOKEN = 10**18
+
+
+class Divergence(NamedTuple):
+    """First point where the port and the model disagree"""
+    index: int
+    field: str
+    address: str
+    port: object
+    model: object
+
+
+# ============== RANDOM STREAMS ==============
+
+def random_trace(rng: random.Random, transactions: int, holders: int, ops: tuple[str, ...] = OPERATIONS) -> list[dict]:
+    """Transactions biased towards the edges: dust, whole balances, self-referral"""
+    addresses = [f"0x{index:040x}" for index in range(1, holders + 1)]
+
+    def value():
+        return rng.choice((
+            rng.randint(0, 100),
+            rng.randint(ONE_ETHER // 1000, ONE_ETHER),
+            rng.randint(ONE_ETHER, 1000 * ONE_ETHER),
+        ))
+
+    def amount(transaction):
+        kind = rng.random()
+        if kind < 0.1:
+            transaction["amount"] = rng.choice((0, 1, 19, 20, ONE_TOKEN))
+        else:
+            transaction["fraction_ppm"] = PPM if kind < 0.3 else rng.randint(1, PPM)
+        return transaction
+
+    trace = []
+    for _ in range(transactions):
+        op = rng.choice(ops)
+        sender = rng.choice(addresses)
+        if op == "buy":
+            referrer = rng.choice(("", sender, rng.choice(addresses)))
+            trace.append({"op": op, "sender": sender, "value": value(), "referrer": referrer})
+        elif op == "sell":
+            trace.append(amount({"op": op, "sender": sender}))
+        elif op == "transfer":
+            trace.append(amount({"op": op, "sender": sender, "to": rng.choice(addresses)}))
+        else:
+            trace.append({"op": op, "sender": sender})
+    return trace
+
+
+# ============== THE TWO SIDES ==============
+
+class _PortSide:
+    """PRYMUSAMM on the mock runtime"""
+
+    def __init__(self, module, parameters: dict):
+        self.contract = deploy(module)
+        call(self.contract, "set_staking_requirement", parameters["minimum_holding_requirement"],
+             sender=DEFAULT_DEPLOYER)
+
+    def apply(self, op: str, sender: str, value: int, args: tuple) -> bool:
+        """Run one transaction; returns whether it reverted"""
+        try:
+            call(self.contract, op, *args, sender=sender, value=value)
+        except PORT_REVERTS:
+            return True
+        return False
+
+    def state(self, address: str) -> tuple:
+        account = self.contract._load_account(address)
+        return (account.balance, account.payout, account.referral_bonus, self.contract._dividends_of(address))
+
+    def totals(self) -> tuple:
+        return (self.contract.token_supply, self.contract.profit_per_share)
+
+
+class _ModelSide:
+    """tools.hourglass.Hourglass"""
+
+    def __init__(self, parameters: dict):
+        self.hourglass = Hourglass(**parameters)
+
+    def apply(self, op: str, sender: str, value: int, args: tuple) -> bool:
+        hourglass = self.hourglass
+        method = {
+            "buy": lambda: hourglass.purchase_tokens(sender, value, *args),
+            "sell": lambda: hourglass.liquidate_tokens(sender, *args),
+            "transfer": lambda: hourglass.transfer(sender, *args),
+            "reinvest": lambda: hourglass.reinvest(sender),
+            "withdraw": lambda: hourglass.withdraw_yield(sender),
+            "exit": lambda: hourglass.liquidate_position(sender),
+        }[op]
+        try:
+            method()
+        except Revert:
+            return True
+        return False
+
+    def state(self, address: str) -> tuple:
+        hourglass = self.hourglass
+        return (hourglass.token_balance_ledger.get(address, 0), hourglass.payouts.get(address, 0),
+                hourglass.referral_balance.get(address, 0), hourglass.dividends_of(address))
+
+    def totals(self) -> tuple:
+        return (self.hourglass.total_token_supply, self.hourglass.profit_per_share)
+
+
+def _arguments(model: Hourglass, transaction: dict) -> tuple:
+    """Call arguments, with fraction_ppm resolved against the (shared) balance"""
+    op = transaction["op"]
+    if op == "buy":
+        return (transaction.get("referrer", ""),)
+    if op not in ("sell", "transfer"):
+        return ()
+
+    amount = transaction.get("amount")
+    if amount is None:
+        amount = model.token_balance_of(transaction["sender"]) * transaction["fraction_ppm"] // PPM
+    return (amount,) if op == "sell" else (transaction["to"], amount)
+
+
+# ============== COMPARISON ==============
+
+class Runner:
+    """Applies traces to both sides and reports the first divergence"""
+
+    def __init__(self, parameters: dict, ignore: frozenset = frozenset()):
+        self.parameters = parameters
+        self.ignore = ignore
+        constants = {PORT_CONSTANTS[name]: value for name, value in parameters.items() if name in PORT_CONSTANTS}
+        self.module = load_contract(constants=constants)
+
+    def first_divergence(self, trace: list[dict]) -> Divergence | None:
+        port = _PortSide(self.module, self.parameters)
+        model = _ModelSide(self.parameters)
+
+        for index, transaction in enumerate(trace):
+            op, sender = transaction["op"], transaction["sender"]
+            args = _arguments(model.hourglass, transaction)
+            value = transaction.get("value", 0)
+
+            port_reverted = port.apply(op, sender, value, args)
+            model_reverted = model.apply(op, sender, value, args)
+            if port_reverted != model_reverted and "reverted" not in self.ignore:
+                return Divergence(index, "reverted", sender, port_reverted, model_reverted)
+
+            for field, port_value, model_value in zip(GLOBAL_FIELDS[1:], port.totals(), model.totals()):
+                if port_value != model_value and field not in self.ignore:
+                    return Divergence(index, field, "", port_value, model_value)
+
+            touched = {sender, transaction.get("to", ""), transaction.get("referrer", "")} - {""}
+            for address in sorted(touched):
+                for field, port_value, model_value in zip(ACCOUNT_FIELDS, port.state(address), model.state(address)):
+                    if port_value != model_value and field not in self.ignore:
+                        return Divergence(index, field, address, port_value, model_value)
+
+        return None
+
+    # ============== SHRINKING ==============
+
+    def shrink(self, trace: list[dict], divergence: Divergence) -> tuple[list[dict], Divergence]:
+        """Smallest trace found that still diverges in divergence.field"""
+        field = divergence.field
+
+        def diverges(candidate):
+            found = self.first_divergence(candidate)
+            return found if found is not None and found.field == field else None
+
+        # Nothing after the first divergence matters
+        trace = trace[: divergence.index + 1]
+
+        # Remove chunks of transactions, halving the chunk size down to one
+        chunk = max(1, len(trace) // 2)
+        while True:
+            start = 0
+            while start < len(trace):
+                candidate = trace[:start] + trace[start + chunk:]
+                found = diverges(candidate) if candidate else None
+                if found is not None:
+                    trace, divergence = candidate[: found.index + 1], found
+                else:
+                    start += chunk
+            if chunk == 1:
+                break
+            chunk //= 2
+
+        # Simplify what is left, one transaction at a time
+        for index in range(len(trace)):
+            for simpler in _simplifications(trace[index]):
+                candidate = trace[:index] + [simpler] + trace[index + 1:]
+                found = diverges(candidate)
+                if found is not None:
+                    trace, divergence = candidate, found
+                    break
+
+        return trace, divergence
+
+
+def _simplifications(transaction: dict) -> list[dict]:
+    """Simpler variants of one transaction, simplest first"""
+    variants = []
+    if transaction.get("referrer"):
+        variants.append({**transaction, "referrer": ""})
+    if transaction.get("value", 0) > 1:
+        for value in (ONE_ETHER, transaction["value"] // 2):
+            if value < transaction["value"]:
+                variants.append({**transaction, "value": value})
+    if transaction.get("fraction_ppm", PPM) != PPM:
+        variants.append({**transaction, "fraction_ppm": PPM})
+    if transaction.get("amount", 0) > 1:
+        variants.append({**transaction, "amount": transaction["amount"] // 2})
+    return variants
+
+
+# ============== SEEDS ==============
+
+_runner = None
+
+
+def _init_worker(parameters: dict, ignore: frozenset):
+    global _runner
+    _runner = Runner(parameters, ignore)
+
+
+def check_seed(job: tuple[int, int, int, tuple[str, ...]]) -> dict:
+    """Run one random stream; shrinks and reports any divergence"""
+    seed, transactions, holders, ops = job
+    trace = random_trace(random.Random(seed), transactions, holders, ops)
+    start = time.perf_counter()
+    divergence = _runner.first_divergence(trace)
+
+    report = {"seed": seed, "transactions": transactions if divergence is None else divergence.index + 1,
+              "seconds": time.perf_counter() - start}
+    if divergence is not None:
+        minimal, minimal_divergence = _runner.shrink(trace, divergence)
+        report["divergence"] = minimal_divergence._asdict()
+        report["trace"] = minimal
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seeds", type=int, default=100)
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--transactions", type=int, default=200, help="transactions per seed")
+    parser.add_argument("--holders", type=int, default=6, help="distinct addresses per seed")
+    parser.add_argument("--ops", default=",".join(OPERATIONS), help="operations to generate")
+    parser.add_argument("--ignore", default="", help=f"fields not to compare: {', '.join(GLOBAL_FIELDS + ACCOUNT_FIELDS)}")
+    parser.add_argument("--parameters", choices=("solidity", "port"), default="solidity")
+    parser.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--output", default="divergence.jsonl", help="where to write the first minimal trace")
+    parser.add_argument("--replay", metavar="TRACE", help="check one trace file instead of random seeds")
+    args = parser.parse_args(argv)
+
+    parameters = dict(SOLIDITY_PARAMETERS if args.parameters == "solidity" else PORT_PARAMETERS)
+    ignore = frozenset(field for field in args.ignore.split(",") if field)
+    unknown = ignore - set(GLOBAL_FIELDS + ACCOUNT_FIELDS)
+    if unknown:
+        parser.error(f"unknown fields {sorted(unknown)}")
+
+    if args.replay:
+        divergence = Runner(parameters, ignore).first_divergence(list(read_trace(args.replay)))
+        print(json.dumps(divergence._asdict() if divergence else None, default=str))
+        return 0 if divergence is None else 1
+
+    ops = tuple(args.ops.split(","))
+    jobs = [(seed, args.transactions, args.holders, ops)
+            for seed in range(args.first_seed, args.first_seed + args.seeds)]
+
+    start = time.perf_counter()
+    applied = 0
+    busy = 0.0
+    failures = []
+    with multiprocessing.Pool(args.processes, _init_worker, (parameters, ignore)) as pool:
+        for report in pool.imap_unordered(check_seed, jobs):
+            applied += report["transactions"]
+            busy += report["seconds"]
+            if "divergence" in report:
+                failures.append(report)
+    elapsed = time.perf_counter() - start
+
+    # Throughput of the comparison itself; shrinking is not counted
+    print(f"{len(jobs)} seeds, {applied} transactions on both sides in {elapsed:.1f}s "
+          f"({applied / busy:.0f} tx/s per process), {len(failures)} diverged")
+
+    if not failures:
+        return 0
+
+    by_field = {}
+    for report in sorted(failures, key=lambda report: len(report["trace"])):
+        by_field.setdefault(report["divergence"]["field"], report)
+    for field, report in sorted(by_field.items()):
+        divergence = report["divergence"]
+        print(f"  {field}: seed {report['seed']}, minimal trace of {len(report['trace'])} at step "
+              f"{divergence['index']} ({report['trace'][divergence['index']]['op']}): "
+              f"port {divergence['port']} vs model {divergence['model']}")
+
+    smallest = min(failures, key=lambda report: len(report["trace"]))
+    write_trace(args.output, smallest["trace"])
+    print(f"smallest minimal trace (seed {smallest['seed']}) written to {args.output}")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""
+Regenerate prymus_client/_methods.py from the public methods of PRYMUS_AMM.py
+
+    python -m tools.generate_client            # rewrite the table
+    python -m tools.generate_client --check    # fail if it is out of date
+
+Reads the contract source with ast, so it needs neither genlayer nor the
+mock runtime. Run it whenever a public method is added or changes its
+signature.
+"""
+
+import argparse
+import ast
+import os
+import pprint
+import sys
+
+from tools.mock_genlayer import CONTRACT_PATH
+
+METHODS_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "prymus_client", "_methods.py")
+
+DECORATOR_KINDS = {
+    "gl.public.view": "view",
+    "gl.public.write": "write",
+    "gl.public.write.payable": "payable",
+}
+
+HEADER = '''"""
+Public methods of PRYMUSAMM: name -> (kind, parameters, summary)
+kind is "view", "write" or "payable"; parameters are (name, annotation,
+default) with default NO_DEFAULT when the argument is required
+
+Generated by tools/generate_client.py from PRYMUS_AMM.py; do not edit
+"""
+
+NO_DEFAULT = "<required>"
+
+'''
+
+
+def public_methods(path: str = CONTRACT_PATH) -> dict:
+    """Name -> (kind, parameters, summary) for every public method in a contract file"""
+    with open(path) as source_file:
+        tree = ast.parse(source_file.read(), path)
+
+    methods = {}
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.FunctionDef):
+            continue
+        kinds = [DECORATOR_KINDS[ast.unparse(decorator)] for decorator in node.decorator_list
+                 if ast.unparse(decorator) in DECORATOR_KINDS]
+        if not kinds:
+            continue
+
+        arguments = node.args.args[1:]  # self
+        defaults = [None] * (len(arguments) - len(node.args.defaults)) + node.args.defaults
+        parameters = tuple(
+            (argument.arg, ast.unparse(argument.annotation) if argument.annotation else "",
+             ast.literal_eval(default) if default is not None else "<required>")
+            for argument, default in zip(arguments, defaults))
+
+        docstring = ast.get_docstring(node) or ""
+        summary = docstring.strip().splitlines()[0] if docstring.strip() else ""
+        methods[node.name] = (kinds[0], parameters, summary)
+
+    return dict(sorted(methods.items()))
+
+
+def render(methods: dict) -> str:
+    table = pprint.pformat(methods, width=110, sort_dicts=False)
+    return HEADER + "METHODS = " + table.replace("'<required>'", "NO_DEFAULT") + "\n"
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="only report whether the table is current")
+    args = parser.parse_args(argv)
+
+    source = render(public_methods())
+    current = open(METHODS_PATH).read() if os.path.exists(METHODS_PATH) else ""
+
+    if args.check:
+        if source != current:
+            print(f"{METHODS_PATH} is out of date; run python -m tools.generate_client", file=sys.stderr)
+            return 1
+        return 0
+
+    with open(METHODS_PATH, "w") as methods_file:
+        methods_file.write(source)
+    print(f"wrote {METHODS_PATH}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+"""
+Exact-integer model of the Hourglass contract in GenLayerAMM_Test.sol
+
+Reproduces the Solidity 0.4 semantics PRYMUS_AMM.py was ported from:
+unchecked uint256 / int256 arithmetic that wraps, SafeMath asserts that
+revert, the (uint) / (int) casts in the dividend tracker, and whole-call
+rollback on revert. Every public entry point takes the sender explicitly:
+
+    hourglass = Hourglass()
+    hourglass.purchase_tokens("0xabc", 10**18, referred_by="")
+    hourglass.liquidate_tokens("0xabc", 10**18)
+    hourglass.dividends_of("0xabc")
+
+The empty string stands for address(0). Parameters default to the Solidity
+constants, which are not the port's (see PORT_PARAMETERS).
+"""
+
+from math import isqrt
+
+UINT256 = 2**256
+UINT256_MASK = UINT256 - 1
+INT256_MIN = -(2**255)
+INT256_MAX = 2**255 - 1
+
+ONE_TOKEN = 10**18
+
+ZERO_ADDRESS = ""
+
+# Constants of GenLayerAMM_Test.sol and of PRYMUS_AMM.py, by Hourglass parameter
+SOLIDITY_PARAMETERS = {
+    "dividend_fee": 20,
+    "initial_token_price": 10**9,
+    "token_price_increment": 10**8,
+    "minimum_holding_requirement": 10 * ONE_TOKEN,
+}
+PORT_PARAMETERS = {
+    "dividend_fee": 20,
+    "initial_token_price": 100000000000,
+    "token_price_increment": 10000000,
+    "minimum_holding_requirement": 100 * ONE_TOKEN,
+}
+
+
+class Revert(Exception):
+    """A require, assert or failed transfer; the call has been rolled back"""
+
+
+# ============== SOLIDITY ARITHMETIC ==============
+
+def _uint(value: int) -> int:
+    """Wrap to uint256, like unchecked Solidity 0.4 arithmetic"""
+    return value & UINT256_MASK
+
+
+def _int(value: int) -> int:
+    """Reinterpret as int256, like (int256) casts and int256 arithmetic"""
+    value &= UINT256_MASK
+    return value - UINT256 if value > INT256_MAX else value
+
+
+def _div(a: int, b: int) -> int:
+    if b == 0:
+        raise Revert("division by zero")
+    return a // b
+
+
+def _safe_sub(a: int, b: int) -> int:
+    if b > a:
+        raise Revert("SafeMath.sub")
+    return a - b
+
+
+def _safe_add(a: int, b: int) -> int:
+    c = _uint(a + b)
+    if c < a:
+        raise Revert("SafeMath.add")
+    return c
+
+
+def _sqrt(x: int) -> int:
+    """
+    Hourglass._sqrt: the Babylonian loop from (x + 1) / 2 lands on isqrt(x)
+    for every uint256 except the largest, where x + 1 wraps to zero
+    """
+    if x == UINT256_MASK:
+        raise Revert("division by zero")
+    return isqrt(x)
+
+
+# ============== CONTRACT ==============
+
+class Hourglass:
+    """State and entry points of one deployed Hourglass"""
+
+    def __init__(self, dividend_fee: int = SOLIDITY_PARAMETERS["dividend_fee"],
+                 initial_token_price: int = SOLIDITY_PARAMETERS["initial_token_price"],
+                 token_price_increment: int = SOLIDITY_PARAMETERS["token_price_increment"],
+                 minimum_holding_requirement: int = SOLIDITY_PARAMETERS["minimum_holding_requirement"]):
+        self.dividend_fee = dividend_fee
+        self.initial_token_price = initial_token_price
+        self.token_price_increment = token_price_increment
+        self.minimum_holding_requirement = minimum_holding_requirement
+        self.magnitude = 2**64
+
+        self.token_balance_ledger = {}
+        self.referral_balance = {}
+        self.payouts = {}
+        self.total_token_supply = 0
+        self.profit_per_share = 0
+        self.early_access_phase = False
+
+        # ETH held by the contract; withdrawals beyond it revert like transfer()
+        self.contract_balance = 0
+
+        self._journal = None
+
+    # ============== TRANSACTIONS ==============
+
+    def _set(self, mapping: dict, key: str, value: int):
+        self._journal.append((mapping, key, mapping.get(key, 0)))
+        mapping[key] = value
+
+    def _run(self, method, *args):
+        """Run one external call; undo everything it wrote if it reverts"""
+        scalars = (self.total_token_supply, self.profit_per_share, self.contract_balance)
+        self._journal = []
+        try:
+            return method(*args)
+        except Revert:
+            for mapping, key, old in reversed(self._journal):
+                mapping[key] = old
+            self.total_token_supply, self.profit_per_share, self.contract_balance = scalars
+            raise
+        finally:
+            self._journal = None
+
+    # ============== ENTRY POINTS ==============
+
+    def purchase_tokens(self, sender: str, value: int, referred_by: str = ZERO_ADDRESS) -> int:
+        """purchaseTokens(_referredBy) with msg.value = value"""
+        def purchase():
+            self.contract_balance += value
+            return self._process_token_purchase(sender, value, referred_by)
+        return self._run(purchase)
+
+    def reinvest(self, sender: str) -> int:
+        """reinvest(); returns the tokens minted"""
+        return self._run(self._reinvest, sender)
+
+    def withdraw_yield(self, sender: str) -> int:
+        """withdrawYield(); returns the ETH sent"""
+        return self._run(self._withdraw_yield, sender)
+
+    def liquidate_tokens(self, sender: str, token_amount: int) -> int:
+        """liquidateTokens(_tokenAmount); returns the taxed ETH credited"""
+        return self._run(self._liquidate_tokens, sender, token_amount)
+
+    def liquidate_position(self, sender: str) -> int:
+        """liquidatePosition(); returns the ETH sent"""
+        def liquidate():
+            token_amount = self.token_balance_ledger.get(sender, 0)
+            if token_amount > 0:
+                self._liquidate_tokens(sender, token_amount)
+            return self._withdraw_yield(sender)
+        return self._run(liquidate)
+
+    def transfer(self, sender: str, recipient: str, token_amount: int) -> bool:
+        """transfer(_recipient, _tokenAmount)"""
+        return self._run(self._transfer, sender, recipient, token_amount)
+
+    # ============== VIEWS ==============
+
+    def token_balance_of(self, address: str) -> int:
+        return self.token_balance_ledger.get(address, 0)
+
+    def dividends_of(self, address: str) -> int:
+        """(uint256)((int256)(profitPerShare * balance) - payouts) / magnitude"""
+        profit = _int(self.profit_per_share * self.token_balance_ledger.get(address, 0))
+        return _uint(profit - self.payouts.get(address, 0)) // self.magnitude
+
+    def my_dividends(self, sender: str, include_referral_bonus: bool) -> int:
+        dividends = self.dividends_of(sender)
+        if include_referral_bonus:
+            dividends = _uint(dividends + self.referral_balance.get(sender, 0))
+        return dividends
+
+    def current_sell_price(self) -> int:
+        if self.total_token_supply == 0:
+            return self.initial_token_price - self.token_price_increment
+        ethereum = self._tokens_to_ethereum(ONE_TOKEN)
+        return _safe_sub(ethereum, ethereum // self.dividend_fee)
+
+    def current_buy_price(self) -> int:
+        if self.total_token_supply == 0:
+            return self.initial_token_price + self.token_price_increment
+        ethereum = self._tokens_to_ethereum(ONE_TOKEN)
+        return _safe_add(ethereum, ethereum // self.dividend_fee)
+
+    def calculate_tokens_received(self, investment_amount: int) -> int:
+        return self._ethereum_to_tokens(_safe_sub(investment_amount, investment_amount // self.dividend_fee))
+
+    def calculate_ethereum_received(self, token_amount: int) -> int:
+        if token_amount > self.total_token_supply:
+            raise Revert("require")
+        ethereum = self._tokens_to_ethereum(token_amount)
+        return _safe_sub(ethereum, ethereum // self.dividend_fee)
+
+    # ============== FUNCTION BODIES ==============
+
+    def _reinvest(self, sender: str) -> int:
+        if self.my_dividends(sender, True) == 0:
+            raise Revert("onlyProfitEligible")
+
+        dividends = self.dividends_of(sender)
+        self._set(self.payouts, sender, _int(self.payouts.get(sender, 0) + _int(dividends * self.magnitude)))
+
+        dividends = _uint(dividends + self.referral_balance.get(sender, 0))
+        self._set(self.referral_balance, sender, 0)
+
+        return self._process_token_purchase(sender, dividends, ZERO_ADDRESS)
+
+    def _withdraw_yield(self, sender: str) -> int:
+        if self.my_dividends(sender, True) == 0:
+            raise Revert("onlyProfitEligible")
+
+        dividends = self.dividends_of(sender)
+        self._set(self.payouts, sender, _int(self.payouts.get(sender, 0) + _int(dividends * self.magnitude)))
+
+        dividends = _uint(dividends + self.referral_balance.get(sender, 0))
+        self._set(self.referral_balance, sender, 0)
+
+        if dividends > self.contract_balance:
+            raise Revert("transfer")
+        self.contract_balance -= dividends
+        return dividends
+
+    def _liquidate_tokens(self, sender: str, token_amount: int) -> int:
+        balance = self.token_balance_ledger.get(sender, 0)
+        if balance == 0:
+            raise Revert("onlyTokenHolders")
+        if token_amount > balance:
+            raise Revert("require")
+
+        ethereum = self._tokens_to_ethereum(token_amount)
+        dividends = ethereum // self.dividend_fee
+        taxed_ethereum = _safe_sub(ethereum, dividends)
+
+        self.total_token_supply = _safe_sub(self.total_token_supply, token_amount)
+        self._set(self.token_balance_ledger, sender, _safe_sub(balance, token_amount))
+
+        updated_payouts = _int(self.profit_per_share * token_amount + taxed_ethereum * self.magnitude)
+        self._set(self.payouts, sender, _int(self.payouts.get(sender, 0) - updated_payouts))
+
+        if self.total_token_supply > 0:
+            self.profit_per_share = _safe_add(
+                self.profit_per_share, _uint(dividends * self.magnitude) // self.total_token_supply)
+
+        return taxed_ethereum
+
+    def _transfer(self, sender: str, recipient: str, token_amount: int) -> bool:
+        if self.token_balance_ledger.get(sender, 0) == 0:
+            raise Revert("onlyTokenHolders")
+        if self.early_access_phase or token_amount > self.token_balance_ledger.get(sender, 0):
+            raise Revert("require")
+
+        if self.my_dividends(sender, True) > 0:
+            self._withdraw_yield(sender)
+
+        transfer_fee = token_amount // self.dividend_fee
+        taxed_tokens = _safe_sub(token_amount, transfer_fee)
+        dividends = self._tokens_to_ethereum(transfer_fee)
+
+        self.total_token_supply = _safe_sub(self.total_token_supply, transfer_fee)
+
+        ledger = self.token_balance_ledger
+        self._set(ledger, sender, _safe_sub(ledger.get(sender, 0), token_amount))
+        self._set(ledger, recipient, _safe_add(ledger.get(recipient, 0), taxed_tokens))
+
+        payouts = self.payouts
+        self._set(payouts, sender, _int(payouts.get(sender, 0) - _int(self.profit_per_share * token_amount)))
+        self._set(payouts, recipient, _int(payouts.get(recipient, 0) + _int(self.profit_per_share * taxed_tokens)))
+
+        self.profit_per_share = _safe_add(
+            self.profit_per_share, _div(_uint(dividends * self.magnitude), self.total_token_supply))
+
+        return True
+
+    def _process_token_purchase(self, sender: str, investment_amount: int, referred_by: str) -> int:
+        magnitude = self.magnitude
+        undivided_dividends = investment_amount // self.dividend_fee
+        referral_bonus = undivided_dividends // 3
+        dividends = _safe_sub(undivided_dividends, referral_bonus)
+        taxed_ethereum = _safe_sub(investment_amount, undivided_dividends)
+        tokens = self._ethereum_to_tokens(taxed_ethereum)
+        fee = _uint(dividends * magnitude)
+
+        supply = self.total_token_supply
+        if not (tokens > 0 and _safe_add(tokens, supply) > supply):
+            raise Revert("require")
+
+        if (referred_by != ZERO_ADDRESS and referred_by != sender
+                and self.token_balance_ledger.get(referred_by, 0) >= self.minimum_holding_requirement):
+            self._set(self.referral_balance, referred_by,
+                      _safe_add(self.referral_balance.get(referred_by, 0), referral_bonus))
+        else:
+            dividends = _safe_add(dividends, referral_bonus)
+            fee = _uint(dividends * magnitude)
+
+        if supply > 0:
+            self.total_token_supply = _safe_add(supply, tokens)
+            share = _uint(dividends * magnitude) // self.total_token_supply
+            self.profit_per_share = _uint(self.profit_per_share + share)
+            fee = _uint(fee - _uint(fee - _uint(tokens * share)))
+        else:
+            self.total_token_supply = tokens
+
+        self._set(self.token_balance_ledger, sender, _safe_add(self.token_balance_ledger.get(sender, 0), tokens))
+
+        updated_payouts = _int(self.profit_per_share * tokens - fee)
+        self._set(self.payouts, sender, _int(self.payouts.get(sender, 0) + updated_payouts))
+
+        return tokens
+
+    # ============== CURVE ==============
+
+    def _ethereum_to_tokens(self, ethereum: int) -> int:
+        increment = self.token_price_increment
+        supply = self.total_token_supply
+        scaled_initial_price = _uint(self.initial_token_price * ONE_TOKEN)
+
+        radicand = _uint(
+            _uint(scaled_initial_price ** 2)
+            + _uint(2 * _uint(increment * ONE_TOKEN) * _uint(ethereum * ONE_TOKEN))
+            + _uint(_uint(increment ** 2) * _uint(supply ** 2))
+            + _uint(2 * increment * scaled_initial_price * supply)
+        )
+        tokens_received = _safe_sub(_sqrt(radicand), scaled_initial_price) // increment
+        return _uint(tokens_received - supply)
+
+    def _tokens_to_ethereum(self, tokens: int) -> int:
+        increment = self.token_price_increment
+        adjusted_tokens = _uint(tokens + ONE_TOKEN)
+        adjusted_supply = _uint(self.total_token_supply + ONE_TOKEN)
+
+        price = _uint(_uint(self.initial_token_price + _uint(increment * (adjusted_supply // ONE_TOKEN))) - increment)
+        gross = _uint(price * _uint(adjusted_tokens - ONE_TOKEN))
+        curvature = _uint(increment * (_uint(_uint(adjusted_tokens ** 2) - adjusted_tokens) // ONE_TOKEN)) // 2
+        return _safe_sub(gross, curvature) // ONE_TOKEN
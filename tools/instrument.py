@@ -0,0 +1,396 @@
+"""
+Storage-access and hot-path instrumentation for PRYMUSAMM on the mock runtime
+
+    contract, addresses = build_scenario(...)
+    profiler = Instrumentation(contract)
+    result, report = profiler.call("transfer", to, amount, sender=holder)
+    profiler.cumulative()        # per-method totals so far
+    profiler.hook = print        # called with every per-transaction report
+
+    python -m tools.instrument   # one report per public method
+
+Attaching swaps the contract and its storage containers onto counting
+subclasses, and every stored integer onto CountingInt, so nothing is
+counted (or slowed down) unless a contract is instrumented. A report
+holds, for one call:
+
+    storage        {field: {"reads": n, "writes": n}}; in-place updates of a
+                   stored record count as writes to "field[].attribute"
+    curve_calls    {method: n} for the bonding-curve helpers
+    sqrt_iterations  Newton steps taken inside _sqrt
+    bigint_ops     {operator: n} on storage-derived integers, plus "wide"
+                   for results wider than 64 bits
+"""
+
+import argparse
+import operator
+import sys
+from collections import Counter, defaultdict
+
+from tools.bench import BENCHMARKS, SCENARIOS, build_scenario
+from tools.mock_genlayer import _DynArray, _TreeMap, load_contract, message, transaction
+
+CURVE_METHODS = (
+    "_ethereum_to_tokens",
+    "_ethereum_for_tokens",
+    "_tokens_to_ethereum",
+    "_current_prices",
+    "_sqrt",
+)
+
+_report = None  # report of the call being instrumented, if any
+
+
+class _Rollback(Exception):
+    """Raised to undo the state changes of one reported call"""
+
+
+# ============== REPORTS ==============
+
+class Report:
+    """Counters for one instrumented call"""
+
+    def __init__(self, method: str):
+        self.method = method
+        self.reads = Counter()
+        self.writes = Counter()
+        self.curve_calls = Counter()
+        self.sqrt_iterations = 0
+        self.bigint_ops = Counter()
+        self.reverted = False
+
+    def as_dict(self) -> dict:
+        fields = sorted(set(self.reads) | set(self.writes))
+        return {
+            "method": self.method,
+            "reverted": self.reverted,
+            "storage": {field: {"reads": self.reads[field], "writes": self.writes[field]} for field in fields},
+            "curve_calls": dict(self.curve_calls),
+            "sqrt_iterations": self.sqrt_iterations,
+            "bigint_ops": dict(self.bigint_ops),
+        }
+
+
+def _count_read(field):
+    if _report is not None:
+        _report.reads[field] += 1
+
+
+def _count_write(field):
+    if _report is not None:
+        _report.writes[field] += 1
+
+
+# ============== COUNTING INTEGERS ==============
+
+class CountingInt(int):
+    """int that counts the arithmetic done on it and keeps results counted"""
+
+    __slots__ = ()
+
+
+def _counted(name, op):
+    def method(self, other):
+        result = op(int(self), other if type(other) is int else int(other))
+        if _report is not None:
+            _report.bigint_ops[name] += 1
+            if result.bit_length() > 64:
+                _report.bigint_ops["wide"] += 1
+        return CountingInt(result)
+
+    def reflected(self, other):
+        return method.__get__(CountingInt(other))(self)
+
+    return method, reflected
+
+
+for _name, _op in (("add", operator.add), ("sub", operator.sub), ("mul", operator.mul),
+                   ("floordiv", operator.floordiv), ("mod", operator.mod), ("pow", operator.pow),
+                   ("lshift", operator.lshift), ("rshift", operator.rshift),
+                   ("and", operator.and_), ("or", operator.or_)):
+    _forward, _reflected = _counted(_name, _op)
+    setattr(CountingInt, f"__{_name}__", _forward)
+    setattr(CountingInt, f"__r{_name}__", _reflected)
+
+CountingInt.__neg__ = lambda self: CountingInt(-int(self))
+CountingInt.__pos__ = lambda self: self
+CountingInt.__abs__ = lambda self: CountingInt(abs(int(self)))
+
+
+def _wrap(value):
+    """Counting version of a stored value (ints and records, recursively)"""
+    if type(value) is int:
+        return CountingInt(value)
+    if hasattr(value, "__dataclass_fields__"):
+        for name in value.__dataclass_fields__:
+            field_value = value.__dict__[name]
+            if type(field_value) is int:
+                value.__dict__[name] = CountingInt(field_value)
+    return value
+
+
+# ============== COUNTING STORAGE ==============
+
+_FIELD_MARK = "_instrumented_field"
+
+
+def _mark_stored(value, field):
+    """Tag a record held in storage so in-place updates count against field"""
+    if hasattr(value, "__dataclass_fields__"):
+        value.__dict__[_FIELD_MARK] = field
+
+
+class _CountingTreeMap(_TreeMap):
+
+    def __getitem__(self, key):
+        _count_read(self._field)
+        return dict.__getitem__(self, key)
+
+    def get(self, key, default=None):
+        _count_read(self._field)
+        return dict.get(self, key, default)
+
+    def __contains__(self, key):
+        _count_read(self._field)
+        return dict.__contains__(self, key)
+
+    def __setitem__(self, key, value):
+        _count_write(self._field)
+        value = _wrap(value)
+        _mark_stored(value, self._field)
+        _TreeMap.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        _count_write(self._field)
+        _TreeMap.__delitem__(self, key)
+
+
+class _CountingDynArray(_DynArray):
+
+    def __getitem__(self, index):
+        _count_read(self._field)
+        return list.__getitem__(self, index)
+
+    def __len__(self):
+        _count_read(self._field)
+        return list.__len__(self)
+
+    def __setitem__(self, index, value):
+        _count_write(self._field)
+        value = _wrap(value)
+        _mark_stored(value, self._field)
+        _DynArray.__setitem__(self, index, value)
+
+    def append(self, value):
+        _count_write(self._field)
+        value = _wrap(value)
+        _mark_stored(value, self._field)
+        _DynArray.append(self, value)
+
+    def pop(self, index=-1):
+        _count_write(self._field)
+        value = _DynArray.pop(self, index)
+        return value
+
+
+def _counting_record_setattr(original):
+    def __setattr__(self, name, value):
+        field = self.__dict__.get(_FIELD_MARK)
+        if field is not None:
+            _count_write(f"{field}[].{name}")
+            value = _wrap(value)
+        original(self, name, value)
+    return __setattr__
+
+
+# ============== INSTRUMENTATION ==============
+
+def sqrt_iterations(x: int) -> int:
+    """Newton steps PRYMUSAMM._sqrt takes for x (same seed and stop rule)"""
+    if x == 0:
+        return 0
+    x = int(x)
+    y = 1 << ((x.bit_length() + 1) // 2)
+    steps = 0
+    while True:
+        steps += 1
+        z = (y + x // y) // 2
+        if z >= y:
+            return steps
+        y = z
+
+
+def _instrumented_class(cls: type) -> type:
+    """Subclass of a contract class that counts field access and curve calls"""
+    storage_fields = frozenset(cls.__annotations__)
+
+    def __getattribute__(self, name):
+        if name in storage_fields:
+            value = object.__getattribute__(self, "__dict__")[name]
+            if isinstance(value, (_TreeMap, _DynArray)):
+                return value
+            _count_read(name)
+            return value
+        return object.__getattribute__(self, name)
+
+    def __setattr__(self, name, value):
+        if name in storage_fields:
+            _count_write(name)
+            value = _wrap(value)
+        cls.__setattr__(self, name, value)
+
+    namespace = {"__getattribute__": __getattribute__, "__setattr__": __setattr__}
+
+    for method_name in CURVE_METHODS:
+        original = getattr(cls, method_name, None)
+        if original is None:
+            continue
+
+        def counted(self, *args, _name=method_name, _original=original):
+            if _report is not None:
+                _report.curve_calls[_name] += 1
+                if _name == "_sqrt":
+                    _report.sqrt_iterations += sqrt_iterations(args[0])
+            return _original(self, *args)
+
+        namespace[method_name] = counted
+
+    return type(f"Instrumented{cls.__name__}", (cls,), namespace)
+
+
+class Instrumentation:
+    """Opt-in counters for one deployed contract on the mock runtime"""
+
+    def __init__(self, contract, hook=None):
+        self.contract = contract
+        self.hook = hook
+        self._totals = defaultdict(Counter)
+        self._calls = Counter()
+        self._original_class = type(contract)
+
+        contract.__class__ = _instrumented_class(self._original_class)
+        self._patched_records = {}
+        for name in self._original_class.__annotations__:
+            value = contract.__dict__.get(name)
+            if isinstance(value, _TreeMap):
+                self._attach_container(value, name, _CountingTreeMap, value.values())
+            elif isinstance(value, _DynArray):
+                self._attach_container(value, name, _CountingDynArray, list.__iter__(value))
+            elif type(value) is int:
+                contract.__dict__[name] = CountingInt(value)
+
+    def _attach_container(self, container, field, counting_class, values):
+        container.__class__ = counting_class
+        container._field = field
+        for value in values:
+            _wrap(value)
+            _mark_stored(value, field)
+            record_class = type(value)
+            if hasattr(value, "__dataclass_fields__") and record_class not in self._patched_records:
+                self._patched_records[record_class] = record_class.__setattr__
+                record_class.__setattr__ = _counting_record_setattr(record_class.__setattr__)
+
+    def call(self, method: str, *args, sender: str, value: int = 0):
+        """Run one public method as a transaction; returns (result, report)"""
+        global _report
+        report = Report(method)
+        args = tuple(_wrap(arg) for arg in args)
+
+        _report = report
+        result = None
+        try:
+            with message(sender, _wrap(value)), transaction():
+                result = getattr(self.contract, method)(*args)
+        except AssertionError:
+            report.reverted = True
+        finally:
+            _report = None
+
+        self._accumulate(report)
+        if self.hook is not None:
+            self.hook(report.as_dict())
+        return result, report.as_dict()
+
+    def _accumulate(self, report: Report):
+        totals = self._totals[report.method]
+        self._calls[report.method] += 1
+        for field, count in report.reads.items():
+            totals[f"reads:{field}"] += count
+        for field, count in report.writes.items():
+            totals[f"writes:{field}"] += count
+        for name, count in report.curve_calls.items():
+            totals[f"calls:{name}"] += count
+        for name, count in report.bigint_ops.items():
+            totals[f"bigint:{name}"] += count
+        totals["sqrt_iterations"] += report.sqrt_iterations
+        totals["reverted"] += report.reverted
+
+    def cumulative(self) -> dict:
+        """{method: {"calls": n, counter: total}} over every call so far"""
+        return {method: {"calls": self._calls[method], **dict(totals)}
+                for method, totals in self._totals.items()}
+
+    def detach(self):
+        """Restore the contract to its uninstrumented classes"""
+        self.contract.__class__ = self._original_class
+        for name in self._original_class.__annotations__:
+            value = self.contract.__dict__.get(name)
+            if isinstance(value, _CountingTreeMap):
+                value.__class__ = _TreeMap
+            elif isinstance(value, _CountingDynArray):
+                value.__class__ = _DynArray
+        for record_class, original in self._patched_records.items():
+            record_class.__setattr__ = original
+
+
+# ============== COMMAND LINE ==============
+
+def _format_report(report: dict) -> str:
+    storage = report["storage"]
+    reads = sum(counts["reads"] for counts in storage.values())
+    writes = sum(counts["writes"] for counts in storage.values())
+    lines = [f"{report['method']}{' (reverted)' if report['reverted'] else ''}: "
+             f"{reads} reads, {writes} writes, "
+             f"{sum(report['curve_calls'].values())} curve calls, "
+             f"{report['sqrt_iterations']} sqrt iterations, "
+             f"{sum(count for name, count in report['bigint_ops'].items() if name != 'wide')} big-int ops "
+             f"({report['bigint_ops'].get('wide', 0)} wide)"]
+    for field, counts in storage.items():
+        lines.append(f"    {field:34} reads {counts['reads']:5d}  writes {counts['writes']:5d}")
+    if report["curve_calls"]:
+        lines.append("    curve: " + ", ".join(f"{name} x{count}" for name, count in report["curve_calls"].items()))
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Per-method storage and hot-path report for PRYMUSAMM")
+    parser.add_argument("--scenario", default="small", choices=sorted(SCENARIOS))
+    parser.add_argument("--holders", type=int, help="override the scenario's holder count")
+    parser.add_argument("--only", default="", help="only methods whose name contains this")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args(argv)
+
+    config = dict(SCENARIOS[args.scenario])
+    if args.holders:
+        config["holders"] = args.holders
+    contract, addresses = build_scenario(load_contract(), seed=args.seed, **config)
+    profiler = Instrumentation(contract)
+
+    for method, prepare in BENCHMARKS.items():
+        if args.only not in method:
+            continue
+        sender, value, call_args = prepare(contract, addresses, 0)
+        # Report each method against the same starting state
+        try:
+            with transaction():
+                _, report = profiler.call(method, *call_args, sender=sender, value=value)
+                raise _Rollback
+        except _Rollback:
+            pass
+        print(_format_report(report))
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
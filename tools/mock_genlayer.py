@@ -0,0 +1,290 @@
+"""
+In-process stand-in for the parts of the genlayer SDK that PRYMUS_AMM.py uses
+
+Provides gl (Contract, msg, public.view / write / write.payable), TreeMap,
+DynArray, u256 / i256 and allow_storage, good enough to deploy PRYMUSAMM in
+the current process:
+
+    amm = load_contract()
+    contract = deploy(amm)
+    call(contract, "buy", sender="0xabc", value=10**18)
+
+Every call runs as a transaction: storage writes are journaled and undone
+if the method raises, like a reverted transaction on chain. Values are
+ints (subclasses pass through untouched); u256 / i256 check their range
+when constructed.
+"""
+
+import ast
+import contextlib
+import itertools
+import os
+import sys
+import types
+
+__all__ = ["gl", "u8", "u256", "i256", "TreeMap", "DynArray", "allow_storage"]
+
+CONTRACT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "PRYMUS_AMM.py")
+
+DEFAULT_DEPLOYER = "0xe91d64dba77f752f78ce729d12b5625939be42b530591f026ca2b2a44ff05fc0"
+
+U8_MAX = 2**8 - 1
+U256_MAX = 2**256 - 1
+I256_MIN = -(2**255)
+I256_MAX = 2**255 - 1
+
+
+# ============== INTEGER TYPES ==============
+
+def u8(value) -> int:
+    """Unsigned 8-bit integer (a plain int, range checked)"""
+    if not isinstance(value, int):
+        value = int(value)
+    if not 0 <= value <= U8_MAX:
+        raise OverflowError(f"u8 out of range: {value}")
+    return value
+
+
+def u256(value) -> int:
+    """Unsigned 256-bit integer (a plain int, range checked)"""
+    if not isinstance(value, int):
+        value = int(value)
+    if not 0 <= value <= U256_MAX:
+        raise OverflowError(f"u256 out of range: {value}")
+    return value
+
+
+def i256(value) -> int:
+    """Signed 256-bit integer (a plain int, range checked)"""
+    if not isinstance(value, int):
+        value = int(value)
+    if not I256_MIN <= value <= I256_MAX:
+        raise OverflowError(f"i256 out of range: {value}")
+    return value
+
+
+# ============== TRANSACTION JOURNAL ==============
+# While a transaction is open every storage write records how to undo
+# itself; a failing call replays the journal backwards
+
+_MISSING = object()
+_journal = None
+
+
+def _record(undo):
+    if _journal is not None:
+        _journal.append(undo)
+
+
+@contextlib.contextmanager
+def transaction():
+    """Run a block atomically: undo all storage writes if it raises"""
+    global _journal
+    outer = _journal
+    entries = _journal = []
+    try:
+        yield
+    except BaseException:
+        for undo in reversed(entries):
+            undo()
+        raise
+    else:
+        # A committed inner transaction is still undone if the outer one fails
+        if outer is not None:
+            outer.extend(entries)
+    finally:
+        _journal = outer
+
+
+def _journaled_setattr(obj, name, value):
+    old = obj.__dict__.get(name, _MISSING)
+    if old is _MISSING:
+        _record(lambda: obj.__dict__.pop(name, None))
+    else:
+        _record(lambda: obj.__dict__.__setitem__(name, old))
+    object.__setattr__(obj, name, value)
+
+
+# ============== STORAGE TYPES ==============
+
+class _TreeMap(dict):
+    """Mapping stored in contract storage"""
+
+    def __setitem__(self, key, value):
+        old = dict.get(self, key, _MISSING)
+        if old is _MISSING:
+            _record(lambda: dict.pop(self, key, None))
+        else:
+            _record(lambda: dict.__setitem__(self, key, old))
+        dict.__setitem__(self, key, value)
+
+    def __delitem__(self, key):
+        old = dict.__getitem__(self, key)
+        dict.__delitem__(self, key)
+        _record(lambda: dict.__setitem__(self, key, old))
+
+
+class _DynArray(list):
+    """Growable array stored in contract storage"""
+
+    def __setitem__(self, index, value):
+        old = list.__getitem__(self, index)
+        list.__setitem__(self, index, value)
+        _record(lambda: list.__setitem__(self, index, old))
+
+    def append(self, value):
+        list.append(self, value)
+        _record(lambda: list.pop(self))
+
+    def pop(self, index=-1):
+        if index < 0:
+            index += len(self)
+        value = list.pop(self, index)
+        _record(lambda: list.insert(self, index, value))
+        return value
+
+
+class _Generic:
+    """Subscriptable alias: TreeMap[str, u256]() builds an empty container"""
+
+    def __init__(self, container):
+        self._container = container
+
+    def __getitem__(self, params):
+        return self._container
+
+    def __call__(self, *args):
+        return self._container(*args)
+
+
+TreeMap = _Generic(_TreeMap)
+DynArray = _Generic(_DynArray)
+
+
+def allow_storage(cls):
+    """Mark a dataclass as storable; in-place field updates are journaled"""
+    cls.__setattr__ = _journaled_setattr
+    return cls
+
+
+# ============== gl ==============
+
+class _Message:
+    """Sender and attached value of the call being executed"""
+
+    def __init__(self):
+        self.sender = DEFAULT_DEPLOYER
+        self.value = 0
+
+
+class _Write:
+    """gl.public.write and gl.public.write.payable"""
+
+    def __call__(self, method):
+        method.__gl_public__ = "write"
+        return method
+
+    def payable(self, method):
+        method.__gl_public__ = "payable"
+        return method
+
+
+class _Public:
+    write = _Write()
+
+    @staticmethod
+    def view(method):
+        method.__gl_public__ = "view"
+        return method
+
+
+class _Contract:
+    """Base class of intelligent contracts; attribute writes are journaled"""
+
+    __setattr__ = _journaled_setattr
+
+
+gl = types.SimpleNamespace(Contract=_Contract, msg=_Message(), public=_Public())
+
+
+# ============== LOADING AND CALLING ==============
+
+_module_ids = itertools.count()
+
+
+def load_contract(path: str = CONTRACT_PATH, constants: dict | None = None) -> types.ModuleType:
+    """
+    Import a contract file against this runtime as a fresh module
+    constants overrides top-level NAME = value assignments (for example
+    {"DIVIDEND_FEE": 10}) before the module runs, so derived constants follow
+    """
+    sys.modules["genlayer"] = sys.modules[__name__]
+
+    with open(path) as source_file:
+        tree = ast.parse(source_file.read(), path)
+
+    if constants:
+        missing = set(constants)
+        for node in tree.body:
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name) and node.targets[0].id in constants):
+                node.value = ast.copy_location(ast.Constant(constants[node.targets[0].id]), node.value)
+                missing.discard(node.targets[0].id)
+        if missing:
+            raise KeyError(f"No top-level constants named {sorted(missing)} in {path}")
+
+    name = f"_prymus_contract_{next(_module_ids)}"
+    module = types.ModuleType(name)
+    module.__file__ = path
+    sys.modules[name] = module  # dataclasses resolves annotations through sys.modules
+    exec(compile(tree, path, "exec"), module.__dict__)
+    return module
+
+
+def contract_class(module: types.ModuleType) -> type:
+    """The gl.Contract subclass defined by a loaded contract module"""
+    for value in vars(module).values():
+        if isinstance(value, type) and issubclass(value, _Contract) and value is not _Contract:
+            return value
+    raise LookupError(f"No contract class in {module.__file__}")
+
+
+def deploy(module: types.ModuleType, sender: str = DEFAULT_DEPLOYER):
+    """Construct the module's contract as sender"""
+    with message(sender):
+        return contract_class(module)()
+
+
+@contextlib.contextmanager
+def message(sender: str, value: int = 0):
+    """Set gl.msg for the duration of a block"""
+    previous = (gl.msg.sender, gl.msg.value)
+    gl.msg.sender, gl.msg.value = sender, value
+    try:
+        yield
+    finally:
+        gl.msg.sender, gl.msg.value = previous
+
+
+def public_methods(cls: type) -> dict:
+    """Name -> "view" / "write" / "payable" for every public method of cls"""
+    methods = {}
+    for name in dir(cls):
+        kind = getattr(getattr(cls, name), "__gl_public__", None)
+        if kind is not None:
+            methods[name] = kind
+    return methods
+
+
+def call(contract, method: str, *args, sender: str = DEFAULT_DEPLOYER, value: int = 0):
+    """Execute one public method call as a transaction from sender"""
+    bound = getattr(contract, method)
+    kind = getattr(bound, "__gl_public__", None)
+    if kind is None:
+        raise AttributeError(f"{method} is not a public method")
+    if value and kind != "payable":
+        raise ValueError(f"{method} is not payable")
+
+    with message(sender, value), transaction():
+        return bound(*args)
+
@@ -0,0 +1,369 @@
+"""
+Deterministic trace replay and parameter sweeps for PRYMUSAMM
+
+    python -m tools.replay generate trace.jsonl.gz --transactions 1000000
+    python -m tools.replay run trace.jsonl.gz --steps steps.jsonl
+    python -m tools.replay sweep trace.jsonl.gz --dividend-fee 10,20,25 \\
+        --token-price-incremental 5000000,10000000 --processes 8
+
+A trace is JSON Lines (gzip if the name ends in .gz), one transaction per
+line, replayed in order against a freshly deployed contract:
+
+    {"op": "buy", "sender": "0x..", "value": 10**18, "referrer": "0x.."}
+    {"op": "sell", "sender": "0x..", "amount": 5 * 10**18}
+    {"op": "transfer", "sender": "0x..", "to": "0x..", "fraction_ppm": 250000}
+    {"op": "reinvest" | "withdraw" | "exit", "sender": "0x.."}
+
+sell and transfer take either an absolute token amount or fraction_ppm of
+the sender's balance at that point, so one synthetic trace means the same
+thing under every configuration. Transactions that revert are counted and
+skipped, as on chain.
+
+Traces and per-transaction steps are streamed, and a summary keeps a
+bounded price path, so memory does not grow with trace length (only with
+the number of distinct addresses, which the contract itself stores).
+"""
+
+import argparse
+import gzip
+import itertools
+import json
+import multiprocessing
+import random
+import sys
+from typing import Iterable, Iterator, NamedTuple
+
+from tools.mock_genlayer import DEFAULT_DEPLOYER, call, deploy, load_contract
+
+OPERATIONS = ("buy", "sell", "transfer", "reinvest", "withdraw", "exit")
+
+# Contract module constants a configuration may override; everything else
+# in a configuration is set through the admin methods after deployment
+MODULE_CONSTANTS = {"dividend_fee": "DIVIDEND_FEE", "token_price_incremental": "TOKEN_PRICE_INCREMENTAL"}
+
+PRICE_PATH_POINTS = 512
+PPM = 10**6
+
+ONE_ETHER = 10**18
+
+
+# ============== TRACES ==============
+
+def open_stream(path: str, mode: str):
+    """path opened in text mode; "-" is stdout or stdin, which closing leaves open"""
+    if path == "-":
+        if "w" in mode:
+            stream = sys.stdout
+            stream.flush()
+        else:
+            stream = sys.stdin
+        return open(stream.fileno(), mode, encoding=stream.encoding, closefd=False)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode + "t")
+    return open(path, mode)
+
+
+def read_trace(path: str) -> Iterator[dict]:
+    """Transactions of a trace file, one at a time"""
+    with open_stream(path, "r") as trace_file:
+        for line_number, line in enumerate(trace_file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            transaction = json.loads(line)
+            if transaction.get("op") not in OPERATIONS:
+                raise ValueError(f"{path}:{line_number}: unknown op {transaction.get('op')!r}")
+            yield transaction
+
+
+def write_trace(path: str, transactions: Iterable[dict]) -> int:
+    """Write transactions to a trace file; returns how many were written"""
+    count = 0
+    with open_stream(path, "w") as trace_file:
+        for transaction in transactions:
+            trace_file.write(json.dumps(transaction, separators=(",", ":")) + "\n")
+            count += 1
+    return count
+
+
+def synthetic_trace(transactions: int, holders: int, seed: int) -> Iterator[dict]:
+    """Random but reproducible traffic between holders addresses"""
+    rng = random.Random(seed)
+    addresses = [f"0x{index:040x}" for index in range(1, holders + 1)]
+    weights = (50, 20, 10, 10, 8, 2)
+
+    # Everyone buys in once so later sells and transfers have balances
+    for index, address in enumerate(addresses):
+        referrer = addresses[rng.randrange(index)] if index else ""
+        yield {"op": "buy", "sender": address, "value": rng.randint(ONE_ETHER // 100, ONE_ETHER), "referrer": referrer}
+
+    for _ in range(max(0, transactions - holders)):
+        op = rng.choices(OPERATIONS, weights)[0]
+        sender = rng.choice(addresses)
+        if op == "buy":
+            referrer = rng.choice(addresses) if rng.random() < 0.5 else ""
+            yield {"op": op, "sender": sender, "value": rng.randint(ONE_ETHER // 1000, ONE_ETHER), "referrer": referrer}
+        elif op == "sell":
+            yield {"op": op, "sender": sender, "fraction_ppm": rng.randint(PPM // 100, PPM // 2)}
+        elif op == "transfer":
+            yield {"op": op, "sender": sender, "to": rng.choice(addresses), "fraction_ppm": rng.randint(PPM // 100, PPM // 2)}
+        else:
+            yield {"op": op, "sender": sender}
+
+
+# ============== REPLAY ==============
+
+class Step(NamedTuple):
+    """Outcome of one replayed transaction"""
+    index: int
+    op: str
+    sender: str
+    reverted: bool
+    result: object
+    token_supply: int
+    buy_price: int
+    sell_price: int
+
+
+def deploy_config(config: dict):
+    """Deploy a contract with a configuration's parameters applied"""
+    constants = {MODULE_CONSTANTS[name]: value for name, value in config.items() if name in MODULE_CONSTANTS}
+    unknown = set(config) - set(MODULE_CONSTANTS) - {"staking_requirement"}
+    if unknown:
+        raise KeyError(f"Unknown configuration parameters {sorted(unknown)}")
+
+    contract = deploy(load_contract(constants=constants))
+    if "staking_requirement" in config:
+        call(contract, "set_staking_requirement", config["staking_requirement"], sender=DEFAULT_DEPLOYER)
+    return contract
+
+
+def _token_amount(contract, transaction: dict) -> int:
+    if "amount" in transaction:
+        return transaction["amount"]
+    return contract.balance_of(transaction["sender"]) * transaction["fraction_ppm"] // PPM
+
+
+def _arguments(contract, transaction: dict) -> tuple:
+    op = transaction["op"]
+    if op == "buy":
+        return (transaction.get("referrer", ""),)
+    if op == "sell":
+        return (_token_amount(contract, transaction),)
+    if op == "transfer":
+        return (transaction["to"], _token_amount(contract, transaction))
+    return ()
+
+
+def replay(contract, transactions: Iterable[dict], summary: "Summary | None" = None) -> Iterator[Step]:
+    """Drive contract through transactions, yielding one Step per transaction"""
+    for index, transaction in enumerate(transactions):
+        op, sender = transaction["op"], transaction["sender"]
+        if summary is not None:
+            summary.before(contract, transaction)
+
+        result, reverted = None, False
+        try:
+            result = call(contract, op, *_arguments(contract, transaction),
+                          sender=sender, value=transaction.get("value", 0))
+        except AssertionError:
+            reverted = True
+
+        step = Step(index, op, sender, reverted, result,
+                    contract.token_supply, contract.cached_buy_price, contract.cached_sell_price)
+        if summary is not None:
+            summary.after(contract, step)
+        yield step
+
+
+# ============== SUMMARIES ==============
+
+class Summary:
+    """Running totals of one replay, in constant memory"""
+
+    def __init__(self, config: dict, price_path_points: int = PRICE_PATH_POINTS):
+        self.config = config
+        self.transactions = 0
+        self.reverted = {op: 0 for op in OPERATIONS}
+        self.ethereum_in = 0
+        self.ethereum_out = 0
+        self.dividends_paid = 0
+        self.dividends_reinvested = 0
+        self.referral_paid = 0
+        self.referral_credited = 0
+        self.token_supply = 0
+        self.buy_price = 0
+        self.sell_price = 0
+
+        # (index, supply, buy price, sell price) every stride-th step; the
+        # stride doubles and the path is thinned whenever it fills up
+        self.price_path = []
+        self.price_path_points = price_path_points
+        self.stride = 1
+
+        self._value = 0
+        self._referrer = ""
+        self._referrer_bonus = 0
+        self._claimable = (0, 0)
+
+    def before(self, contract, transaction: dict):
+        """Note the state a transaction's payouts are measured against"""
+        op, sender = transaction["op"], transaction["sender"]
+        self._value = transaction.get("value", 0)
+        self._referrer = transaction.get("referrer", "") if op == "buy" else ""
+        if self._referrer:
+            self._referrer_bonus = contract._load_account(self._referrer).referral_bonus
+        if op in ("reinvest", "withdraw", "exit"):
+            self._claimable = (contract._dividends_of(sender), contract._load_account(sender).referral_bonus)
+
+    def after(self, contract, step: Step):
+        """Fold one replayed transaction into the totals"""
+        self.transactions += 1
+        self.token_supply, self.buy_price, self.sell_price = step.token_supply, step.buy_price, step.sell_price
+
+        if step.reverted:
+            self.reverted[step.op] += 1
+        elif step.op == "buy":
+            self.ethereum_in += self._value
+            if self._referrer:
+                self.referral_credited += contract._load_account(self._referrer).referral_bonus - self._referrer_bonus
+        elif step.op == "sell":
+            self.ethereum_out += step.result
+        elif step.op in ("reinvest", "withdraw", "exit"):
+            dividends, referral = self._claimable
+            self.referral_paid += referral
+            if step.op == "reinvest":
+                self.dividends_reinvested += dividends
+            else:
+                self.dividends_paid += dividends
+                self.ethereum_out += step.result if step.op == "withdraw" else step.result[1]
+
+        if step.index % self.stride == 0:
+            self.price_path.append((step.index, step.token_supply, step.buy_price, step.sell_price))
+            if len(self.price_path) >= self.price_path_points:
+                self.stride *= 2
+                self.price_path = [point for point in self.price_path if point[0] % self.stride == 0]
+
+    def as_dict(self) -> dict:
+        return {
+            "config": self.config,
+            "transactions": self.transactions,
+            "reverted": self.reverted,
+            "final_supply": self.token_supply,
+            "final_buy_price": self.buy_price,
+            "final_sell_price": self.sell_price,
+            "ethereum_in": self.ethereum_in,
+            "ethereum_out": self.ethereum_out,
+            "dividends_paid": self.dividends_paid,
+            "dividends_reinvested": self.dividends_reinvested,
+            "referral_paid": self.referral_paid,
+            "referral_credited": self.referral_credited,
+            "price_path": self.price_path,
+        }
+
+
+def replay_config(trace_path: str, config: dict, steps_path: str | None = None) -> dict:
+    """Replay a trace file against one configuration; returns its summary"""
+    contract = deploy_config(config)
+    summary = Summary(config)
+    steps = replay(contract, read_trace(trace_path), summary)
+
+    if steps_path is None:
+        for _ in steps:
+            pass
+    else:
+        with open_stream(steps_path, "w") as steps_file:
+            for step in steps:
+                steps_file.write(json.dumps(step._asdict(), separators=(",", ":")) + "\n")
+
+    return summary.as_dict()
+
+
+# ============== SWEEPS ==============
+
+def parameter_grid(**values: list[int]) -> list[dict]:
+    """Every combination of the given parameter values, in a fixed order"""
+    names = sorted(values)
+    return [dict(zip(names, combination)) for combination in itertools.product(*(values[name] for name in names))]
+
+
+def _replay_worker(job: tuple[str, dict]) -> dict:
+    return replay_config(*job)
+
+
+def sweep(trace_path: str, configs: list[dict], processes: int | None = None) -> Iterator[dict]:
+    """Summaries of every configuration, in order, replayed across a process pool"""
+    jobs = [(trace_path, config) for config in configs]
+    if processes == 1 or len(jobs) == 1:
+        yield from map(_replay_worker, jobs)
+        return
+
+    with multiprocessing.Pool(processes) as pool:
+        yield from pool.imap(_replay_worker, jobs, chunksize=1)
+
+
+# ============== COMMAND LINE ==============
+
+def _int_list(text: str) -> list[int]:
+    return [int(value) for value in text.split(",")]
+
+
+def _config_arguments(parser, multiple: bool):
+    kind = _int_list if multiple else int
+    suffix = " (comma-separated)" if multiple else ""
+    parser.add_argument("--dividend-fee", type=kind, help="DIVIDEND_FEE" + suffix)
+    parser.add_argument("--token-price-incremental", type=kind, help="TOKEN_PRICE_INCREMENTAL" + suffix)
+    parser.add_argument("--staking-requirement", type=kind, help="staking_requirement in token units" + suffix)
+
+
+def _config_values(args) -> dict:
+    names = ("dividend_fee", "token_price_incremental", "staking_requirement")
+    return {name: getattr(args, name) for name in names if getattr(args, name) is not None}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    generate = commands.add_parser("generate", help="write a synthetic trace")
+    generate.add_argument("trace")
+    generate.add_argument("--transactions", type=int, default=100000)
+    generate.add_argument("--holders", type=int, default=1000)
+    generate.add_argument("--seed", type=int, default=1)
+
+    run = commands.add_parser("run", help="replay a trace against one configuration")
+    run.add_argument("trace")
+    run.add_argument("--steps", help="also stream every step to this JSON Lines file")
+    run.add_argument("--price-path", action="store_true", help="include the price path in the summary")
+    _config_arguments(run, multiple=False)
+
+    sweep_command = commands.add_parser("sweep", help="replay a trace against a parameter grid")
+    sweep_command.add_argument("trace")
+    sweep_command.add_argument("--processes", type=int, help="worker processes (default: one per CPU)")
+    sweep_command.add_argument("--output", default="-", help="JSON Lines file of summaries (default: stdout)")
+    _config_arguments(sweep_command, multiple=True)
+
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        count = write_trace(args.trace, synthetic_trace(args.transactions, args.holders, args.seed))
+        print(f"wrote {count} transactions to {args.trace}", file=sys.stderr)
+
+    elif args.command == "run":
+        summary = replay_config(args.trace, _config_values(args), args.steps)
+        if not args.price_path:
+            del summary["price_path"]
+        print(json.dumps(summary, indent=2))
+
+    else:
+        configs = parameter_grid(**_config_values(args))
+        with open_stream(args.output, "w") as output:
+            for summary in sweep(args.trace, configs, args.processes):
+                output.write(json.dumps(summary, separators=(",", ":")) + "\n")
+                output.flush()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Split a Hourglass holder snapshot into PRYMUSAMM import calls
+
+    python -m tools.snapshot_import plan snapshot.jsonl plan.jsonl
+    python -m tools.snapshot_import simulate snapshot.jsonl
+    python -m tools.snapshot_import plan snapshot.jsonl rest.jsonl --resume-from 51200
+
+A snapshot is JSON Lines (gzip if the name ends in .gz). The first line
+holds the deployment's totals, and every further line is one address
+with its tokenBalanceLedger, payouts and referralBalance entries:
+
+    {"token_supply": ..., "profit_per_share": ...}
+    {"address": "0x..", "balance": ..., "payout": ..., "referral_bonus": ...}
+
+plan streams the snapshot into begin_import, import_accounts chunks and
+finalize_import, one call per line. A chunk is closed at the contract's
+IMPORT_BATCH_LIMIT accounts or --max-bytes of encoded arguments, whichever
+comes first. It checks the same invariants as the contract while it reads,
+so a bad snapshot stops at the record that breaks it. --resume-from skips
+the accounts import_status() already reports as imported (snapshot order
+must be unchanged). simulate runs the whole plan against the mock runtime.
+"""
+
+import argparse
+import json
+import sys
+from typing import Iterable, Iterator
+
+from tools.mock_genlayer import DEFAULT_DEPLOYER, call, deploy, load_contract
+from tools.replay import open_stream
+
+MAGNITUDE = 2**64
+DEFAULT_MAX_BYTES = 64 * 1024
+
+
+class SnapshotError(ValueError):
+    """A snapshot record that the contract would reject"""
+
+
+# ============== SNAPSHOTS ==============
+
+def read_snapshot(path: str) -> tuple[dict, Iterator[dict]]:
+    """(totals, account records) of a snapshot file; records are streamed"""
+    snapshot_file = open_stream(path, "r")
+    header = json.loads(snapshot_file.readline())
+    if "token_supply" not in header or "profit_per_share" not in header:
+        snapshot_file.close()
+        raise SnapshotError(f"{path}: first line must hold token_supply and profit_per_share")
+
+    def records():
+        with snapshot_file:
+            for line_number, line in enumerate(snapshot_file, 2):
+                line = line.strip()
+                if line:
+                    record = json.loads(line)
+                    record["line"] = line_number
+                    yield record
+
+    return header, records()
+
+
+def snapshot_from_hourglass(hourglass) -> tuple[dict, Iterator[dict]]:
+    """Snapshot of a tools.hourglass.Hourglass, in the same shape as read_snapshot"""
+    addresses = sorted(set(hourglass.token_balance_ledger) | set(hourglass.payouts) | set(hourglass.referral_balance))
+    header = {"token_supply": hourglass.total_token_supply, "profit_per_share": hourglass.profit_per_share}
+    records = ({"address": address,
+                "balance": hourglass.token_balance_ledger.get(address, 0),
+                "payout": hourglass.payouts.get(address, 0),
+                "referral_bonus": hourglass.referral_balance.get(address, 0)} for address in addresses)
+    return header, records
+
+
+# ============== VALIDATION ==============
+
+class Validator:
+    """The contract's import checks, applied one record at a time"""
+
+    def __init__(self, header: dict):
+        self.token_supply = header["token_supply"]
+        self.profit_per_share = header["profit_per_share"]
+        self.imported_supply = 0
+        self.liabilities = 0
+        self.accounts = 0
+
+        # Solidity pays dividends on an emptied balance; PRYMUSAMM reports
+        # none, so these earnings are not claimable after the import
+        self.stranded_accounts = 0
+        self.stranded_dividends = 0
+
+    def check(self, record: dict):
+        where = f"line {record.get('line', '?')} ({record['address']})"
+        balance, payout, referral_bonus = record["balance"], record["payout"], record["referral_bonus"]
+        if balance < 0 or referral_bonus < 0:
+            raise SnapshotError(f"{where}: negative balance or referral bonus")
+
+        owed = self.profit_per_share * balance - payout
+        if owed < 0:
+            raise SnapshotError(f"{where}: negative dividends")
+
+        self.imported_supply += balance
+        if self.imported_supply > self.token_supply:
+            raise SnapshotError(f"{where}: balances exceed snapshot supply {self.token_supply}")
+
+        if balance == 0 and owed >= MAGNITUDE:
+            self.stranded_accounts += 1
+            self.stranded_dividends += owed // MAGNITUDE
+        elif balance > 0:
+            self.liabilities += owed // MAGNITUDE
+        self.liabilities += referral_bonus
+        self.accounts += 1
+
+    def finish(self):
+        if self.imported_supply != self.token_supply:
+            raise SnapshotError(f"balances sum to {self.imported_supply}, snapshot supply is {self.token_supply}")
+
+
+# ============== CHUNKS ==============
+
+def _encoded_size(record: dict) -> int:
+    return sum(len(str(record[field])) + 4 for field in ("address", "balance", "payout", "referral_bonus"))
+
+
+def chunks(records: Iterable[dict], max_accounts: int, max_bytes: int) -> Iterator[list[dict]]:
+    """Records grouped into import_accounts calls of bounded length and size"""
+    chunk = []
+    size = 0
+    for record in records:
+        record_size = _encoded_size(record)
+        if chunk and (len(chunk) == max_accounts or size + record_size > max_bytes):
+            yield chunk
+            chunk, size = [], 0
+        chunk.append(record)
+        size += record_size
+    if chunk:
+        yield chunk
+
+
+def import_calls(header: dict, records: Iterable[dict], validator: Validator, max_accounts: int,
+                 max_bytes: int = DEFAULT_MAX_BYTES, resume_from: int = 0) -> Iterator[tuple[str, tuple]]:
+    """(method, args) for every contract call of the import, streamed"""
+    def checked():
+        for index, record in enumerate(records):
+            validator.check(record)
+            if index >= resume_from:
+                yield record
+
+    if resume_from == 0:
+        yield "begin_import", (header["token_supply"], header["profit_per_share"])
+
+    for chunk in chunks(checked(), max_accounts, max_bytes):
+        yield "import_accounts", tuple([record[field] for record in chunk]
+                                       for field in ("address", "balance", "payout", "referral_bonus"))
+
+    validator.finish()
+    yield "finalize_import", ()
+
+
+# ============== COMMAND LINE ==============
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("command", choices=("plan", "simulate"))
+    parser.add_argument("snapshot")
+    parser.add_argument("plan", nargs="?", default="-", help="where plan writes the calls (default: stdout)")
+    parser.add_argument("--max-bytes", type=int, default=DEFAULT_MAX_BYTES, help="encoded arguments per chunk")
+    parser.add_argument("--resume-from", type=int, default=0, help="accounts already imported")
+    args = parser.parse_args(argv)
+
+    amm = load_contract()
+    header, records = read_snapshot(args.snapshot)
+    validator = Validator(header)
+    calls = import_calls(header, records, validator, amm.IMPORT_BATCH_LIMIT, args.max_bytes, args.resume_from)
+
+    try:
+        if args.command == "plan":
+            with open_stream(args.plan, "w") as plan_file:
+                for method, call_args in calls:
+                    plan_file.write(json.dumps({"method": method, "args": call_args}, separators=(",", ":")) + "\n")
+        else:
+            contract = deploy(amm)
+            for method, call_args in calls:
+                call(contract, method, *call_args, sender=DEFAULT_DEPLOYER)
+            print(json.dumps(contract.import_status()), file=sys.stderr)
+    except SnapshotError as error:
+        print(f"{args.snapshot}: {error}", file=sys.stderr)
+        return 1
+
+    print(f"{validator.accounts} accounts, supply {validator.imported_supply}, "
+          f"liabilities {validator.liabilities} wei", file=sys.stderr)
+    if validator.stranded_accounts:
+        print(f"warning: {validator.stranded_accounts} accounts without tokens hold "
+              f"{validator.stranded_dividends} wei of dividends PRYMUSAMM will not pay out", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Local stand-in for a GenLayer node serving PRYMUSAMM over JSON-RPC
+
+    python -m tools.stub_node --port 4000 --holders 1000 --churn 0.05
+
+Deploys the contract on the mock runtime, populates it like the bench
+scenarios and answers gen_call reads (single or batched) over keep-alive
+HTTP/1.1. Requests and results are encoded as on a GenLayer node, so
+prymus_client talks to this and to a real node the same way:
+
+    {"jsonrpc": "2.0", "id": 1, "method": "gen_call",
+     "params": [{"type": "read", "to": "0x..", "from": "0x..", "data": "0x.."}]}
+
+data is the RLP list [calldata of {"method": "balance_of", "args": ["0x.."]},
+leader only flag] in hex, and the result is the hex calldata of the return
+value (see prymus_client/calldata.py). Only views can be called.
+
+--churn makes a random holder buy every that many seconds, so token_supply
+moves as on a live node; --latency adds a fixed delay per HTTP request to
+stand in for network and node time.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+
+from prymus_client.calldata import Address, encode, parse_read_data
+from tools.bench import ONE_ETHER, build_scenario
+from tools.mock_genlayer import call, load_contract, message
+
+CONTRACT_ADDRESS = "0x" + "ab" * 20
+
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+EXECUTION_ERROR = -32000
+
+
+class StubNode:
+    """The contract, its holders and the JSON-RPC dispatch"""
+
+    def __init__(self, holders: int, seed: int, latency: float = 0.0):
+        self.contract, self.addresses = build_scenario(load_contract(), holders, ONE_ETHER, seed)
+        self.latency = latency
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.calls = 0
+
+    def dispatch(self, request) -> dict:
+        """Response object for one JSON-RPC request"""
+        if not isinstance(request, dict) or request.get("jsonrpc") != "2.0" or "method" not in request:
+            return _error(None, INVALID_REQUEST, "Invalid request")
+        request_id = request.get("id")
+        if request["method"] != "gen_call":
+            return _error(request_id, METHOD_NOT_FOUND, f"Unknown method {request['method']}")
+
+        try:
+            (params,) = request["params"]
+            if params.get("type") != "read" or params.get("to") != CONTRACT_ADDRESS:
+                raise ValueError("only reads of the served contract are supported")
+            function, args, _ = parse_read_data(params["data"])
+            # The contract takes addresses as hex strings
+            args = [f"0x{arg.hex()}" if isinstance(arg, Address) else arg for arg in args]
+            method = getattr(self.contract, function, None)
+            if getattr(method, "__gl_public__", None) != "view":
+                raise ValueError(f"{function} is not a view")
+        except (KeyError, TypeError, ValueError) as error:
+            return _error(request_id, INVALID_PARAMS, str(error))
+
+        self.calls += 1
+        try:
+            with message(params.get("from", "")):
+                result = encode(method(*args))
+        except Exception as error:
+            return _error(request_id, EXECUTION_ERROR, f"{type(error).__name__}: {error}")
+        return {"jsonrpc": "2.0", "id": request_id, "result": result.hex()}
+
+    def handle(self, body: bytes) -> bytes:
+        try:
+            payload = json.loads(body)
+        except ValueError:
+            return json.dumps(_error(None, PARSE_ERROR, "Parse error")).encode()
+        if isinstance(payload, list):
+            return json.dumps([self.dispatch(request) for request in payload]).encode()
+        return json.dumps(self.dispatch(payload)).encode()
+
+    # ============== HTTP ==============
+
+    async def serve_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                if not request_line.startswith(b"POST "):
+                    status, response = "405 Method Not Allowed", b""
+                else:
+                    status, response = "200 OK", self.handle(body)
+                writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                             f"Content-Length: {len(response)}\r\n\r\n".encode("latin-1") + response)
+                await writer.drain()
+
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def churn(self, interval: float):
+        """A random buy every interval seconds, so token_supply keeps moving"""
+        while True:
+            await asyncio.sleep(interval)
+            buyer = self.rng.choice(self.addresses)
+            call(self.contract, "buy", "", sender=buyer, value=self.rng.randint(ONE_ETHER // 100, ONE_ETHER))
+
+
+def _error(request_id, code: int, message_text: str) -> dict:
+    return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message_text}}
+
+
+async def serve(host: str, port: int, node: StubNode, churn: float = 0.0, ready=None):
+    """Serve node until cancelled; ready (an asyncio.Event) is set once listening"""
+    server = await asyncio.start_server(node.serve_connection, host, port)
+    churn_task = asyncio.ensure_future(node.churn(churn)) if churn else None
+    if ready is not None:
+        ready.set()
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        if churn_task is not None:
+            churn_task.cancel()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--holders", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--churn", type=float, default=0.0, help="seconds between random buys (0: none)")
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every HTTP request")
+    args = parser.parse_args(argv)
+
+    node = StubNode(args.holders, args.seed, args.latency)
+    print(f"serving {CONTRACT_ADDRESS} with {args.holders} holders on http://{args.host}:{args.port}/",
+          file=sys.stderr, flush=True)
+    try:
+        asyncio.run(serve(args.host, args.port, node, args.churn))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())